@@ -1,14 +1,64 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from src.graph import create_graph
-from langchain_core.messages import HumanMessage
+from src.utils.deadline import deadline_after
+from src.utils.admission import admission_controller, AdmissionRejected, is_urgent, PRIORITY_HIGH, PRIORITY_NORMAL
+from src.utils.idempotency import idempotency_store, IdempotencyConflict
+from src.utils.cache import medical_search_cache
+from src.utils.metrics import registry as metrics_registry
+from src.utils.llm import warm_up as warm_up_llm
+from contextlib import asynccontextmanager
+from langchain_core.messages import HumanMessage, AIMessageChunk
+import asyncio
+import json
+import time
 import uuid
 import os
 import sys
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, Callable
 
-app = FastAPI(title="MediGraph API", description="Medical Diagnostic Agent API")
+# 그래프는 import 시점이 아니라 서버 시작(lifespan) 또는 첫 요청 시 컴파일합니다.
+_graph = None
+_ready = False
+
+def get_graph():
+    """컴파일된 그래프를 반환합니다 (최초 호출 시 컴파일)."""
+    global _graph
+    if _graph is None:
+        _graph = create_graph()
+    return _graph
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    트래픽을 받기 전에 그래프 컴파일, LLM 클라이언트/커넥션 풀 예열, 검색 도구 생성, 로컬 근거 인덱스 열기를 마칩니다.
+    /ready는 이 과정이 끝난 뒤에만 200을 반환합니다.
+    """
+    global _ready
+    started = time.perf_counter()
+    get_graph()
+    if os.getenv("STARTUP_WARMUP", "1") == "1":
+        from src.nodes.medical_rag import get_search_tool
+        from src.utils.local_index import get_local_index
+        try:
+            await asyncio.to_thread(get_search_tool)
+        except Exception as e:
+            print(f"검색 도구 예열 경고: {e}")
+        try:
+            if await asyncio.to_thread(get_local_index) is None:
+                print("로컬 근거 인덱스가 없습니다. (python -m src.utils.local_index build)")
+        except Exception as e:
+            print(f"로컬 근거 인덱스 예열 경고: {e}")
+        await warm_up_llm()
+    _ready = True
+    print(f"MediGraph ready in {time.perf_counter() - started:.2f}s")
+    yield
+    _ready = False
+
+app = FastAPI(title="MediGraph API", description="Medical Diagnostic Agent API", lifespan=lifespan)
 
 # CORS 설정 (프론트엔드 통신 허용)
 app.add_middleware(
@@ -19,12 +69,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 그래프 초기화
-graph = create_graph()
+# 단계 로그 기본 상세도 (요청에서 steps를 지정하지 않은 경우)
+CHAT_STEPS_DEFAULT = os.getenv("CHAT_STEPS_DEFAULT", "full")
+
+# ChatResponse.steps의 summary 모드에 포함되는 라우팅 관련 필드
+STEP_SUMMARY_FIELDS = ("next_step", "search_count", "ask_count", "critique", "fact_check_confidence", "degraded")
+
+# 배치 요청 설정: 한 배치 안에서 동시에 실행할 최대 대화 수와 최대 항목 수
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "100"))
 
 class ChatRequest(BaseModel):
     message: str
     thread_id: Optional[str] = None
+    # 단계 로그 상세도: none(생략) / summary(노드, 소요 시간, 라우팅 필드) / full(노드 출력 전체)
+    steps: Optional[Literal["none", "summary", "full"]] = None
+    # 클라이언트 요청 ID (멱등 키). 같은 thread_id와 request_id로 재시도하면 저장된 응답을 반환
+    request_id: Optional[str] = None
+    # 이 턴의 전체 처리 시간 예산 (밀리초). 지정하지 않으면 서버 기본값(CHAT_DEADLINE_SECONDS) 사용
+    deadline_ms: Optional[int] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -37,134 +100,514 @@ class ChatResponse(BaseModel):
     medication_info: Optional[str] = None
     fact_check_confidence: Optional[int] = None
     fact_check_sources: Optional[List[str]] = None
+    # 마감 시간 때문에 생략/축소된 단계 (예: 'fact_checker:skipped')
+    degraded: List[str] = []
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+    concurrency: Optional[int] = None
+
+class BatchChatItemResult(BaseModel):
+    thread_id: str
+    response: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItemResult]
 
 @app.get("/")
 async def root():
     return {"message": "MediGraph API is running"}
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+@app.get("/ready")
+async def ready():
+    """준비 상태 확인 (lifespan 예열이 끝나기 전에는 503)"""
+    if not _ready:
+        raise HTTPException(status_code=503, detail="warming up")
+    return {"ready": True}
+
+def _collect_runtime_metrics():
+    """스크레이프 시점에 캐시/승인 제어/멱등 저장소 상태를 메트릭으로 변환합니다."""
+    cache = medical_search_cache.stats()
+    admission = admission_controller.stats()
+    idempotency = idempotency_store.stats()
+    threads = _last_thread_report
+    lanes = admission["lanes"]
+    return [
+        ("medigraph_search_cache_hits_total", "counter", "medical_search_cache hits", [({}, cache["hits"])]),
+        ("medigraph_search_cache_misses_total", "counter", "medical_search_cache misses", [({}, cache["misses"])]),
+        ("medigraph_search_cache_evictions_total", "counter", "medical_search_cache LRU evictions", [({}, cache["evictions"])]),
+        ("medigraph_search_cache_expirations_total", "counter", "medical_search_cache TTL expirations", [({}, cache["expirations"])]),
+        ("medigraph_search_cache_entries", "gauge", "medical_search_cache current size", [({}, cache["size"])]),
+        ("medigraph_admission_inflight", "gauge", "Graph runs currently admitted", [({}, admission["inflight"])]),
+        ("medigraph_admission_queue_depth", "gauge", "Requests waiting for admission", [({"lane": lane}, stats["queue_depth"]) for lane, stats in lanes.items()]),
+        ("medigraph_admission_rejected_total", "counter", "Requests rejected with 503", [({"lane": lane}, stats["rejected"]) for lane, stats in lanes.items()]),
+        ("medigraph_idempotent_replays_total", "counter", "Retried requests served without re-execution", [({"kind": "replayed"}, idempotency["replayed"]), ({"kind": "joined"}, idempotency["joined"])]),
+        ("medigraph_checkpoint_threads", "gauge", "Conversation threads held by the checkpointer", [({}, threads.get("threads", 0))]),
+        ("medigraph_checkpoint_bytes", "gauge", "Serialized checkpoint bytes held by the checkpointer", [({}, threads.get("total_bytes", 0))]),
+    ]
+
+# /metrics가 마지막으로 집계한 체크포인터 보고서 (수집기는 동기 함수이므로 엔드포인트에서 미리 갱신)
+_last_thread_report: Dict[str, Any] = {}
+
+async def _thread_memory_report() -> Dict[str, Any]:
     """
-    사용자의 메시지를 받아 MediGraph 에이전트를 실행하고 결과를 반환합니다.
+    체크포인터가 보관 중인 스레드 수와 스레드별 바이트 수
+    저장소 순회(SQLite GROUP BY 또는 메모리 저장소 합산)는 이벤트 루프 밖에서 수행합니다.
     """
-    thread_id = request.thread_id or str(uuid.uuid4())
-    config = {"configurable": {"thread_id": thread_id}}
+    report = getattr(get_graph().checkpointer, "amemory_report", None)
+    return await report() if report is not None else {}
+
+metrics_registry.register_collector(_collect_runtime_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 텍스트 포맷 메트릭"""
+    global _last_thread_report
+    try:
+        _last_thread_report = await _thread_memory_report()
+    except Exception as e:
+        print(f"Metrics collector error: {e}")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/stats/idempotency")
+async def idempotency_stats():
+    """멱등 저장소 상태 (완료/실행 중 항목 수, 재사용 횟수)"""
+    return idempotency_store.stats()
+
+@app.get("/stats/admission")
+async def admission_stats():
+    """승인 제어 대기열 깊이 및 대기 시간 통계"""
+    return admission_controller.stats()
+
+@app.get("/stats/resilience")
+async def resilience_stats():
+    """노드별 호출 지연 백분위수, 헤징 기준, 재시도 예산 및 헤징/재시도 횟수"""
+    from src.utils import resilience
+    return resilience.stats()
+
+@app.get("/stats/rate_limits")
+async def rate_limit_stats():
+    """업스트림별 동시성 한도, 진행/대기 중 호출 수, 버킷 잔량"""
+    from src.utils import rate_limit
+    return rate_limit.stats()
+
+@app.get("/stats/speculation")
+async def speculation_stats():
+    """라우터와 동시에 시작한 추측 검색의 사용률과 절약된 검색 시간"""
+    from src.nodes.medical_rag import speculation_stats
+    return speculation_stats()
+
+@app.get("/stats/local_index")
+async def local_index_stats():
+    """로컬 근거 인덱스의 현재 세대, 문서/용어 수와 조회 적중률"""
+    from src.utils import local_index
+    return local_index.stats()
+
+@app.get("/stats/llm_cache")
+async def llm_cache_stats():
+    """LLM 응답 캐시 정책과 노드별 적중/실패 횟수"""
+    from src.utils.llm_cache import llm_response_cache
+    if llm_response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **llm_response_cache.stats()}
+
+@app.get("/stats/threads")
+async def thread_stats():
+    """체크포인터에 보관 중인 대화 스레드 수와 스레드별 메모리 사용량"""
+    return await _thread_memory_report()
+
+# CHECKPOINT_AT_TURN_END=1이면 super-step마다가 아니라 턴이 끝날 때 한 번만 체크포인트를 저장합니다.
+# (턴 도중 실패하면 그 턴의 중간 상태는 남지 않고, 다음 요청은 이전 턴 종료 시점부터 이어집니다.)
+GRAPH_RUN_OPTIONS = {"durability": "exit"} if os.getenv("CHECKPOINT_AT_TURN_END", "0") == "1" else {}
+
+# 토큰 단위 스트리밍을 수행할 노드 (최종 리포트를 생성하는 노드)
+STREAM_TOKEN_NODES = {"diagnosis_generator", "emergency_response"}
+
+def _new_turn_result() -> Dict[str, Any]:
+    """한 턴 동안 노드 출력에서 수집되는 응답 필드를 초기화합니다."""
+    return {
+        "response": None,
+        "diagnosis": None,
+        "next_step": None,
+        "doctor_pass": None,
+        "recommended_department": None,
+        "medication_info": None,
+        "fact_check_confidence": None,
+        "fact_check_sources": None,
+        "degraded": [],
+    }
+
+def _request_deadline(request: ChatRequest) -> float:
+    """요청 도착 시점 기준 마감 시각. 승인 대기 시간도 예산에 포함됩니다."""
+    return deadline_after(request.deadline_ms / 1000 if request.deadline_ms is not None else None)
+
+def _turn_inputs(message: str, thread_id: str, deadline_at: float):
+    """그래프 실행용 초기 상태와 config(스레드 ID, 마감 시각)를 만듭니다."""
+    config = {"configurable": {"thread_id": thread_id, "deadline_at": deadline_at}}
+    # degraded=None: 이전 턴의 단계 축소 기록 초기화
+    initial_state = {"messages": [HumanMessage(content=message)], "degraded": None}
+    return initial_state, config
+
+def _collect_fields(result: Dict[str, Any], key: str, value: Any) -> None:
+    """
+    노드 하나의 출력(value)에서 응답 필드만 뽑아 result에 반영합니다.
+    (단계 로그 직렬화는 하지 않으므로 핫 패스에서 저렴합니다)
+    """
+    if not isinstance(value, dict):
+        return
+
+    if "diagnosis_hypothesis" in value:
+        result["diagnosis"] = value["diagnosis_hypothesis"]
     
-    initial_state = {"messages": [HumanMessage(content=request.message)]}
+    if "next_step" in value:
+        result["next_step"] = value["next_step"]
+        
+    if "doctor_pass" in value:
+        result["doctor_pass"] = value["doctor_pass"]
     
-    steps_log = []
-    final_response = None
-    final_diagnosis = None
-    final_next_step = None
-    final_doctor_pass = None
-    final_department = None
-    final_medication_info = None
-    final_fact_check_confidence = None
-    final_fact_check_sources = None
+    if "recommended_department" in value:
+        result["recommended_department"] = value["recommended_department"]
     
-    try:
-        # 스트리밍을 통해 중간 단계 포착
-        events = graph.stream(initial_state, config=config)
-        
-        for event in events:
-            if event is None: continue
-            for key, value in event.items():
-                if value is None:
-                    continue
-                    
-                # 단계별 로그 기록
-                step_val = str(value)
-                if isinstance(value, dict) and "messages" in value:
-                     msgs = value["messages"]
-                     if isinstance(msgs, list):
-                         step_val = []
-                         for m in msgs:
-                             if m is None: continue
-                             if hasattr(m, 'content'):
-                                 step_val.append(m.content)
-                             else:
-                                 step_val.append(str(m))
-                     else:
-                         step_val = str(msgs)
-
-                step_info = {
-                    "node": key,
-                    "content": step_val
-                }
-                
-                if isinstance(value, dict):
-                    if "diagnosis_hypothesis" in value:
-                        step_info["diagnosis"] = value["diagnosis_hypothesis"]
-                        final_diagnosis = value["diagnosis_hypothesis"]
-                    
-                    if "next_step" in value:
-                        step_info["next_step"] = value["next_step"]
-                        final_next_step = value["next_step"]
-                        
-                    if "doctor_pass" in value:
-                        final_doctor_pass = value["doctor_pass"]
-                    
-                    if "recommended_department" in value:
-                        final_department = value["recommended_department"]
-                    
-                    if "medication_info" in value:
-                        final_medication_info = value["medication_info"]
-                    
-                    if "fact_check_confidence" in value:
-                        final_fact_check_confidence = value["fact_check_confidence"]
-                    
-                    if "fact_check_sources" in value:
-                        final_fact_check_sources = value["fact_check_sources"]
-                        
-                    if "messages" in value:
-                        msgs = value["messages"]
-                        if isinstance(msgs, (list, tuple)) and len(msgs) > 0:
-                            last_msg = msgs[-1]
-                            if last_msg is not None:
-                                if hasattr(last_msg, 'content'):
-                                    final_response = last_msg.content
-                                elif isinstance(last_msg, dict) and 'content' in last_msg:
-                                    final_response = last_msg['content']
-                                elif isinstance(last_msg, str):
-                                    final_response = last_msg
-                        elif hasattr(msgs, 'content'):
-                            final_response = msgs.content
-
-                steps_log.append(step_info)
-        
-        if final_diagnosis:
-             # String checks for safety
-             if isinstance(final_diagnosis, str):
-                 final_diagnosis = final_diagnosis.replace("```markdown", "").replace("```", "").strip()
-             final_response = "증상 분석이 완료되었습니다. 아래 진단 리포트를 확인해주세요."
-        elif final_next_step == "emergency":
-             final_response = "응급 상황입니다! 즉시 병원을 방문하세요."
+    if "medication_info" in value:
+        result["medication_info"] = value["medication_info"]
+    
+    if "fact_check_confidence" in value:
+        result["fact_check_confidence"] = value["fact_check_confidence"]
+    
+    if "fact_check_sources" in value:
+        result["fact_check_sources"] = value["fact_check_sources"]
+
+    if value.get("degraded"):
+        result["degraded"].extend(value["degraded"])
         
-        if not final_response:
-            final_response = "죄송합니다. 적절한 답변을 생성하지 못했습니다."
-            
-    except Exception as e:
-        import traceback
-        err_type, err_obj, err_tb = sys.exc_info()
-        fname = os.path.split(err_tb.tb_frame.f_code.co_filename)[1]
-        line_no = err_tb.tb_lineno
-        print(f"!!! SERVER ERROR: {e} | Type: {err_type.__name__} | File: {fname} | Line: {line_no}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Server Error: {str(e)} at {fname}:{line_no}")
+    if "messages" in value:
+        msgs = value["messages"]
+        if isinstance(msgs, (list, tuple)) and len(msgs) > 0:
+            last_msg = msgs[-1]
+            if last_msg is not None:
+                if hasattr(last_msg, 'content'):
+                    result["response"] = last_msg.content
+                elif isinstance(last_msg, dict) and 'content' in last_msg:
+                    result["response"] = last_msg['content']
+                elif isinstance(last_msg, str):
+                    result["response"] = last_msg
+        elif hasattr(msgs, 'content'):
+            result["response"] = msgs.content
+
+def _step_entry(key: str, value: Any, duration_ms: float, mode: str) -> Dict[str, Any]:
+    """
+    기록된 노드 출력 하나를 단계 로그 항목으로 변환합니다.
+    - summary: 노드 이름, 소요 시간, 라우팅 관련 필드만 포함
+    - full: 위 내용 + 노드 출력 전체(content)와 진단 가설
+    """
+    step_info = {
+        "node": key,
+        "duration_ms": round(duration_ms, 1)
+    }
+    
+    if isinstance(value, dict):
+        for field in STEP_SUMMARY_FIELDS:
+            if field in value:
+                step_info[field] = value[field]
+    
+    if mode != "full":
+        return step_info
+
+    step_val = str(value)
+    if isinstance(value, dict) and "messages" in value:
+         msgs = value["messages"]
+         if isinstance(msgs, list):
+             step_val = []
+             for m in msgs:
+                 if m is None: continue
+                 if hasattr(m, 'content'):
+                     step_val.append(m.content)
+                 else:
+                     step_val.append(str(m))
+         else:
+             step_val = str(msgs)
+
+    step_info["content"] = step_val
+    if isinstance(value, dict) and "diagnosis_hypothesis" in value:
+        step_info["diagnosis"] = value["diagnosis_hypothesis"]
+    
+    return step_info
+
+def _build_steps(records: List[tuple], mode: str) -> List[Dict[str, Any]]:
+    """(노드, 출력, 소요 시간) 기록을 요청된 상세도의 단계 로그로 변환합니다."""
+    if mode == "none":
+        return []
+    return [_step_entry(key, value, duration_ms, mode) for key, value, duration_ms in records]
+
+def _build_response(result: Dict[str, Any], thread_id: str, steps_log: List[Dict[str, Any]]) -> ChatResponse:
+    """수집된 결과로 최종 ChatResponse를 구성합니다."""
+    final_response = result["response"]
+    final_diagnosis = result["diagnosis"]
     
+    if final_diagnosis:
+         # String checks for safety
+         if isinstance(final_diagnosis, str):
+             final_diagnosis = final_diagnosis.replace("```markdown", "").replace("```", "").strip()
+         final_response = "증상 분석이 완료되었습니다. 아래 진단 리포트를 확인해주세요."
+    elif result["next_step"] == "emergency":
+         final_response = "응급 상황입니다! 즉시 병원을 방문하세요."
+    
+    if not final_response:
+        final_response = "죄송합니다. 적절한 답변을 생성하지 못했습니다."
+
     return ChatResponse(
         response=str(final_response) if final_response is not None else "",
         thread_id=thread_id,
         steps=steps_log,
         diagnosis=final_diagnosis,
-        next_step=final_next_step,
-        doctor_pass=final_doctor_pass,
-        recommended_department=final_department,
-        medication_info=final_medication_info,
-        fact_check_confidence=final_fact_check_confidence,
-        fact_check_sources=final_fact_check_sources if final_fact_check_sources is not None else []
+        next_step=result["next_step"],
+        doctor_pass=result["doctor_pass"],
+        recommended_department=result["recommended_department"],
+        medication_info=result["medication_info"],
+        fact_check_confidence=result["fact_check_confidence"],
+        fact_check_sources=result["fact_check_sources"] if result["fact_check_sources"] is not None else [],
+        degraded=result["degraded"]
+    )
+
+def _priority_for(message: str) -> str:
+    """응급 어휘가 포함된 요청은 우선 대기열로 보냅니다."""
+    return PRIORITY_HIGH if is_urgent(message) else PRIORITY_NORMAL
+
+def _busy_error(e: AdmissionRejected) -> HTTPException:
+    """대기열 초과 시 Retry-After 헤더를 포함한 503 응답을 반환합니다."""
+    return HTTPException(
+        status_code=503,
+        detail="서버가 혼잡합니다. 잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": str(e.retry_after)},
     )
 
+def _server_error(e: Exception) -> HTTPException:
+    """예외 위치를 로그로 남기고 500 응답용 HTTPException을 반환합니다."""
+    import traceback
+    err_type, err_obj, err_tb = sys.exc_info()
+    fname = os.path.split(err_tb.tb_frame.f_code.co_filename)[1]
+    line_no = err_tb.tb_lineno
+    print(f"!!! SERVER ERROR: {e} | Type: {err_type.__name__} | File: {fname} | Line: {line_no}")
+    traceback.print_exc()
+    return HTTPException(status_code=500, detail=f"Server Error: {str(e)} at {fname}:{line_no}")
+
+async def _run_turn(request: ChatRequest, thread_id: str, deadline_at: float) -> ChatResponse:
+    """그래프를 한 턴 실행하고 ChatResponse를 반환합니다. 실행 중 예외는 그대로 전파됩니다."""
+    initial_state, config = _turn_inputs(request.message, thread_id, deadline_at)
+    steps_mode = request.steps or CHAT_STEPS_DEFAULT
+    
+    # 노드 출력은 참조만 보관하고, 단계 로그는 요청된 경우에만 마지막에 만듭니다.
+    records = []
+    result = _new_turn_result()
+    last_time = time.perf_counter()
+    
+    # 비동기 스트리밍을 통해 중간 단계 포착 (이벤트 루프를 블로킹하지 않음)
+    events = get_graph().astream(initial_state, config=config, **GRAPH_RUN_OPTIONS)
+    
+    async for event in events:
+        if event is None: continue
+        now = time.perf_counter()
+        duration_ms = (now - last_time) * 1000
+        last_time = now
+        for key, value in event.items():
+            if value is None:
+                continue
+            _collect_fields(result, key, value)
+            records.append((key, value, duration_ms))
+    
+    return _build_response(result, thread_id, _build_steps(records, steps_mode))
+
+async def _admitted_turn(request: ChatRequest, thread_id: str, deadline_at: float) -> ChatResponse:
+    """승인 제어를 통과한 뒤 그래프를 한 턴 실행합니다."""
+    async with admission_controller.admit(_priority_for(request.message)):
+        return await _run_turn(request, thread_id, deadline_at)
+
+async def _execute_turn(request: ChatRequest, idempotency_key: Optional[str] = None):
+    """
+    멱등 키가 있으면 (thread_id, 키) 단위로 한 번만 실행하고, 재시도에는 저장된 응답을 돌려줍니다.
+    thread_id가 없는 요청의 키는 다른 클라이언트의 키와 구분할 수 없으므로 멱등 처리하지 않습니다.
+    (/chat은 이런 요청을 400으로 거절하고, /chat/batch는 항목마다 새 thread_id를 부여한 뒤 호출)
+
+    Returns:
+        (ChatResponse, 재사용 여부) 튜플
+    """
+    deadline_at = _request_deadline(request)
+    key = idempotency_key or request.request_id
+    if not key or not request.thread_id:
+        thread_id = request.thread_id or str(uuid.uuid4())
+        return await _admitted_turn(request, thread_id, deadline_at), False
+
+    def factory():
+        return _admitted_turn(request, request.thread_id, deadline_at)
+
+    return await idempotency_store.run(f"{request.thread_id}:{key}", request.message, factory)
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest, response: Response, idempotency_key: Optional[str] = Header(None)):
+    """
+    사용자의 메시지를 받아 MediGraph 에이전트를 실행하고 결과를 반환합니다.
+    Idempotency-Key 헤더(또는 request_id)가 있으면 재시도된 요청을 다시 실행하지 않습니다.
+    멱등 키는 thread_id 범위에서만 유효하므로 thread_id 없이 보내면 400을 반환합니다.
+    """
+    if (idempotency_key or request.request_id) and not request.thread_id:
+        raise HTTPException(status_code=400, detail="멱등 키(Idempotency-Key/request_id)는 thread_id와 함께 보내야 합니다.")
+    try:
+        chat_response, replayed = await _execute_turn(request, idempotency_key)
+    except AdmissionRejected as e:
+        raise _busy_error(e)
+    except IdempotencyConflict:
+        raise HTTPException(status_code=409, detail="같은 멱등 키로 다른 메시지가 전송되었습니다.")
+    except Exception as e:
+        raise _server_error(e)
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return chat_response
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(request: BatchChatRequest):
+    """
+    서로 독립적인 여러 대화를 한 번의 요청으로 동시에 실행합니다.
+    - 동시 실행 수는 concurrency(최대 BATCH_MAX_CONCURRENCY)로 제한됩니다.
+    - 같은 thread_id를 가진 항목은 체크포인트 경합을 막기 위해 입력 순서대로 순차 실행됩니다.
+    - 항목별 오류는 error 필드에 담기며, 배치 전체를 실패시키지 않습니다.
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"배치 항목은 최대 {BATCH_MAX_ITEMS}개까지 허용됩니다.")
+    
+    concurrency = request.concurrency or BATCH_MAX_CONCURRENCY
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    thread_ids = [item.thread_id or str(uuid.uuid4()) for item in request.items]
+    results: List[Optional[BatchChatItemResult]] = [None] * len(request.items)
+    
+    # thread_id별로 묶어 같은 스레드의 턴은 순서대로 실행
+    groups: Dict[str, List[int]] = {}
+    for idx, thread_id in enumerate(thread_ids):
+        groups.setdefault(thread_id, []).append(idx)
+    
+    async def run_group(indices: List[int]):
+        for idx in indices:
+            thread_id = thread_ids[idx]
+            async with semaphore:
+                try:
+                    item = request.items[idx]
+                    if not item.thread_id:
+                        item = item.model_copy(update={"thread_id": thread_id})
+                    response, _ = await _execute_turn(item)
+                    results[idx] = BatchChatItemResult(thread_id=thread_id, response=response)
+                except AdmissionRejected as e:
+                    results[idx] = BatchChatItemResult(thread_id=thread_id, error=f"Server Busy: retry after {e.retry_after}s")
+                except IdempotencyConflict:
+                    results[idx] = BatchChatItemResult(thread_id=thread_id, error="Conflict: request_id reused with a different message")
+                except Exception as e:
+                    print(f"!!! BATCH ITEM ERROR [{idx}] thread={thread_id}: {e}")
+                    results[idx] = BatchChatItemResult(thread_id=thread_id, error=f"Server Error: {str(e)}")
+    
+    await asyncio.gather(*(run_group(indices) for indices in groups.values()))
+    
+    return BatchChatResponse(results=results)
+
+def _sse(event: str, data: Any) -> str:
+    """Server-Sent Events 형식의 메시지 한 건을 직렬화합니다."""
+    payload = json.dumps(jsonable_encoder(data), ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+class _ReleasingStreamingResponse(StreamingResponse):
+    """
+    응답이 어떻게 끝나든(정상 종료, 클라이언트 연결 끊김, 전송 오류) 마지막에 on_close를 호출하는 StreamingResponse
+    Starlette는 연결이 끊기면 background 작업을 건너뛰고 sync background는 스레드풀에서 실행하므로,
+    이벤트 루프 전용인 승인 제어기 슬롯은 여기서 반환합니다.
+    """
+    def __init__(self, content, on_close: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    /chat과 동일한 그래프를 실행하되, Server-Sent Events로 진행 상황을 즉시 전달합니다.
+    - event: node  -> 노드 하나가 끝날 때마다 단계 로그와 수집된 필드
+    - event: token -> 진단/응급 노드가 생성하는 LLM 토큰
+    - event: done  -> 최종 ChatResponse
+    - event: error -> 실행 중 오류
+    """
+    thread_id = request.thread_id or str(uuid.uuid4())
+    initial_state, config = _turn_inputs(request.message, thread_id, _request_deadline(request))
+    steps_mode = request.steps or CHAT_STEPS_DEFAULT
+
+    # 스트림 시작 전에 승인을 받아야 거절 시 503을 돌려줄 수 있습니다.
+    try:
+        await admission_controller.acquire(_priority_for(request.message))
+    except AdmissionRejected as e:
+        raise _busy_error(e)
+    started = time.perf_counter()
+    released = False
+
+    def release_slot():
+        # 본문 생성기의 finally와 응답 종료(on_close) 중 먼저 실행되는 쪽에서 한 번만 반환
+        # (본문을 시작하기 전에 클라이언트가 끊으면 생성기가 실행되지 않으므로 on_close가 반환)
+        # 둘 다 이벤트 루프에서 실행되므로 대기자의 future를 안전하게 깨울 수 있습니다.
+        nonlocal released
+        if released:
+            return
+        released = True
+        admission_controller.observe_service(time.perf_counter() - started)
+        admission_controller.release()
+
+    async def event_stream():
+        records = []
+        result = _new_turn_result()
+        last_time = started
+        try:
+            events = get_graph().astream(initial_state, config=config, stream_mode=["updates", "messages"], **GRAPH_RUN_OPTIONS)
+            async for mode, chunk in events:
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node") if metadata else None
+                    if node in STREAM_TOKEN_NODES and isinstance(message, AIMessageChunk) and message.content:
+                        yield _sse("token", {"node": node, "content": message.content})
+                    continue
+
+                if chunk is None: continue
+                now = time.perf_counter()
+                duration_ms = (now - last_time) * 1000
+                last_time = now
+                for key, value in chunk.items():
+                    if value is None:
+                        continue
+                    _collect_fields(result, key, value)
+                    records.append((key, value, duration_ms))
+                    # 진행 이벤트는 steps=none이어도 최소한 요약 정보를 전달합니다.
+                    step_info = _step_entry(key, value, duration_ms, "full" if steps_mode == "full" else "summary")
+                    yield _sse("node", {**step_info, **{k: v for k, v in result.items() if v is not None}})
+
+            yield _sse("done", _build_response(result, thread_id, _build_steps(records, steps_mode)))
+        except Exception as e:
+            print(f"!!! STREAM ERROR: {e}")
+            yield _sse("error", {"detail": f"Server Error: {str(e)}", "thread_id": thread_id})
+        finally:
+            release_slot()
+
+    try:
+        return _ReleasingStreamingResponse(
+            event_stream(),
+            on_close=release_slot,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except BaseException:
+        release_slot()
+        raise
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
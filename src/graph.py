@@ -1,6 +1,8 @@
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from src.utils.checkpointer import create_checkpointer
 from src.state import AgentState
+from src.nodes.red_flag_screen import red_flag_screen_node
 from src.nodes.symptom_analyzer import symptom_analyzer_node
 from src.nodes.specialist_router import specialist_router_node
 from src.nodes.medical_rag import medical_rag_node
@@ -10,24 +12,74 @@ from src.nodes.emergency import emergency_response_node
 from src.nodes.question_generator import question_generator_node
 from src.nodes.research_critic import research_critic_node
 from src.nodes.medication_search import medication_search_node
+from src.utils.metrics import instrument_node, instrument_route, research_rounds
 
-def create_graph():
+def should_check_medication(state) -> bool:
+    """약물 추출 필요 여부 판단 (최근 5개 메시지에 약물 관련 키워드가 있는지)"""
+    messages = state.get("messages", [])
+    if messages is None:
+        messages = []
+    medication_keywords = ["약", "먹", "복용", "타이레놀", "아스피린", "알약", "medicine", "medication"]
+
+    for msg in messages[-5:]:
+        if hasattr(msg, 'content') and msg.content:
+            content = msg.content
+            if isinstance(content, str):
+                content = content.lower()
+                if any(keyword in content for keyword in medication_keywords):
+                    return True
+
+    return False
+
+async def research_join_node(state: AgentState, config: RunnableConfig):
+    """연구 단계(검색/크리틱 루프, 약물 추출)의 합류 지점. 상태를 바꾸지 않고 진단 생성으로 넘깁니다."""
+    return {}
+
+def create_graph(checkpointer=None):
+    """
+    MediGraph 워크플로우를 컴파일하여 반환합니다.
+    모든 노드는 async 함수이므로 astream/ainvoke로 실행해야 합니다.
+
+    Args:
+        checkpointer: 사용할 체크포인터. 생략하면 환경 변수(CHECKPOINTER)에 따라 생성합니다.
+    """
     # 그래프(워크플로우) 초기화
     workflow = StateGraph(AgentState)
     
-    # 노드 추가
-    workflow.add_node("symptom_analyzer", symptom_analyzer_node)
-    workflow.add_node("question_generator", question_generator_node)
-    workflow.add_node("specialist_router", specialist_router_node)
-    workflow.add_node("medical_rag", medical_rag_node)
-    workflow.add_node("research_critic", research_critic_node)
-    workflow.add_node("diagnosis_generator", diagnosis_generator_node)
-    workflow.add_node("medication_search", medication_search_node)
-    workflow.add_node("fact_checker", fact_checker_node)
-    workflow.add_node("emergency_response", emergency_response_node)
+    # 노드 추가 (실행 시간/오류 메트릭 수집을 위해 계측 래퍼로 감쌈)
+    def add_node(name, node, **kwargs):
+        workflow.add_node(name, instrument_node(name, node), **kwargs)
+
+    add_node("red_flag_screen", red_flag_screen_node)
+    add_node("symptom_analyzer", symptom_analyzer_node)
+    add_node("question_generator", question_generator_node)
+    add_node("specialist_router", specialist_router_node)
+    add_node("medical_rag", medical_rag_node)
+    add_node("research_critic", research_critic_node)
+    add_node("diagnosis_generator", diagnosis_generator_node)
+    add_node("medication_search", medication_search_node)
+    add_node("fact_checker", fact_checker_node)
+    # 검색/크리틱 루프와 약물 추출 분기가 모두 끝난 뒤 한 번만 실행 (defer: 대기 중인 다른 작업이 없을 때 실행)
+    add_node("research_join", research_join_node, defer=True)
+    add_node("emergency_response", emergency_response_node)
     
-    # 진입점 설정
-    workflow.set_entry_point("symptom_analyzer")
+    # 진입점 설정: 규칙 기반 응급 징후 검사 (LLM 호출 없음)
+    workflow.set_entry_point("red_flag_screen")
+
+    # [조건부 엣지 0] Red Flag Screen -> (응급 or 증상 분석)
+    def red_flag_condition(state):
+        if state.get("red_flags"):
+            return "emergency"
+        return "analyze"
+
+    workflow.add_conditional_edges(
+        "red_flag_screen",
+        instrument_route("red_flag_screen", red_flag_condition),
+        {
+            "emergency": "emergency_response",
+            "analyze": "symptom_analyzer"
+        }
+    )
     
     # [조건부 엣지 1] Symptom Analyzer -> (질문 생성 or 전문의 라우터)
     def analyzer_condition(state):
@@ -38,7 +90,7 @@ def create_graph():
 
     workflow.add_conditional_edges(
         "symptom_analyzer",
-        analyzer_condition,
+        instrument_route("symptom_analyzer", analyzer_condition),
         {
             "ask_user": "question_generator",
             "route": "specialist_router"
@@ -49,19 +101,24 @@ def create_graph():
     # 실제로는 Human-in-the-loop 패턴이지만 여기서는 응답 반환 후 종료로 처리
     workflow.add_edge("question_generator", END)
     
-    # [조건부 엣지 2] Specialist Router -> (응급 or 검색)
+    # [조건부 엣지 2] Specialist Router -> (응급 or 검색 [+ 약물 추출 병렬 실행])
+    # 약물이 언급된 경우 medication_search를 검색/크리틱 루프와 동시에 실행하여
+    # 진단 리포트가 이번 턴의 약물 정보를 사용할 수 있게 합니다.
     def router_condition(state):
         next_step = state.get("next_step")
         if next_step == "emergency":
             return "emergency"
+        if should_check_medication(state):
+            return ["research", "medication"]
         return "research"
             
     workflow.add_conditional_edges(
         "specialist_router",
-        router_condition,
+        instrument_route("specialist_router", router_condition),
         {
             "emergency": "emergency_response",
-            "research": "medical_rag"
+            "research": "medical_rag",
+            "medication": "medication_search"
         }
     )
     
@@ -77,50 +134,32 @@ def create_graph():
             return "loop"
         return "diagnosis"
 
+    # 진단으로 넘어갈 때 재검색 루프 횟수를 기록
+    def record_research_rounds(state, route):
+        if route == "diagnosis":
+            research_rounds.observe(state.get("search_count") or 0)
+
     workflow.add_conditional_edges(
         "research_critic",
-        critic_condition,
+        instrument_route("research_critic", critic_condition, record_research_rounds),
         {
             "loop": "medical_rag", # 재검색 루프
-            "diagnosis": "diagnosis_generator"
+            "diagnosis": "research_join"
         }
     )
-    
-    # [조건부 엣지 4] Diagnosis Generator -> Medication Search (조건부)
-    # 약물이 언급된 경우에만 medication_search 실행, 아니면 바로 fact_checker로
-    def should_check_medication(state):
-        """약물 검색 필요 여부 판단"""
-        messages = state.get("messages", [])
-        if messages is None:
-            messages = []       # 최근 5개 메시지에서 약물 관련 키워드 확인
-        medication_keywords = ["약", "먹", "복용", "타이레놀", "아스피린", "알약", "medicine", "medication"]
-        
-        for msg in messages[-5:]:
-            if hasattr(msg, 'content') and msg.content:
-                content = msg.content
-                if isinstance(content, str):
-                    content = content.lower()
-                    if any(keyword in content for keyword in medication_keywords):
-                        return "medication_search"
-        
-        return "fact_checker"
-    
-    workflow.add_conditional_edges(
-        "diagnosis_generator",
-        should_check_medication,
-        {
-            "medication_search": "medication_search",
-            "fact_checker": "fact_checker"
-        }
-    )
-    
-    workflow.add_edge("medication_search", "fact_checker")
+
+    # [엣지] 약물 추출 -> 합류 지점. 두 분기는 서로 다른 상태 키를 쓰므로 병합 결과가 실행 순서와 무관합니다.
+    # (medical_evidence/search_count vs medications/medication_info, degraded는 reducer로 합침)
+    workflow.add_edge("medication_search", "research_join")
+    workflow.add_edge("research_join", "diagnosis_generator")
+    workflow.add_edge("diagnosis_generator", "fact_checker")
     
     # [조건부 엣지 5] Fact Checker -> 종료
     # (여기서도 검증 실패 시 재검색 루프를 넣을 수 있으나 복잡도 조절을 위해 생략)
     workflow.add_edge("fact_checker", END)
     
-    # 체크포인터 설정 (In-Memory)
-    memory = MemorySaver()
+    # 체크포인터 설정 (기본 In-Memory, CHECKPOINTER=sqlite 시 영속 저장)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
     
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=checkpointer)
@@ -1,8 +1,9 @@
 from src.graph import create_graph
 from langchain_core.messages import HumanMessage
+import asyncio
 import uuid
 
-def main():
+async def main():
     # 그래프 생성 및 컴파일
     graph = create_graph()
     
@@ -16,7 +17,7 @@ def main():
     config = {"configurable": {"thread_id": thread_id}}
     
     while True:
-        user_input = input("\n사용자: ")
+        user_input = await asyncio.to_thread(input, "\n사용자: ")
         if user_input.lower() in ["quit", "exit"]:
             break
             
@@ -26,9 +27,9 @@ def main():
         print("\n🤖 분석 중...")
         
         # 그래프 스트리밍 실행 (단계별 진행 상황 확인)
-        events = graph.stream(initial_state, config=config)
+        events = graph.astream(initial_state, config=config)
         
-        for event in events:
+        async for event in events:
             # 중간 단계 이벤트 출력
             for key, value in event.items():
                 print(f"  -> 노드 실행 완료: {key}")
@@ -39,4 +40,4 @@ def main():
                     print(f"     다음 단계 판단: {value['next_step']}")
         
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
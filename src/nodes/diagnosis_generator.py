@@ -1,45 +1,18 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import get_llm
+from src.utils.llm import get_node_llm
 from src.nodes.node_utils import clean_persona_fluff
+from src.utils.resilience import resilient_call
+from src.utils.history import format_transcript
+from src.utils.evidence import pack_evidence
+import asyncio
+import functools
 
-def diagnosis_generator_node(state: AgentState):
-    """
-    증상과 검색된 의학적 근거(Evidence)를 종합하여 진단 가설과 조언을 생성하는 노드입니다.
-    """
-    llm = get_llm()
-    symptoms = state.get("symptoms", [])
-    if symptoms is None: symptoms = []
-    
-    evidence = state.get("medical_evidence", [])
-    if evidence is None: evidence = []
-    
-    critique = state.get("critique", "")
-    if critique is None: critique = ""
-    
-    messages = state.get("messages", [])
-    if messages is None: messages = []
-    
-    medication_info = state.get("medication_info", "")
-    if medication_info is None: medication_info = ""
-    
-    # 최근 대화 내역 추출
-    recent_conversation = []
-    for msg in messages[-10:]:
-        if msg and hasattr(msg, 'type'):
-            msg_content = getattr(msg, 'content', '')
-            if msg_content is None: msg_content = ""
-            if msg.type == 'human':
-                recent_conversation.append(f"환자: {msg_content}")
-            elif msg.type == 'ai':
-                recent_conversation.append(f"AI: {msg_content}")
-    
-    conversation_text = "\n".join(recent_conversation) if recent_conversation else "대화 기록 없음"
-    
-    # 진단 생성 프롬프트
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 냉철하고 정확한 전문의입니다.
+# 진단 생성 프롬프트
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 냉철하고 정확한 전문의입니다.
         환자의 증상과 의학적 근거를 바탕으로 데이터 중심의 최종 진단을 내리세요.
         
         **작성 지침:**
@@ -49,12 +22,14 @@ def diagnosis_generator_node(state: AgentState):
         4. **객관적 설명 (Explanation)**: 질환의 원인과 증상의 인과관계에 대해서만 사실 중심으로 기술하세요.
         5. **닥터 패스 (Doctor Pass) - 필수 규칙**: 
            - **오직 환자가 진술한 사실**(증상, 발병 시점, 통증 양상, 복용 약물 등)만 불렛 포인트로 요약하세요.
+           - 복용 약물 정보가 있으면 닥터 패스에 포함하고, 설명과 권장사항에서도 해당 약물을 고려하세요.
            - **AI의 의견이나 진단 추측을 절대 포함하지 마세요.**
            - 실제 의사에게 전달할 '환자 히스토리 요약'임을 명심하세요.
         
         입력 정보:
         - 환자 증상: {symptoms}
         - 의학적 근거: {evidence}
+        - 복용 약물: {medication_info}
         - 전체 대화 내역:
 {conversation}
         
@@ -69,18 +44,44 @@ def diagnosis_generator_node(state: AgentState):
             "recommended_department": "정형외과"
         }}
         """),
-        ("human", "객관적 사실 중심의 닥터패스를 포함한 한국어 진단 리포트를 생성해주세요.")
-    ])
+    ("human", "객관적 사실 중심의 닥터패스를 포함한 한국어 진단 리포트를 생성해주세요.")
+])
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("diagnosis_generator") | JsonOutputParser()
+
+
+async def diagnosis_generator_node(state: AgentState, config: RunnableConfig):
+    """
+    증상과 검색된 의학적 근거(Evidence)를 종합하여 진단 가설과 조언을 생성하는 노드입니다.
+    medication_search가 검색과 병렬로 추출한 복용 약물(medication_info)도 함께 반영합니다.
+    """
+    symptoms = state.get("symptoms", [])
+    if symptoms is None: symptoms = []
     
-    chain = prompt | llm | JsonOutputParser()
+    evidence = state.get("medical_evidence", [])
+    if evidence is None: evidence = []
+    
+    messages = state.get("messages", [])
+    if messages is None: messages = []
+    
+    medication_info = state.get("medication_info", "")
+    if medication_info is None: medication_info = ""
+    
+    # 대화 내역 (symptom_analyzer가 만든 transcript 재사용)
+    conversation_text = state.get("transcript") or format_transcript(messages) or "대화 기록 없음"
+    
+    chain = _chain()
     
     try:
-        result = chain.invoke({
+        inputs = {
             "symptoms": ", ".join(symptoms),
-            "evidence": "\n".join(evidence),
-            "critique": critique,
+            "evidence": pack_evidence(evidence, symptoms, "diagnosis_generator"),
+            "medication_info": medication_info or "없음",
             "conversation": conversation_text
-        })
+        }
+        result = await resilient_call(lambda: chain.ainvoke(inputs, config=config), config)
         
         # 후처리: 공감 멘트 강제 제거
         result['explanation'] = clean_persona_fluff(result.get('explanation', ''))
@@ -111,6 +112,13 @@ def diagnosis_generator_node(state: AgentState):
             "next_step": "end"
         }
             
+    except asyncio.TimeoutError:
+        print("Diagnosis Generation: 마감 시간 초과")
+        return {
+            "diagnosis_hypothesis": "진단 생성이 제한 시간 내에 완료되지 않았습니다. 다시 시도해주세요.",
+            "next_step": "end",
+            "degraded": ["diagnosis_generator:timeout"]
+        }
     except Exception as e:
         print(f"Diagnosis Generation Error: {e}")
         return {
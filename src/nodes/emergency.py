@@ -1,22 +1,18 @@
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import get_llm
+from src.utils.llm import get_node_llm
 from src.nodes.node_utils import clean_persona_fluff
+from src.utils.resilience import resilient_call
+from src.utils.red_flags import guidance
+import asyncio
+import functools
 
-def emergency_response_node(state: AgentState):
+# 응급 상황 이유 추론 및 대처법 프롬프트
+_PROMPT = ChatPromptTemplate.from_template(
     """
-    응급 상황(Emergency)으로 판단되었을 때 즉각적인 안전 지침을 제공하는 노드입니다.
-    """
-    llm = get_llm()
-    symptoms = state.get("symptoms", [])
-    if symptoms is None:
-        symptoms = []
-    
-    # 응급 상황 이유 추론 및 대처법 프롬프트
-    prompt = ChatPromptTemplate.from_template(
-        """
         당신은 냉철한 응급의학과 전문의입니다. 현재 환자의 증상은 '절대적 응급' 상황입니다.
         불필요한 위로나 공감 멘트 없이, 오직 생명과 직결된 정보만 신속하고 정확하게 전달하세요.
         
@@ -38,22 +34,44 @@ def emergency_response_node(state: AgentState):
         - [한국어 필수 조치 1]
         - [한국어 필수 조치 2]
         """
-    )
+)
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("emergency_response") | StrOutputParser()
+
+
+async def emergency_response_node(state: AgentState, config: RunnableConfig):
+    """
+    응급 상황(Emergency)으로 판단되었을 때 즉각적인 안전 지침을 제공하는 노드입니다.
+    red_flag_screen이 응급 징후를 탐지한 경우에는 LLM 없이 범주별 정적 안내를 즉시 반환합니다.
+    """
+    symptoms = state.get("symptoms", [])
+    if symptoms is None:
+        symptoms = []
     
-    try:
-        chain = prompt | llm | StrOutputParser()
-        emergency_reason = chain.invoke({"symptoms": ", ".join(symptoms)})
-        
-        # 후처리: 공감 멘트 강제 제거
-        emergency_reason = clean_persona_fluff(emergency_reason)
-        
-    except Exception as e:
-        print(f"Emergency Reasoning Error: {e}")
-        emergency_reason = "심각한 증상이 의심됩니다. 즉각적인 의료 조치가 필요합니다.\n\n**응급 조치**: 환자를 편안한 자세로 눕히고 즉시 119에 신고하세요."
+    degraded = []
+    red_flags = state.get("red_flags")
+    if red_flags:
+        emergency_reason = guidance(red_flags)
+    else:
+        try:
+            chain = _chain()
+            emergency_reason = await resilient_call(lambda: chain.ainvoke({"symptoms": ", ".join(symptoms)}, config=config), config)
+
+            # 후처리: 공감 멘트 강제 제거
+            emergency_reason = clean_persona_fluff(emergency_reason)
+
+        except Exception as e:
+            print(f"Emergency Reasoning Error: {e}")
+            if isinstance(e, asyncio.TimeoutError):
+                degraded.append("emergency_response:timeout")
+            emergency_reason = "심각한 증상이 의심됩니다. 즉각적인 의료 조치가 필요합니다.\n\n**응급 조치**: 환자를 편안한 자세로 눕히고 즉시 119에 신고하세요."
 
     return {
         "diagnosis_hypothesis": f"🚨 **즉시 119에 신고하세요** 🚨\n\nCRITICAL EMERGENCY (심각한 응급 상황)\n\n{emergency_reason}",
         "next_step": "emergency",
         "critique": "valid", 
-        "messages": [AIMessage(content="WARNING: 심각한 증상이 감지되었습니다. 즉시 응급 구조대에 연락하거나 병원 응급실을 방문하세요.")]
+        "messages": [AIMessage(content="WARNING: 심각한 증상이 감지되었습니다. 즉시 응급 구조대에 연락하거나 병원 응급실을 방문하세요.")],
+        "degraded": degraded
     }
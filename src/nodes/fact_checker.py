@@ -1,28 +1,16 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import get_llm
+from src.utils.llm import get_node_llm
+from src.utils.deadline import has_budget, FACT_CHECK_MIN_BUDGET_SECONDS
+from src.utils.resilience import resilient_call
+from src.utils.evidence import pack_evidence
+import asyncio
+import functools
 
-def fact_checker_node(state: AgentState):
+_PROMPT = ChatPromptTemplate.from_template(
     """
-    생성된 진단 가설이 검색된 근거와 일치하는지 검증하는(Fact Checking) 노드입니다.
-    신뢰도 점수와 출처 인용을 추가하여 신뢰성을 높입니다.
-    """
-    llm = get_llm()
-    hypothesis = state.get("diagnosis_hypothesis", "")
-    evidence = state.get("medical_evidence", [])
-    if evidence is None:
-        evidence = []
-    
-    if not hypothesis or not evidence:
-        return {
-            "critique": "insufficient_data",
-            "fact_check_confidence": 0,
-            "fact_check_sources": []
-        }
-        
-    prompt = ChatPromptTemplate.from_template(
-        """
         당신은 전문 의료 팩트 체커(Fact Checker)입니다. 다음 진단 가설이 제공된 의학적 증거(RAG)와 일치하는지 철저히 검증하세요.
         
         진단 가설 (Hypothesis):
@@ -46,15 +34,43 @@ def fact_checker_node(state: AgentState):
             "sources": ["출처 1", "출처 2"]
         }}
         """
-    )
+)
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("fact_checker") | JsonOutputParser()
+
+
+async def fact_checker_node(state: AgentState, config: RunnableConfig):
+    """
+    생성된 진단 가설이 검색된 근거와 일치하는지 검증하는(Fact Checking) 노드입니다.
+    신뢰도 점수와 출처 인용을 추가하여 신뢰성을 높입니다.
+    """
+    hypothesis = state.get("diagnosis_hypothesis", "")
+    evidence = state.get("medical_evidence", [])
+    if evidence is None:
+        evidence = []
     
-    chain = prompt | llm | JsonOutputParser()
+    if not hypothesis or not evidence:
+        return {
+            "critique": "insufficient_data",
+            "fact_check_confidence": 0,
+            "fact_check_sources": []
+        }
+
+    # 남은 시간이 부족하면 팩트 체크를 생략 (신뢰도 점수는 비워 둠)
+    if not has_budget(config, FACT_CHECK_MIN_BUDGET_SECONDS):
+        print("Fact Checker: 남은 시간이 부족하여 검증을 생략합니다.")
+        return {"critique": "skipped", "degraded": ["fact_checker:skipped"]}
+        
+    chain = _chain()
     
     try:
-        result = chain.invoke({
+        inputs = {
             "hypothesis": hypothesis,
-            "evidence": "\n\n".join(evidence)
-        })
+            "evidence": pack_evidence(evidence, state.get("symptoms") or [], "fact_checker")
+        }
+        result = await resilient_call(lambda: chain.ainvoke(inputs, config=config), config)
         
         if result is None:
             print("!!! Fact Checker: LLM returned None")
@@ -94,6 +110,9 @@ def fact_checker_node(state: AgentState):
             "fact_check_confidence": confidence_score,
             "fact_check_sources": sources
         }
+    except asyncio.TimeoutError:
+        print("Fact Check: 마감 시간 초과, 검증을 생략합니다.")
+        return {"critique": "skipped", "degraded": ["fact_checker:timeout"]}
     except Exception as e:
         print(f"Fact Check Error: {e}")
         return {
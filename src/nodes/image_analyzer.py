@@ -1,12 +1,22 @@
 from typing import Any, Dict, List, Optional
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import llm
 import base64
-from langchain_google_genai import ChatGoogleGenerativeAI
+import functools
 import os
 
-def image_analyzer_node(state: AgentState) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=1)
+def _vision_llm():
+    """Gemini Vision 모델 (langchain_google_genai는 무거우므로 첫 사용 시에만 import)"""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        temperature=0.3,
+        google_api_key=os.getenv("GOOGLE_API_KEY")
+    )
+
+async def image_analyzer_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """
     업로드된 이미지를 Gemini Vision API로 분석하는 노드입니다.
     피부 발진, 부종, 상처 등 시각적 증상을 설명으로 변환합니다.
@@ -18,12 +28,7 @@ def image_analyzer_node(state: AgentState) -> Dict[str, Any]:
         # 이미지가 없으면 건너뜀
         return {}
     
-    # Gemini Vision 모델 초기화
-    vision_llm = ChatGoogleGenerativeAI(
-        model="gemini-1.5-flash",
-        temperature=0.3,
-        google_api_key=os.getenv("GOOGLE_API_KEY")
-    )
+    vision_llm = _vision_llm()
     
     # 프롬프트: 이미지 분석 요청
     prompt_text = """당신은 전문 의료 이미지 분석가입니다. 
@@ -52,7 +57,7 @@ def image_analyzer_node(state: AgentState) -> Dict[str, Any]:
                 }
             ]
             
-            response = vision_llm.invoke([HumanMessage(content=message_content)])
+            response = await vision_llm.ainvoke([HumanMessage(content=message_content)], config=config)
             description = response.content
             image_descriptions.append(f"이미지 {idx + 1}: {description}")
             
@@ -1,13 +1,266 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
 from src.utils.cache import medical_search_cache
+from src.utils.deadline import SEARCH_CALL_TIMEOUT_SECONDS, SEARCH_ATTEMPT_TIMEOUT_SECONDS
+from src.utils.resilience import resilient_call
+from src.utils.metrics import tavily_calls, speculative_searches, speculation_saved_seconds, rag_queries
+from src.utils.evidence import dedupe
+from src.utils import local_index
+from typing import Any, Dict, List, Optional
+import asyncio
+import functools
 import hashlib
+import os
 
-def medical_rag_node(state: AgentState):
+# specialist_router의 분류와 동시에 검색을 시작할지 여부 (SPECULATIVE_SEARCH=0이면 분류 후 순차 검색)
+SPECULATIVE_SEARCH = os.getenv("SPECULATIVE_SEARCH", "1") == "1"
+
+# 로컬 근거 인덱스를 먼저 조회하고 점수/증상 커버리지가 낮을 때만 Tavily 검색 (인덱스가 빌드되지 않았으면 항상 Tavily)
+LOCAL_INDEX = os.getenv("LOCAL_INDEX", "1") == "1"
+
+# 다중 쿼리 검색: 전체 증상 쿼리 + 증상 묶음(신체 계통)별 쿼리를 한 번에 병렬 검색
+# 기본값은 꺼짐: 라운드당 Tavily 호출이 최대 RAG_MAX_QUERIES배로 늘어 검색 쿼터/송신 제한을 더 쓰고,
+# 이득은 여러 신체 계통에 걸친 증상에서만 나므로 단일 쿼리 + research_critic 재검색을 기본으로 둡니다.
+RAG_FANOUT = os.getenv("RAG_FANOUT", "0") == "1"
+RAG_MAX_QUERIES = int(os.getenv("RAG_MAX_QUERIES", "4"))
+RAG_CONCURRENCY = int(os.getenv("RAG_CONCURRENCY", "3"))
+
+# 증상 묶음 분류용 신체 계통 키워드 (앞에서부터 먼저 일치하는 계통 사용)
+BODY_SYSTEM_KEYWORDS = [
+    ("urinary", ["소변", "배뇨", "방광", "urin"]),
+    ("cardiovascular", ["가슴", "흉통", "두근", "심장", "chest", "palpitation"]),
+    ("respiratory", ["기침", "가래", "콧물", "코막힘", "목구멍", "인후", "숨", "cough", "throat", "breath"]),
+    ("neurological", ["머리", "두통", "어지럼", "현기증", "저림", "headache", "dizz", "numb"]),
+    ("gastrointestinal", ["배", "복통", "명치", "속쓰림", "쓰림", "구토", "메스꺼", "설사", "변비", "소화", "nausea", "vomit", "abdominal", "stomach", "diarrhea"]),
+    ("dermatological", ["피부", "발진", "가려", "두드러기", "rash", "itch"]),
+    ("musculoskeletal", ["허리", "관절", "무릎", "어깨", "근육", "back", "joint", "muscle"]),
+    ("systemic", ["열", "오한", "피로", "몸살", "fever", "chill", "fatigue"]),
+]
+
+# 검색 결과에서 제외할 도메인 (블로그/커뮤니티/SNS)
+EXCLUDE_DOMAINS = [
+    "naver.com", "blog.naver.com", "tistory.com", "velog.io", 
+    "brunch.co.kr", "medium.com", "reddit.com", "dcinside.com", 
+    "namu.wiki", "youtube.com", "facebook.com", "instagram.com", "twitter.com"
+]
+
+@functools.lru_cache(maxsize=1)
+def get_search_tool():
+    """
+    Tavily 검색 도구 (langchain_community는 무거우므로 첫 사용 시에만 import)
+    TAVILY_BASE_URL이 설정되면 해당 엔드포인트(예: 재생 서버)를 직접 호출하고,
+    REPLAY_RECORD가 설정되면 검색 결과를 카세트에 녹화하고, RATE_LIMIT_ENABLED면 tavily 송신 제한기를 통과시킵니다.
+    """
+    from src.utils.rate_limit import RATE_LIMIT_ENABLED, RateLimitedSearch
+    from src.utils.replay import RecordingSearch, TavilyHTTPSearch, recording_cassette
+    base_url = os.getenv("TAVILY_BASE_URL")
+    if base_url:
+        tool = TavilyHTTPSearch(base_url, os.getenv("TAVILY_API_KEY", ""), max_results=5, exclude_domains=EXCLUDE_DOMAINS)
+    else:
+        from langchain_community.tools.tavily_search import TavilySearchResults
+        tool = TavilySearchResults(
+            max_results=5,
+            exclude_domains=EXCLUDE_DOMAINS,
+        )
+    cassette = recording_cassette()
+    if cassette is not None:
+        tool = RecordingSearch(tool, cassette)
+    return RateLimitedSearch(tool) if RATE_LIMIT_ENABLED else tool
+
+def build_query(symptoms: List[str]) -> str:
+    """증상 목록으로 검색 쿼리를 만듭니다."""
+    return f"medical diagnosis and treatment for symptoms: {', '.join(symptoms)} (official medical guidelines or research paper)"
+
+def build_refined_query(refined_query: str, symptoms: List[str]) -> str:
+    """research_critic이 제안한 재검색어에 증상 맥락을 붙인 쿼리"""
+    return f"{refined_query} (symptoms: {', '.join(symptoms)}; official medical guidelines or research paper)"
+
+def _cache_key(query: str) -> str:
+    # 캐시 키 생성 (쿼리의 해시값)
+    return hashlib.md5(query.encode()).hexdigest()
+
+def _body_system(symptom: str) -> Optional[str]:
+    lowered = symptom.lower()
+    for system, keywords in BODY_SYSTEM_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return system
+    return None
+
+def symptom_clusters(symptoms: List[str], max_clusters: int) -> List[List[str]]:
+    """
+    증상을 신체 계통별로 묶습니다. (분류되지 않는 증상은 각각 하나의 묶음)
+    묶음이 max_clusters보다 많으면 뒤쪽 묶음들을 마지막 묶음으로 합칩니다.
+    """
+    groups: Dict[str, List[str]] = {}
+    for symptom in symptoms:
+        groups.setdefault(_body_system(symptom) or f"other:{symptom}", []).append(symptom)
+    clusters = list(groups.values())
+    if max_clusters > 0 and len(clusters) > max_clusters:
+        clusters = clusters[:max_clusters - 1] + [[s for cluster in clusters[max_clusters - 1:] for s in cluster]]
+    return clusters
+
+def build_queries(symptoms: List[str]) -> List[str]:
+    """
+    검색 쿼리 목록. 첫 번째는 항상 전체 증상 쿼리(추측 검색/이전 캐시와 같은 키)이고,
+    RAG_FANOUT이면 증상 묶음별 쿼리를 최대 RAG_MAX_QUERIES개까지 추가합니다.
+    """
+    queries = [build_query(symptoms)]
+    if RAG_FANOUT and RAG_MAX_QUERIES > 1:
+        clusters = symptom_clusters(symptoms, RAG_MAX_QUERIES - 1)
+        if len(clusters) > 1:
+            queries.extend(build_query(cluster) for cluster in clusters)
+    return queries
+
+def merge_results(result_lists: List[List[Dict[str, Any]]]) -> List[str]:
+    """쿼리별 검색 결과를 순서대로 합치며 같은 URL과 거의 같은 본문을 제거합니다."""
+    seen_urls = set()
+    contents = []
+    for results in result_lists:
+        for result in results:
+            url = result.get("url")
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+            if result.get("content"):
+                contents.append(result["content"])
+    return dedupe(contents)
+
+async def _search(query: str, cache_key: str, config: RunnableConfig) -> List[Dict[str, Any]]:
+    """Tavily 검색 후 결과를 캐시에 저장합니다. (라우터가 시작한 추측 검색에서도 사용하므로 통계 노드를 고정)"""
+    search = get_search_tool()
+    try:
+        results = await resilient_call(lambda: search.ainvoke(query, config=config), config, cap=SEARCH_CALL_TIMEOUT_SECONDS,
+                                       attempt_timeout=SEARCH_ATTEMPT_TIMEOUT_SECONDS, node="medical_rag")
+    except asyncio.TimeoutError:
+        tavily_calls.inc("timeout")
+        raise
+    except Exception:
+        tavily_calls.inc("error")
+        raise
+
+    # results가 None인 경우 빈 리스트로 처리
+    if results is None:
+        results = []
+
+    tavily_calls.inc("ok")
+    # URL 기준 중복 제거를 위해 url/content를 함께 캐시
+    results = [{"url": res.get("url"), "content": res.get("content", "")} for res in results if isinstance(res, dict)]
+
+    # 결과를 캐시에 저장
+    medical_search_cache.set(cache_key, results)
+    return results
+
+class _Speculation:
+    """라우터와 동시에 시작한 검색 작업"""
+    __slots__ = ("task", "started_at", "finished_at")
+
+    def __init__(self, task: asyncio.Task, started_at: float):
+        self.task = task
+        self.started_at = started_at
+        self.finished_at: Optional[float] = None
+
+# 추측 검색 (캐시 키 -> 작업). 검색이 끝난 뒤에도 medical_rag가 사용하거나 라우터가 버릴 때까지 남겨
+# 사용/버림 통계를 정확히 집계합니다. (어느 쪽도 처리하지 않은 기록은 SPECULATION_TTL_SECONDS 뒤 만료)
+_speculations: Dict[str, _Speculation] = {}
+SPECULATION_TTL_SECONDS = 120
+
+def _expire_speculations(now: float) -> None:
+    for key, speculation in list(_speculations.items()):
+        if speculation.finished_at is not None and now - speculation.finished_at > SPECULATION_TTL_SECONDS:
+            del _speculations[key]
+            speculative_searches.inc("expired")
+
+def start_speculative_search(symptoms: List[str], config: RunnableConfig) -> Optional[str]:
+    """
+    specialist_router의 분류 LLM 호출과 동시에 검색을 시작합니다.
+    이미 캐시에 있거나 같은 검색이 진행 중이면 새로 시작하지 않습니다.
+
+    Returns:
+        추측 검색의 캐시 키 (시작하지 않았으면 None)
+    """
+    if not SPECULATIVE_SEARCH or not symptoms:
+        return None
+    if LOCAL_INDEX and local_index.lookup(symptoms) is not None:
+        # 로컬 인덱스로 답할 수 있으면 Tavily 호출 자체가 필요 없음
+        return None
+    query = build_query(symptoms)
+    cache_key = _cache_key(query)
+    if cache_key in _speculations or medical_search_cache.contains(cache_key):
+        return None
+
+    loop = asyncio.get_running_loop()
+    _expire_speculations(loop.time())
+    speculation = _Speculation(loop.create_task(_search(query, cache_key, config)), loop.time())
+    _speculations[cache_key] = speculation
+
+    def finished(task: asyncio.Task) -> None:
+        speculation.finished_at = loop.time()
+        failed = task.cancelled() or task.exception() is not None
+        # 실패한 검색은 이어받을 결과가 없으므로 기록을 지워 medical_rag가 새로 검색하게 함
+        # (task.exception() 조회로 "never retrieved" 경고도 남지 않음)
+        if failed and _speculations.get(cache_key) is speculation:
+            del _speculations[cache_key]
+
+    speculation.task.add_done_callback(finished)
+    return cache_key
+
+def discard_speculative_search(cache_key: Optional[str]) -> None:
+    """
+    라우터가 응급으로 분류했거나 분류에 실패한 경우 추측 검색 결과를 사용하지 않습니다.
+    검색은 취소하지 않고 끝까지 진행되어 캐시만 채웁니다. (다음 턴에 연구 경로로 가면 재사용)
+    """
+    if cache_key is not None and _speculations.pop(cache_key, None) is not None:
+        speculative_searches.inc("discarded")
+
+def speculation_stats() -> Dict[str, Any]:
+    """추측 검색 사용률(응급 분류로 버려지지 않은 비율)과 절약된 검색 시간"""
+    used = speculative_searches.values.get(("used",), 0)
+    discarded = speculative_searches.values.get(("discarded",), 0)
+    saved = speculation_saved_seconds.values.get((), [None, 0.0, 0])
+    return {
+        "enabled": SPECULATIVE_SEARCH,
+        "in_flight": sum(1 for speculation in _speculations.values() if speculation.finished_at is None),
+        "pending": len(_speculations),
+        "used": int(used),
+        "discarded": int(discarded),
+        "hit_rate": round(used / (used + discarded), 3) if used + discarded else None,
+        "saved_seconds_total": round(saved[1], 3),
+        "saved_seconds_avg": round(saved[1] / saved[2], 3) if saved[2] else None,
+    }
+
+async def _fetch(query: str, config: RunnableConfig, semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    """쿼리 하나의 결과 (추측 검색 -> 캐시 -> 새 검색 순서)"""
+    cache_key = _cache_key(query)
+    # 끝난 추측 검색도 결과가 캐시에 있으므로 캐시보다 먼저 확인해야 사용으로 집계됨
+    speculation = _speculations.pop(cache_key, None)
+    if speculation is not None:
+        now = asyncio.get_running_loop().time()
+        # 라우터와 겹쳐 실행된 검색 시간만큼 이번 턴의 지연이 줄어듦
+        saved = (speculation.finished_at or now) - speculation.started_at
+        speculative_searches.inc("used")
+        speculation_saved_seconds.observe(saved)
+        rag_queries.inc("speculation")
+        # 이 노드가 취소되더라도 공유 검색 작업은 계속 진행해 캐시를 채움
+        return await asyncio.shield(speculation.task)
+
+    cached = medical_search_cache.get(cache_key)
+    if cached is not None:
+        rag_queries.inc("cache")
+        return cached
+
+    async with semaphore:
+        rag_queries.inc("search")
+        return await _search(query, cache_key, config)
+
+async def medical_rag_node(state: AgentState, config: RunnableConfig):
     """
     추출된 증상을 바탕으로 외부 의학 정보를 검색하는 RAG(Retrieval Augmented Generation) 노드입니다.
     Tavily API를 사용하여 신뢰할 수 있는 정보를 검색합니다.
-    결과를 캐싱하여 동일한 증상에 대한 반복 검색을 방지합니다.
+    결과를 쿼리별로 캐싱하여 반복 검색을 방지하고, specialist_router가 미리 시작한 같은 검색이 진행 중이면 그 결과를 사용합니다.
+    RAG_FANOUT이면 전체 증상 쿼리와 증상 묶음별 쿼리를 동시에 검색하여 URL/본문 기준으로 중복을 제거해 합칩니다.
+    LOCAL_INDEX이면 첫 라운드는 로컬 근거 인덱스를 먼저 조회하고, 충분히 일치하는 문단이 없을 때만 Tavily를 호출합니다.
+    research_critic이 재검색어(refined_query)를 제안한 재검색 라운드에서는 그 쿼리로 검색하고,
+    기존 근거에 새 근거를 누적하여 새로 추가된 개수(evidence_added)를 함께 반환합니다.
     """
     symptoms = state.get("symptoms", [])
     if symptoms is None:
@@ -16,45 +269,50 @@ def medical_rag_node(state: AgentState):
     if not symptoms:
         return {"medical_evidence": ["검색할 구체적인 증상 정보가 없습니다."]}
         
-    # 검색 쿼리 생성
-    query = f"medical diagnosis and treatment for symptoms: {', '.join(symptoms)} (official medical guidelines or research paper)"
-    
-    # 캐시 키 생성 (쿼리의 해시값)
-    cache_key = hashlib.md5(query.encode()).hexdigest()
-    
-    # 캐시 확인
-    cached_result = medical_search_cache.get(cache_key)
-    if cached_result is not None:
-        print(f"[Cache HIT] 캐시에서 의학 정보 로드: {symptoms}")
-        return {"medical_evidence": cached_result}
-    
-    print(f"[Cache MISS] Tavily 검색 실행: {symptoms}")
-    
-    # Tavily 검색 도구 초기화
-    exclude_domains = [
-        "naver.com", "blog.naver.com", "tistory.com", "velog.io", 
-        "brunch.co.kr", "medium.com", "reddit.com", "dcinside.com", 
-        "namu.wiki", "youtube.com", "facebook.com", "instagram.com", "twitter.com"
-    ]
-    
-    search = TavilySearchResults(
-        max_results=5,
-        exclude_domains=exclude_domains,
-    )
-    
-    try:
-        results = search.invoke(query)
-        
-        # results가 None인 경우 빈 리스트로 처리
-        if results is None:
-            results = []
-            
-        evidence = [res.get("content", "") for res in results if res is not None]
-        
-        # 결과를 캐시에 저장
-        medical_search_cache.set(cache_key, evidence)
-        
-        return {"medical_evidence": evidence}
-    except Exception as e:
-        print(f"medical_rag 검색 오류: {e}")
-        return {"medical_evidence": ["의학 정보를 검색하는 중 오류가 발생했습니다."]}
+    refined_query = state.get("refined_query")
+    if LOCAL_INDEX and not refined_query:
+        local_results = local_index.lookup(symptoms)
+        if local_results is not None:
+            print(f"medical_rag 로컬 인덱스 사용 ({len(local_results)}개 문단): {symptoms}")
+            rag_queries.inc("local")
+            evidence = merge_results([local_results])
+            return {"medical_evidence": evidence, "evidence_added": len(evidence)}
+
+    # 검색 쿼리 생성 (재검색 라운드는 로컬 근거가 부족하다고 평가된 경우이므로 항상 Tavily)
+    queries = [build_refined_query(refined_query, symptoms)] if refined_query else build_queries(symptoms)
+    print(f"medical_rag 검색 ({len(queries)}개 쿼리): {refined_query or symptoms}")
+
+    semaphore = asyncio.Semaphore(RAG_CONCURRENCY)
+    outcomes = await asyncio.gather(*(_fetch(query, config, semaphore) for query in queries), return_exceptions=True)
+    result_lists = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for error in errors:
+        print(f"medical_rag 검색 오류: {error!r}")
+
+    if not result_lists:
+        timed_out = any(isinstance(error, asyncio.TimeoutError) for error in errors)
+        if refined_query:
+            # 재검색 실패: 이전 라운드의 근거는 그대로 유지
+            update = {"evidence_added": 0}
+            if timed_out:
+                update["degraded"] = ["medical_rag:timeout"]
+            return update
+        if timed_out:
+            print("medical_rag 검색 시간 초과")
+            return {
+                "medical_evidence": ["의학 정보 검색이 시간 내에 완료되지 않았습니다."],
+                "degraded": ["medical_rag:timeout"],
+                "evidence_added": 0
+            }
+        return {"medical_evidence": ["의학 정보를 검색하는 중 오류가 발생했습니다."], "evidence_added": 0}
+
+    evidence = merge_results(result_lists)
+    existing = list(state.get("medical_evidence") or []) if refined_query else []
+    if existing:
+        # 재검색 라운드: 기존 근거 뒤에 새 근거를 붙이고 거의 같은 본문은 제거
+        evidence = dedupe(existing + evidence)
+    update = {"medical_evidence": evidence, "evidence_added": max(len(evidence) - len(existing), 0)}
+    if errors:
+        # 일부 쿼리만 실패한 경우 나머지 결과로 진행
+        update["degraded"] = ["medical_rag:partial"]
+    return update
@@ -1,10 +1,29 @@
 from typing import Any, Dict, List, Optional
 import re
-from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import llm
+from src.utils.llm import get_node_llm
+from src.utils.resilience import resilient_call
+import asyncio
+import functools
 
-def medication_search_node(state: AgentState) -> Dict[str, Any]:
+# 약물명 추출 프롬프트
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("human", """다음 텍스트에서 약물명을 추출하세요. 추출된 약물명만 쉼표로 구분하여 나열하세요.
+    약물명이 없으면 "없음"이라고만 답하세요.
+    
+    텍스트: {text}
+    
+    약물명:""")
+])
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("medication_search")
+
+
+async def medication_search_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """
     사용자 메시지에서 약물명을 추출합니다.
     (닥터 패스에 포함할 목적)
@@ -32,15 +51,8 @@ def medication_search_node(state: AgentState) -> Dict[str, Any]:
     combined_text = " ".join(user_messages)
     
     # LLM을 사용하여 약물명 추출
-    extraction_prompt = f"""다음 텍스트에서 약물명을 추출하세요. 추출된 약물명만 쉼표로 구분하여 나열하세요.
-    약물명이 없으면 "없음"이라고만 답하세요.
-    
-    텍스트: {combined_text}
-    
-    약물명:"""
-    
     try:
-        medication_response = llm.invoke([HumanMessage(content=extraction_prompt)])
+        medication_response = await resilient_call(lambda: _chain().ainvoke({"text": combined_text}, config=config), config)
         medications_str = medication_response.content.strip()
         
         if medications_str == "없음" or not medications_str:
@@ -62,6 +74,9 @@ def medication_search_node(state: AgentState) -> Dict[str, Any]:
             "medication_info": f"복용 약물: {medication_list}"
         }
         
+    except asyncio.TimeoutError:
+        print("Medication extraction: 마감 시간 초과")
+        return {"degraded": ["medication_search:timeout"]}
     except Exception as e:
         print(f"Medication extraction error: {e}")
         return {}
@@ -0,0 +1,34 @@
+from typing import Dict, Any
+from langchain_core.runnables import RunnableConfig
+from src.state import AgentState
+from src.utils import red_flags
+from src.utils.metrics import red_flag_matches
+
+
+async def red_flag_screen_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    그래프 진입점에서 환자 발화를 규칙 기반으로 검사하는 노드입니다.
+    응급 징후가 있으면 증상 분석/역질문/라우터 LLM을 모두 건너뛰고 emergency_response로 바로 보냅니다.
+    """
+    messages = state.get("messages") or []
+    if not messages:
+        return {"red_flags": []}
+
+    last_message = getattr(messages[-1], "content", messages[-1])
+    if not isinstance(last_message, str):
+        # 이미지가 포함된 멀티모달 메시지는 텍스트 파트만 검사
+        last_message = " ".join(part.get("text", "") for part in last_message if isinstance(part, dict))
+
+    matches = red_flags.scan(last_message)
+    if not matches:
+        return {"red_flags": []}
+
+    categories = [match.category for match in matches]
+    for category in categories:
+        red_flag_matches.inc(category)
+    print(f"Red Flag Screen: 응급 징후 감지 {categories}")
+
+    # 탐지된 표현을 증상 목록에 남겨 다음 턴/의사 전달 내용에서 참고하도록 함
+    symptoms = list(state.get("symptoms") or [])
+    symptoms.extend(match.text for match in matches if match.text not in symptoms)
+    return {"red_flags": categories, "symptoms": symptoms, "next_step": "emergency"}
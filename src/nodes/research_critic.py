@@ -1,12 +1,75 @@
 from typing import Any, Dict
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import llm
+from src.utils.llm import get_node_llm
+from src.utils.deadline import has_budget, CRITIC_MIN_BUDGET_SECONDS
+from src.utils.resilience import resilient_call
+from src.utils.evidence import pack_evidence
+from src.utils.metrics import research_early_stops
+from src.nodes import medical_rag
+from typing import Optional
+import asyncio
+import functools
+import os
+import re
 
-def research_critic_node(state: AgentState) -> Dict[str, Any]:
+# 최대 재검색 횟수 (다중 쿼리 검색은 첫 라운드에서 증상 묶음별로 이미 병렬 검색하므로 재검색을 적게 허용)
+MAX_SEARCH_ROUNDS = int(os.getenv("RESEARCH_MAX_ROUNDS", "3"))
+FANOUT_MAX_SEARCH_ROUNDS = int(os.getenv("RESEARCH_MAX_ROUNDS_FANOUT", "1"))
+
+
+def max_search_rounds() -> int:
+    """현재 검색 방식의 최대 재검색 횟수 (medical_rag.RAG_FANOUT은 호출 시점에 읽음)"""
+    return FANOUT_MAX_SEARCH_ROUNDS if medical_rag.RAG_FANOUT else MAX_SEARCH_ROUNDS
+
+# 프롬프트: 검색 결과 평가
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 엄격한 의학 연구 평가자(Medical Research Critic)입니다.
+        현재 환자의 증상: {symptoms}
+        
+        지금까지 수집된 의학적 근거(Evidence):
+        {evidence}
+        
+        이 정보들이 환자의 증상 원인을 추론하고 진단을 내리기에 충분한지 평가하세요.
+        
+        규칙:
+        1. 정보가 충분하면 'SUFFICIENT'라고만 출력하세요.
+        2. 정보가 부족하거나, 엉뚱한 정보라면 'INSUFFICIENT'라고 출력하고, 
+           어떤 정보가 더 필요한지 구체적인 검색 키워드(Query)를 제안하세요.
+           형식: INSUFFICIENT: [추천 검색어]
+        """),
+    ("human", "평가를 시작해주세요.")
+])
+
+_SUGGESTION = re.compile(r"INSUFFICIENT\s*[:：]?\s*(.*)", re.DOTALL)
+
+def parse_suggestion(content: str) -> Optional[str]:
+    """'INSUFFICIENT: [추천 검색어]' 응답에서 검색어만 꺼냅니다. (없으면 None)"""
+    match = _SUGGESTION.search(content)
+    if not match:
+        return None
+    lines = match.group(1).strip().splitlines()
+    suggestion = lines[0].strip().strip("[]\"' ") if lines else ""
+    return suggestion or None
+
+def _stop(reason: str) -> Dict[str, Any]:
+    # 재검색해도 달라질 것이 없으므로 현재 근거로 진단 진행
+    print(f"Research Critic: 재검색 중단 ({reason})")
+    research_early_stops.inc(reason)
+    return {"next_step": "diagnosis_generator"}
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("research_critic")
+
+
+async def research_critic_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
     """
     검색된 의학 정보(medical_evidence)가 충분한지 평가(Critique)하고,
     부족하다면 재검색을 위한 쿼리를 제안하거나, 검색을 종료시킵니다.
+    제안된 검색어는 refined_query로 medical_rag에 전달되며, 직전 재검색이 새 근거를 하나도 추가하지 못했거나
+    같은 검색어가 다시 제안되면 더 돌지 않고 진단으로 넘어갑니다.
     """
     
     symptoms = state.get("symptoms", [])
@@ -18,52 +81,52 @@ def research_critic_node(state: AgentState) -> Dict[str, Any]:
     search_count = state.get("search_count", 0)
     if search_count is None: search_count = 0
     
-    # 최대 검색 횟수 제한 (예: 3회)
-    if search_count >= 3:
+    # 최대 검색 횟수 제한
+    if search_count >= max_search_rounds():
         return {"next_step": "diagnosis_generator"} # 충분하지 않더라도 강제 진행
 
-    # 증거가 아예 없으면 무조건 재검색 (혹은 검색 실패 처리)
+    # 남은 시간이 부족하면 평가/재검색 없이 현재 근거로 진단 진행
+    if not has_budget(config, CRITIC_MIN_BUDGET_SECONDS):
+        print("Research Critic: 남은 시간이 부족하여 재검색을 생략합니다.")
+        return {"next_step": "diagnosis_generator", "degraded": ["research_critic:skipped"]}
+
+    # 직전 재검색이 새 근거를 추가하지 못했으면 같은 루프를 반복하지 않음
+    if search_count > 0 and not state.get("evidence_added"):
+        return _stop("no_new_evidence")
+
+    previous_query = state.get("refined_query")
+
+    # 증거가 아예 없으면 더 넓은 검색어로 재검색
     if not evidence:
-         # 사실 evidence는 리스트이므로 내용이 있는지 확인해야 함.
-         # 여기서는 간단히 카운트만 증가시키고 rag로 보냄 (rag에서 쿼리 생성 로직이 있으므로)
-         return {"search_count": search_count + 1, "next_step": "medical_rag"}
+        refined_query = f"common causes of {', '.join(symptoms)}"
+        if refined_query == previous_query:
+            return _stop("repeat_query")
+        return {"search_count": search_count + 1, "next_step": "medical_rag", "refined_query": refined_query}
 
-    # 프롬프트: 검색 결과 평가
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 엄격한 의학 연구 평가자(Medical Research Critic)입니다.
-        현재 환자의 증상: {symptoms}
-        
-        지금까지 수집된 의학적 근거(Evidence):
-        {evidence}
-        
-        이 정보들이 환자의 증상 원인을 추론하고 진단을 내리기에 충분한지 평가하세요.
-        
-        규칙:
-        1. 정보가 충분하면 'SUFFICIENT'라고만 출력하세요.
-        2. 정보가 부족하거나, 엉뚱한 정보라면 'INSUFFICIENT'라고 출력하고, 
-           어떤 정보가 더 필요한지 구체적인 검색 키워드(Query)를 제안하세요.
-           형식: INSUFFICIENT: [추천 검색어]
-        """),
-        ("human", "평가를 시작해주세요.")
-    ])
-    
-    chain = prompt | llm
-    response = chain.invoke({
-        "symptoms": ", ".join(symptoms),
-        "evidence": "\n".join(evidence) if evidence else "없음"
-    })
+    chain = _chain()
+    try:
+        inputs = {
+            "symptoms": ", ".join(symptoms),
+            "evidence": pack_evidence(evidence, symptoms, "research_critic") or "없음"
+        }
+        response = await resilient_call(lambda: chain.ainvoke(inputs, config=config), config)
+    except asyncio.TimeoutError:
+        print("Research Critic: 마감 시간 초과, 현재 근거로 진단을 진행합니다.")
+        return {"next_step": "diagnosis_generator", "degraded": ["research_critic:timeout"]}
     
     content = response.content.strip()
     
     if content.startswith("SUFFICIENT"):
         return {"next_step": "diagnosis_generator"}
-    else:
-        # 재검색 결정
-        # 여기서 쿼리를 파싱해서 state에 넣어주면 RAG 노드가 그걸 쓸 수 있게 개선해야 함.
-        # 현재는 RAG 노드가 매번 쿼리를 생성하므로, search_count를 늘려서 다시 보내면 더 나은 쿼리를 생성하도록 유도될 수 있음.
-        # (더 정교하게 하려면 RAG 노드에 previous_search_failures 같은걸 전달해야 함)
-        
-        return {
-            "search_count": search_count + 1,
-            "next_step": "medical_rag"
-        }
+
+    # 재검색 결정: 제안된 검색어로 medical_rag가 검색하도록 전달
+    refined_query = parse_suggestion(content)
+    if refined_query is None:
+        return _stop("no_query")
+    if refined_query == previous_query:
+        return _stop("repeat_query")
+    return {
+        "search_count": search_count + 1,
+        "next_step": "medical_rag",
+        "refined_query": refined_query
+    }
@@ -1,41 +1,17 @@
 from typing import Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableConfig
 from src.state import AgentState
-from src.utils.llm import llm
+from src.utils.llm import get_node_llm
+from src.utils.resilience import resilient_call
+from src.utils.history import format_transcript
+import asyncio
+import functools
 import json
 
-def symptom_analyzer_node(state: AgentState) -> Dict[str, Any]:
-    """
-    사용자의 메시지에서 증상을 추출하고, 
-    진단을 위해 정보가 충분한지 판단하는 노드입니다.
-    """
-    messages = state.get("messages", [])
-    if not messages:
-        return {"next_step": "end"}
-        
-    last_message_obj = messages[-1]
-    last_message = getattr(last_message_obj, 'content', str(last_message_obj))
-    
-    existing_symptoms = state.get("symptoms", [])
-    if existing_symptoms is None:
-        existing_symptoms = []
-    
-    # 대화 내역 추출 (최근 5개만)
-    conversation_history = []
-    recent_messages = messages[-5:] if messages else []
-    for msg in recent_messages:
-        if msg and hasattr(msg, 'type'):
-            msg_content = getattr(msg, 'content', '')
-            if msg.type == 'human':
-                conversation_history.append(f"환자: {msg_content}")
-            elif msg.type == 'ai':
-                conversation_history.append(f"AI: {msg_content}")
-    
-    conversation_text = "\n".join(conversation_history) if conversation_history else "없음"
-    
-    # 프롬프트 템플릿: 증상 업데이트 및 정보 부족 여부 판단
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 정밀한 의료 진단 보조 AI입니다.
+# 프롬프트 템플릿: 증상 업데이트 및 정보 부족 여부 판단
+_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """당신은 정밀한 의료 진단 보조 AI입니다.
         현재까지 파악된 증상 목록과 사용자의 새로운 입력을 바탕으로 증상 목록을 업데이트하고, 진단을 내리기에 정보가 충분한지 판단하세요.
 
         현재 파악된 증상: {current_symptoms}
@@ -72,18 +48,45 @@ def symptom_analyzer_node(state: AgentState) -> Dict[str, Any]:
         - 약물 복용 여부를 아직 확인하지 않았다면 is_sufficient: false
         - 여전히 모호하다면 is_sufficient: false
         """),
-        ("human", "{text}")
-    ])
+    ("human", "{text}")
+])
+
+@functools.lru_cache(maxsize=1)
+def _chain():
+    return _PROMPT | get_node_llm("symptom_analyzer")
+
+
+async def symptom_analyzer_node(state: AgentState, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    사용자의 메시지에서 증상을 추출하고, 
+    진단을 위해 정보가 충분한지 판단하는 노드입니다.
+    """
+    messages = state.get("messages", [])
+    if not messages:
+        return {"next_step": "end"}
+        
+    last_message_obj = messages[-1]
+    last_message = getattr(last_message_obj, 'content', str(last_message_obj))
     
-    chain = prompt | llm
-    response = chain.invoke({
-        "text": last_message, 
-        "current_symptoms": ", ".join(existing_symptoms) if existing_symptoms else "없음",
-        "conversation_history": conversation_text
-    })
+    existing_symptoms = state.get("symptoms", [])
+    if existing_symptoms is None:
+        existing_symptoms = []
+    
+    # 대화 내역 (요약 + 최근 메시지 창). 이번 턴의 후속 노드들이 재사용하도록 상태에 저장합니다.
+    transcript = format_transcript(messages)
+    conversation_text = transcript or "없음"
+    
+    chain = _chain()
+    degraded = []
     
     # 응답 파싱
     try:
+        response = await resilient_call(lambda: chain.ainvoke({
+            "text": last_message, 
+            "current_symptoms": ", ".join(existing_symptoms) if existing_symptoms else "없음",
+            "conversation_history": conversation_text
+        }, config=config), config)
+        
         content = response.content if hasattr(response, 'content') else str(response)
         content = content.replace("```json", "").replace("```", "").strip()
         if not content: content = "{}"
@@ -105,6 +108,12 @@ def symptom_analyzer_node(state: AgentState) -> Dict[str, Any]:
         if missing_info and len(missing_info) > 0:
             is_sufficient = False
             
+    except asyncio.TimeoutError:
+        print("Symptom Analyzer: 마감 시간 초과, 기존 증상으로 진행합니다.")
+        symptoms = existing_symptoms
+        missing_info = []
+        is_sufficient = True
+        degraded.append("symptom_analyzer:timeout")
     except Exception as e:
         print(f"JSON Parsing Error: {e}")
         symptoms = existing_symptoms
@@ -134,9 +143,13 @@ def symptom_analyzer_node(state: AgentState) -> Dict[str, Any]:
     else:
         next_step = "specialist_router"
 
-    return {
+    result = {
         "symptoms": symptoms,
         "missing_info": missing_info,
-        "next_step": next_step
+        "next_step": next_step,
+        "transcript": transcript
     }
+    if degraded:
+        result["degraded"] = degraded
+    return result
 # Force reload
@@ -0,0 +1,129 @@
+"""
+OpenAI/Tavily 호환 재생(replay) 서버
+녹화된 카세트(REPLAY_RECORD로 생성)를 로컬에서 서빙하여, 네트워크/API 키 없이 전체 그래프를 재현합니다.
+
+사용법:
+    python -m src.replay_server --cassette data/cassettes/scenario.jsonl --port 8765 --latency-scale 1.0
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 TAVILY_BASE_URL=http://127.0.0.1:8765 \\
+    OPENAI_API_KEY=replay TAVILY_API_KEY=replay uvicorn src.api:app
+"""
+from typing import Any, Dict, Iterator, Optional
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from src.utils.replay import Cassette, chat_key, search_key
+
+
+class ReplayConfig:
+    """
+    주입 지연 설정
+    - latency_ms가 있으면 모든 응답에 고정 지연(+jitter)을 적용
+    - 없으면 녹화 당시 소요 시간 x latency_scale 만큼 지연 (0이면 즉시 응답)
+    """
+    def __init__(self, latency_ms: Optional[float] = None, jitter_ms: float = 0, latency_scale: float = 0, chunk_interval_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.latency_scale = latency_scale
+        self.chunk_interval_ms = chunk_interval_ms
+
+    def delay_seconds(self, entry: Dict[str, Any]) -> float:
+        if self.latency_ms is not None:
+            base = self.latency_ms
+        else:
+            base = entry.get("duration_ms", 0) * self.latency_scale
+        return max(0.0, base + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+
+def _stream_chunks(completion: Dict[str, Any], include_usage: bool, chunk_chars: int = 16) -> Iterator[Dict[str, Any]]:
+    """chat.completion 응답을 chat.completion.chunk 스트림으로 나눕니다."""
+    base = {"id": completion.get("id"), "object": "chat.completion.chunk", "created": completion.get("created", int(time.time())), "model": completion.get("model")}
+    choice = completion["choices"][0]
+    content = choice["message"].get("content") or ""
+    yield {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}
+    for start in range(0, len(content), chunk_chars):
+        yield {**base, "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_chars]}, "finish_reason": None}]}
+    yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": choice.get("finish_reason") or "stop"}]}
+    if include_usage:
+        yield {**base, "choices": [], "usage": completion.get("usage")}
+
+
+def create_app(cassette_path: str, config: ReplayConfig) -> FastAPI:
+    entries = Cassette(cassette_path).load()
+    stats = {"served": 0, "missing": 0}
+    app = FastAPI(title="MediGraph Replay Server")
+
+    def missing(key: str) -> JSONResponse:
+        stats["missing"] += 1
+        return JSONResponse(status_code=404, content={"error": {"message": f"cassette miss: {key}", "type": "replay_miss"}})
+
+    @app.get("/v1/models")
+    async def models():
+        names = sorted({entry["request"].get("model") for entry in entries.values() if entry["kind"] == "openai"})
+        return {"object": "list", "data": [{"id": name, "object": "model"} for name in names if name]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        key = chat_key(body)
+        entry = entries.get(key)
+        if entry is None:
+            return missing(key)
+        stats["served"] += 1
+        await asyncio.sleep(config.delay_seconds(entry))
+        completion = entry["response"]
+        if not body.get("stream"):
+            return completion
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def events():
+            for chunk in _stream_chunks(completion, include_usage):
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if config.chunk_interval_ms:
+                    await asyncio.sleep(config.chunk_interval_ms / 1000)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        key = search_key(body.get("query", ""), body.get("max_results", 5))
+        entry = entries.get(key)
+        if entry is None:
+            return missing(key)
+        stats["served"] += 1
+        await asyncio.sleep(config.delay_seconds(entry))
+        return {"query": body.get("query"), "results": entry["response"]["results"]}
+
+    @app.get("/stats")
+    async def replay_stats():
+        return {"entries": len(entries), **stats}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI/Tavily-compatible replay server")
+    parser.add_argument("--cassette", required=True, help="REPLAY_RECORD로 녹화한 JSONL 카세트")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=None, help="고정 응답 지연 (지정 시 녹화 지연 무시)")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--latency-scale", type=float, default=0, help="녹화 당시 소요 시간에 곱할 배율")
+    parser.add_argument("--chunk-interval-ms", type=float, default=0, help="스트리밍 청크 간 간격")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = ReplayConfig(args.latency_ms, args.jitter_ms, args.latency_scale, args.chunk_interval_ms)
+    uvicorn.run(create_app(args.cassette, config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
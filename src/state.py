@@ -1,6 +1,7 @@
 from typing import TypedDict, Annotated, List, Optional
 from langchain_core.messages import BaseMessage
-import operator
+from src.utils.deadline import merge_degraded
+from src.utils.history import merge_messages
 
 class AgentState(TypedDict):
     """
@@ -8,9 +9,13 @@ class AgentState(TypedDict):
     LangGraph의 각 노드 간에 이 상태 객체가 공유됩니다.
     """
     
-    # messages: 대화 기록을 저장합니다. operator.add reducer를 사용하여
-    # 새로운 메시지가 리스트에 추가(append)되는 방식으로 업데이트됩니다.
-    messages: Annotated[List[BaseMessage], operator.add]
+    # messages: 대화 기록을 저장합니다. merge_messages reducer가 새 메시지를 추가(append)하되
+    # 최근 HISTORY_WINDOW개만 원본으로 유지하고, 그 이전 환자 발화는 맨 앞의 요약 메시지로 접습니다.
+    messages: Annotated[List[BaseMessage], merge_messages]
+
+    # transcript: "환자: ... / AI: ..." 형식의 대화 내역 (요약 포함)
+    # 턴마다 symptom_analyzer가 한 번 만들고, 이후 노드는 이를 그대로 프롬프트에 사용합니다.
+    transcript: Optional[str]
     
     # symptoms: LLM이 사용자의 발화에서 추출한 증상 목록입니다. (예: ['두통', '구토'])
     symptoms: List[str]
@@ -30,8 +35,17 @@ class AgentState(TypedDict):
     next_step: Optional[str]
 
     # search_count: 검색 반복 횟수 제어 (무한 루프 방지) - 검색 품질 향상을 위한 Agentic Loop
+    # 진단 턴마다 specialist_router가 0으로 초기화합니다.
     search_count: int
 
+    # refined_query: research_critic이 INSUFFICIENT 판정과 함께 제안한 재검색어
+    # 값이 있으면 medical_rag는 이 검색어로 검색하고 결과를 기존 근거에 누적합니다.
+    refined_query: Optional[str]
+
+    # evidence_added: 마지막 검색 라운드가 새로 추가한 (중복이 아닌) 근거 수
+    # 재검색이 새 근거를 하나도 가져오지 못하면 research_critic은 같은 근거를 다시 평가하지 않고 진단으로 넘어갑니다.
+    evidence_added: Optional[int]
+
     # doctor_pass: 의사에게 보여줄 환자 진술 요약 (의학 용어 병기)
     doctor_pass: Optional[str]
 
@@ -58,3 +72,11 @@ class AgentState(TypedDict):
 
     # fact_check_sources: 검증에 사용된 출처 목록
     fact_check_sources: Optional[List[str]]
+
+    # red_flags: 이번 턴 환자 발화에서 규칙 기반으로 탐지한 응급 징후 범주 (예: ['cardiac', 'respiratory'])
+    # 턴마다 red_flag_screen이 덮어쓰며, 값이 있으면 LLM 없이 emergency_response로 바로 이동합니다.
+    red_flags: Optional[List[str]]
+
+    # degraded: 이번 턴에서 마감 시간 때문에 생략/축소된 단계 목록 (예: 'fact_checker:skipped')
+    # 턴 시작 시 API가 None을 넣어 초기화합니다.
+    degraded: Annotated[List[str], merge_degraded]
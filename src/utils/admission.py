@@ -0,0 +1,155 @@
+"""
+그래프 실행 앞단의 승인 제어(Admission Control)
+동시 실행 수와 대기열 길이를 제한하고, 응급 의심 요청은 우선 대기열로 먼저 처리
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+import asyncio
+import math
+import os
+import time
+
+from src.utils import red_flags
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+
+
+def is_urgent(text: str) -> bool:
+    """메시지에 (부정되지 않은) 응급 징후가 있는지 판단합니다. 그래프의 red_flag_screen과 같은 탐지기를 사용합니다."""
+    return bool(red_flags.scan(text))
+
+
+class AdmissionRejected(Exception):
+    """대기열이 가득 차 요청을 받을 수 없을 때 발생합니다."""
+    def __init__(self, priority: str, retry_after: int):
+        super().__init__(f"{priority} 대기열이 가득 찼습니다. {retry_after}초 후 다시 시도하세요.")
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    동시 실행 수(in-flight)와 대기열 길이를 제한하는 승인 제어기
+    슬롯이 비면 high 대기열을 normal 대기열보다 먼저 깨웁니다.
+    단일 이벤트 루프에서만 사용하므로 별도의 락이 필요 없습니다.
+    """
+    def __init__(self, max_inflight: int = 16, max_queue: int = 64, max_priority_queue: int = 32):
+        """
+        Args:
+            max_inflight: 동시에 그래프를 실행할 수 있는 최대 요청 수
+            max_queue: normal 대기열 최대 길이 (초과 시 즉시 거절)
+            max_priority_queue: high 대기열 최대 길이 (초과 시 즉시 거절)
+        """
+        self.max_inflight = max_inflight
+        self.limits = {PRIORITY_HIGH: max_priority_queue, PRIORITY_NORMAL: max_queue}
+        self.queues: Dict[str, Deque[asyncio.Future]] = {PRIORITY_HIGH: deque(), PRIORITY_NORMAL: deque()}
+        self.inflight = 0
+        self.admitted = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 0}
+        self.rejected = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 0}
+        self.waits = {PRIORITY_HIGH: deque(maxlen=1000), PRIORITY_NORMAL: deque(maxlen=1000)}
+        # 처리 시간 이동 평균 (Retry-After 추정용)
+        self.avg_service_seconds = 5.0
+
+    def _waiting(self, priority: str) -> int:
+        return sum(1 for fut in self.queues[priority] if not fut.done())
+
+    def _retry_after(self) -> int:
+        """대기 중인 요청이 모두 빠지는 데 걸릴 시간을 추정합니다."""
+        waiting = self._waiting(PRIORITY_HIGH) + self._waiting(PRIORITY_NORMAL)
+        rounds = (waiting + 1) / max(self.max_inflight, 1)
+        return max(1, math.ceil(rounds * self.avg_service_seconds))
+
+    async def acquire(self, priority: str = PRIORITY_NORMAL) -> None:
+        """
+        실행 슬롯을 얻을 때까지 대기합니다.
+
+        Raises:
+            AdmissionRejected: 해당 우선순위의 대기열이 가득 찬 경우
+        """
+        start = time.perf_counter()
+        queued = self._waiting(PRIORITY_HIGH) + self._waiting(PRIORITY_NORMAL)
+        if self.inflight < self.max_inflight and queued == 0:
+            self.inflight += 1
+            self._record_admit(priority, start)
+            return
+
+        if self._waiting(priority) >= self.limits[priority]:
+            self.rejected[priority] += 1
+            raise AdmissionRejected(priority, self._retry_after())
+
+        fut = asyncio.get_running_loop().create_future()
+        self.queues[priority].append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 슬롯을 넘겨받은 직후 취소된 경우: 슬롯을 다음 대기자에게 반환
+                self.release()
+            else:
+                try:
+                    self.queues[priority].remove(fut)
+                except ValueError:
+                    pass
+            raise
+        self._record_admit(priority, start)
+
+    def release(self) -> None:
+        """실행 슬롯을 반환합니다. 대기자가 있으면 슬롯을 그대로 넘겨줍니다."""
+        for priority in (PRIORITY_HIGH, PRIORITY_NORMAL):
+            queue = self.queues[priority]
+            while queue:
+                fut = queue.popleft()
+                if not fut.done():
+                    fut.set_result(True)
+                    return
+        self.inflight = max(0, self.inflight - 1)
+
+    @asynccontextmanager
+    async def admit(self, priority: str = PRIORITY_NORMAL):
+        """acquire/release를 감싼 컨텍스트 매니저"""
+        await self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_service(time.perf_counter() - start)
+            self.release()
+
+    def observe_service(self, seconds: float) -> None:
+        """요청 처리 시간을 이동 평균에 반영합니다."""
+        self.avg_service_seconds = 0.9 * self.avg_service_seconds + 0.1 * seconds
+
+    def _record_admit(self, priority: str, start: float) -> None:
+        self.admitted[priority] += 1
+        self.waits[priority].append(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이와 대기 시간 통계"""
+        lanes = {}
+        for priority in (PRIORITY_HIGH, PRIORITY_NORMAL):
+            waits = sorted(self.waits[priority])
+            lanes[priority] = {
+                "queue_depth": self._waiting(priority),
+                "queue_limit": self.limits[priority],
+                "admitted": self.admitted[priority],
+                "rejected": self.rejected[priority],
+                "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "wait_p95_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+            }
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "avg_service_seconds": round(self.avg_service_seconds, 2),
+            "lanes": lanes,
+        }
+
+
+# 전역 승인 제어기 인스턴스
+admission_controller = AdmissionController(
+    max_inflight=int(os.getenv("ADMISSION_MAX_INFLIGHT", "16")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+    max_priority_queue=int(os.getenv("ADMISSION_MAX_PRIORITY_QUEUE", "32")),
+)
@@ -21,6 +21,11 @@ class LRUCache:
         self.max_size = max_size
         self.ttl = timedelta(seconds=ttl_seconds)
         self.lock = threading.Lock()
+        # 통계 (메트릭 노출용)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -34,6 +39,7 @@ class LRUCache:
         """
         with self.lock:
             if key not in self.cache:
+                self.misses += 1
                 return None
             
             value, timestamp = self.cache[key]
@@ -42,10 +48,13 @@ class LRUCache:
             if datetime.now() - timestamp > self.ttl:
                 # 만료됨
                 del self.cache[key]
+                self.expirations += 1
+                self.misses += 1
                 return None
             
             # LRU: 최근 사용으로 이동
             self.cache.move_to_end(key)
+            self.hits += 1
             return value
     
     def set(self, key: str, value: Any) -> None:
@@ -69,7 +78,14 @@ class LRUCache:
             if len(self.cache) > self.max_size:
                 # 가장 오래된 항목 제거
                 self.cache.popitem(last=False)
+                self.evictions += 1
     
+    def contains(self, key: str) -> bool:
+        """만료되지 않은 항목이 있는지 확인 (적중/실패 통계와 LRU 순서에 영향 없음)"""
+        with self.lock:
+            entry = self.cache.get(key)
+            return entry is not None and datetime.now() - entry[1] <= self.ttl
+
     def clear(self) -> None:
         """캐시 전체 삭제"""
         with self.lock:
@@ -80,6 +96,17 @@ class LRUCache:
         with self.lock:
             return len(self.cache)
 
+    def stats(self) -> dict:
+        """적중/실패/제거 횟수와 현재 크기"""
+        with self.lock:
+            return {
+                "size": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
 
 # 전역 캐시 인스턴스
 medical_search_cache = LRUCache(max_size=100, ttl_seconds=3600)
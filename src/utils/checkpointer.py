@@ -0,0 +1,549 @@
+"""
+LangGraph 체크포인터 구성
+기본은 프로세스 내 MemorySaver이며, CHECKPOINTER=sqlite로 설정하면
+여러 워커 프로세스가 공유할 수 있는 SQLite(WAL 모드) 기반 체크포인터를 사용합니다.
+두 체크포인터 모두 보관 정책(RetentionPolicy)에 따라 오래된 체크포인트와 유휴 스레드를 정리합니다.
+"""
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class RetentionPolicy:
+    """
+    체크포인트 보관 정책
+    - keep_last: 스레드(네임스페이스)별로 유지할 최신 체크포인트 수 (0 이하이면 전부 유지)
+    - ttl_seconds: 마지막 활동 이후 이 시간이 지난 유휴 스레드는 삭제 (0 이하이면 만료 없음)
+    - sweep_interval_seconds: 유휴 스레드 정리를 수행하는 최소 간격
+    """
+    def __init__(self, keep_last: int = 1, ttl_seconds: float = 7200, sweep_interval_seconds: float = 60):
+        self.keep_last = keep_last
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._last_sweep = time.time()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", "1")),
+            ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "7200")),
+            sweep_interval_seconds=float(os.getenv("CHECKPOINT_SWEEP_INTERVAL_SECONDS", "60")),
+        )
+
+    def sweep_due(self) -> bool:
+        """정리 주기가 되었으면 True를 반환하고 다음 주기를 예약합니다."""
+        if self.ttl_seconds <= 0:
+            return False
+        now = time.time()
+        with self._lock:
+            if now - self._last_sweep < self.sweep_interval_seconds:
+                return False
+            self._last_sweep = now
+            return True
+
+
+def _memory_summary(sizes: Dict[str, int], top: int = 10) -> Dict[str, Any]:
+    """스레드별 저장 바이트 수를 요약합니다."""
+    total = sum(sizes.values())
+    largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "threads": len(sizes),
+        "total_bytes": total,
+        "avg_bytes_per_thread": round(total / len(sizes)) if sizes else 0,
+        "largest_threads": [{"thread_id": thread_id, "bytes": size} for thread_id, size in largest],
+    }
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    보관 정책을 적용한 MemorySaver
+    put마다 스레드의 오래된 체크포인트/쓰기와 더 이상 참조되지 않는 채널 값(blob)을 정리하고,
+    주기적으로 유휴 스레드를 삭제합니다.
+    체크포인트별 채널 버전을 put 시점에 따로 기록해 두므로, 정리할 때 체크포인트를 역직렬화하지 않습니다.
+    """
+    def __init__(self, retention: Optional[RetentionPolicy] = None, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.retention = retention or RetentionPolicy()
+        self.last_seen: Dict[str, float] = {}
+        # thread_id -> (checkpoint_ns, checkpoint_id) -> 채널 버전 (blob 키 계산용)
+        self.channel_versions: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self.last_seen[config["configurable"]["thread_id"]] = time.time()
+        return super().get_tuple(config)
+
+    def _put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        self.channel_versions.setdefault(thread_id, {})[(checkpoint_ns, checkpoint["id"])] = dict(checkpoint.get("channel_versions", {}))
+        self.last_seen[thread_id] = time.time()
+        self._prune_thread(thread_id)
+        return result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = self._put(config, checkpoint, metadata, new_versions)
+        if self.retention.sweep_due():
+            self.sweep()
+        return result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = self._put(config, checkpoint, metadata, new_versions)
+        if self.retention.sweep_due():
+            # 만료 스레드 선별은 스냅샷으로 스레드 풀에서, 삭제는 저장소를 변경하므로 이벤트 루프에서 수행
+            expired = await asyncio.to_thread(self._expired_threads, dict(self.last_seen), list(self.storage))
+            # 선별하는 동안 새 체크포인트를 받은 스레드는 삭제하지 않도록 현재 활동 시각으로 다시 확인
+            cutoff = time.time() - self.retention.ttl_seconds
+            for thread_id in expired:
+                if self.last_seen.get(thread_id, 0) < cutoff:
+                    self._remove_thread(thread_id)
+        return result
+
+    def _versions(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Dict[str, Any]:
+        """체크포인트의 채널 버전 (기록이 없을 때만 체크포인트를 역직렬화)"""
+        versions = self.channel_versions.get(thread_id, {}).get((checkpoint_ns, checkpoint_id))
+        if versions is not None:
+            return versions
+        saved = self.storage.get(thread_id, {}).get(checkpoint_ns, {}).get(checkpoint_id)
+        return self.serde.loads_typed(saved[0]).get("channel_versions", {}) if saved else {}
+
+    def _prune_thread(self, thread_id: str) -> None:
+        """스레드별로 최신 keep_last개 체크포인트만 남기고, 남은 체크포인트가 참조하지 않는 채널 값을 삭제합니다."""
+        keep_last = self.retention.keep_last
+        if keep_last <= 0:
+            return
+        blobs = getattr(self, "blobs", None)
+        thread_versions = self.channel_versions.get(thread_id, {})
+        for checkpoint_ns, checkpoints in list(self.storage.get(thread_id, {}).items()):
+            if len(checkpoints) <= keep_last:
+                continue
+            # 체크포인트 ID(uuid6)는 시간순으로 정렬됩니다.
+            ordered = sorted(checkpoints)
+            pruned, kept = ordered[:-keep_last], ordered[-keep_last:]
+            stale = set()
+            for checkpoint_id in pruned:
+                stale.update(self._versions(thread_id, checkpoint_ns, checkpoint_id).items())
+                del checkpoints[checkpoint_id]
+                thread_versions.pop((checkpoint_ns, checkpoint_id), None)
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            if blobs is not None and stale:
+                for checkpoint_id in kept:
+                    stale.difference_update(self._versions(thread_id, checkpoint_ns, checkpoint_id).items())
+                for channel, version in stale:
+                    blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+    def _remove_thread(self, thread_id: str) -> None:
+        namespaces = self.storage.pop(thread_id, {})
+        thread_versions = self.channel_versions.pop(thread_id, {})
+        self.last_seen.pop(thread_id, None)
+        blobs = getattr(self, "blobs", None)
+        for checkpoint_ns, checkpoints in namespaces.items():
+            for checkpoint_id, saved in checkpoints.items():
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                if blobs is None:
+                    continue
+                versions = thread_versions.get((checkpoint_ns, checkpoint_id))
+                if versions is None:
+                    versions = self.serde.loads_typed(saved[0]).get("channel_versions", {})
+                for channel, version in versions.items():
+                    blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+
+    def _expired_threads(self, last_seen: Dict[str, float], thread_ids: Sequence[str]) -> list:
+        """마지막 활동 시각이 TTL보다 오래된 스레드 (체크포인트를 읽지 않고 타임스탬프만 비교)"""
+        if self.retention.ttl_seconds <= 0:
+            return []
+        cutoff = time.time() - self.retention.ttl_seconds
+        return [thread_id for thread_id in thread_ids if last_seen.get(thread_id, 0) < cutoff]
+
+    def sweep(self) -> int:
+        """
+        유휴 스레드를 삭제합니다. (참조되지 않는 채널 값은 put마다 _prune_thread가 정리)
+
+        Returns:
+            삭제된 스레드 수
+        """
+        expired = self._expired_threads(self.last_seen, list(self.storage))
+        for thread_id in expired:
+            self._remove_thread(thread_id)
+        return len(expired)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self._remove_thread(thread_id)
+
+    def _memory_snapshot(self) -> Tuple[Dict[str, list], list, list]:
+        """
+        memory_report용 얕은 복사본 (값은 복사하지 않고 참조만 모음)
+        저장소는 이벤트 루프에서 변경되므로 복사본은 루프에서 만들고, 크기 계산은 복사본으로 합니다.
+        """
+        storage = {thread_id: [saved for checkpoints in namespaces.values() for saved in checkpoints.values()]
+                   for thread_id, namespaces in self.storage.items()}
+        writes = [(key[0], list(writes.values())) for key, writes in self.writes.items()]
+        blobs = [(key[0], value) for key, value in (getattr(self, "blobs", None) or {}).items()]
+        return storage, writes, blobs
+
+    @staticmethod
+    def _memory_sizes(storage: Dict[str, list], writes: list, blobs: list) -> Dict[str, Any]:
+        sizes = {thread_id: sum(len(saved_checkpoint[1]) + len(saved_metadata[1]) for saved_checkpoint, saved_metadata, _ in saved)
+                 for thread_id, saved in storage.items()}
+        for thread_id, thread_writes in writes:
+            if thread_id in sizes:
+                sizes[thread_id] += sum(len(write[2][1]) for write in thread_writes)
+        for thread_id, value in blobs:
+            if thread_id in sizes:
+                sizes[thread_id] += len(value[1])
+        return _memory_summary(sizes)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """스레드별 직렬화된 체크포인트/쓰기/채널 값의 바이트 수"""
+        return self._memory_sizes(*self._memory_snapshot())
+
+    async def amemory_report(self) -> Dict[str, Any]:
+        """memory_report의 비동기 버전 (이벤트 루프에서 복사본을 만들고 합산은 스레드 풀에서 수행)"""
+        snapshot = self._memory_snapshot()
+        return await asyncio.to_thread(self._memory_sizes, *snapshot)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """
+    SQLite 기반 영속 체크포인터
+    - WAL 모드 + busy_timeout으로 여러 프로세스가 같은 파일을 안전하게 공유
+    - (thread_id, checkpoint_ns, checkpoint_id) 기본키 인덱스로 스레드별 최신 체크포인트 조회
+    - put_writes의 쓰기 묶음은 executemany로 한 트랜잭션에 기록
+    - 보관 정책: put과 같은 트랜잭션에서 오래된 체크포인트를 삭제하고, 주기적으로 유휴 스레드 삭제
+    연결은 스레드마다 하나씩 열며, 비동기 메서드는 asyncio.to_thread로 실행합니다.
+    """
+    def __init__(self, path: str, *, serde: Any = None, retention: Optional[RetentionPolicy] = None):
+        """
+        Args:
+            path: SQLite 데이터베이스 파일 경로
+            retention: 보관 정책 (생략 시 기본 정책)
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.retention = retention or RetentionPolicy()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """쓰기 트랜잭션 (BEGIN IMMEDIATE로 쓰기 잠금을 먼저 확보)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---- 조회 ----
+
+    def _row_to_tuple(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, blob, metadata_type, metadata_blob = row
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, blob)),
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((w_type, value))) for task_id, channel, w_type, value in writes],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        conn = self._conn()
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+        return self._row_to_tuple(conn, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            checkpoint_id = get_checkpoint_id(config)
+            if checkpoint_id:
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before is not None:
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            f"FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+            params,
+        ).fetchall()
+        yielded = 0
+        for row in rows:
+            if limit is not None and yielded >= limit:
+                break
+            item = self._row_to_tuple(conn, row)
+            if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            yielded += 1
+            yield item
+
+    # ---- 기록 ----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(dict(metadata))
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], configurable.get("checkpoint_id"),
+                 type_, blob, metadata_type, metadata_blob, time.time()),
+            )
+            if self.retention.keep_last > 0:
+                self._prune_thread(conn, thread_id, checkpoint_ns)
+        if self.retention.sweep_due():
+            self.sweep()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+        # 특수 채널(에러/인터럽트 등)만 있는 경우 덮어쓰기, 일반 쓰기는 최초 기록 유지
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, blob, task_path))
+        with self._transaction() as conn:
+            conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _prune_thread(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str) -> None:
+        """최신 keep_last개를 제외한 체크포인트와 그 쓰기를 삭제합니다."""
+        conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns, self.retention.keep_last),
+        )
+        conn.execute(
+            "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN ("
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)",
+            (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+        )
+
+    def sweep(self) -> int:
+        """
+        마지막 체크포인트가 TTL보다 오래된 유휴 스레드를 삭제합니다.
+
+        Returns:
+            삭제된 스레드 수
+        """
+        if self.retention.ttl_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.retention.ttl_seconds
+        with self._transaction() as conn:
+            expired = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)
+            ).fetchall()]
+            conn.executemany("DELETE FROM checkpoints WHERE thread_id = ?", [(t,) for t in expired])
+            conn.executemany("DELETE FROM writes WHERE thread_id = ?", [(t,) for t in expired])
+        return len(expired)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def memory_report(self) -> Dict[str, Any]:
+        """스레드별 저장 바이트 수 (체크포인트 + 메타데이터 + 쓰기)"""
+        conn = self._conn()
+        sizes = {thread_id: size for thread_id, size in conn.execute(
+            "SELECT thread_id, SUM(LENGTH(checkpoint) + LENGTH(metadata)) FROM checkpoints GROUP BY thread_id"
+        ).fetchall()}
+        for thread_id, size in conn.execute("SELECT thread_id, SUM(LENGTH(value)) FROM writes GROUP BY thread_id").fetchall():
+            if thread_id in sizes:
+                sizes[thread_id] += size or 0
+        return _memory_summary(sizes)
+
+    # ---- 비동기 버전 (스레드 풀에서 실행) ----
+
+    async def amemory_report(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.memory_report)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """
+    환경 변수 CHECKPOINTER에 따라 체크포인터를 생성합니다.
+    - memory (기본값): 프로세스 메모리에만 저장 (재시작 시 소멸, 서버 무저장 원칙)
+    - sqlite: CHECKPOINT_DB_PATH 파일에 저장 (워커 간 공유, 재시작 후에도 유지)
+    보관 정책은 CHECKPOINT_KEEP_LAST / CHECKPOINT_TTL_SECONDS로 설정합니다.
+    """
+    backend = os.getenv("CHECKPOINTER", "memory").lower()
+    retention = RetentionPolicy.from_env()
+    if backend == "sqlite":
+        return SQLiteCheckpointer(os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.sqlite"), retention=retention)
+    return BoundedMemorySaver(retention=retention)
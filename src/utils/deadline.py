@@ -0,0 +1,80 @@
+"""
+요청 단위 마감 시간(Deadline) 유틸리티
+API가 config["configurable"]["deadline_at"]에 절대 시각(epoch 초)을 넣으면,
+각 노드는 남은 예산을 보고 LLM/검색 호출 타임아웃을 정하거나 단계를 생략합니다.
+"""
+from typing import Any, Awaitable, Optional, TypeVar
+import asyncio
+import os
+import time
+
+T = TypeVar("T")
+
+# 서버 기본 마감 시간 (요청에서 deadline_ms를 지정하지 않은 경우)
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "60"))
+
+# 호출 1회당 최대 타임아웃 (남은 예산이 더 길어도 이 값을 넘지 않음)
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "30"))
+SEARCH_CALL_TIMEOUT_SECONDS = float(os.getenv("SEARCH_CALL_TIMEOUT_SECONDS", "10"))
+# 검색 시도 1회당 타임아웃 (전체 상한 안에서 재시도할 여유를 남김)
+SEARCH_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("SEARCH_ATTEMPT_TIMEOUT_SECONDS", "6"))
+
+# 단계별 최소 예산: 남은 시간이 이보다 짧으면 해당 단계를 생략
+CRITIC_MIN_BUDGET_SECONDS = float(os.getenv("DEADLINE_CRITIC_MIN_SECONDS", "20"))
+FACT_CHECK_MIN_BUDGET_SECONDS = float(os.getenv("DEADLINE_FACT_CHECK_MIN_SECONDS", "5"))
+
+
+def deadline_after(seconds: Optional[float] = None) -> float:
+    """지금부터 seconds 뒤의 마감 시각(epoch 초)을 반환합니다."""
+    if seconds is None:
+        seconds = DEFAULT_DEADLINE_SECONDS
+    return time.time() + seconds
+
+
+def remaining_seconds(config: Optional[dict]) -> Optional[float]:
+    """
+    config에 설정된 마감 시각까지 남은 시간(초)을 반환합니다.
+
+    Returns:
+        남은 시간 (음수일 수 있음) 또는 None (마감 시간이 설정되지 않은 경우)
+    """
+    if not config:
+        return None
+    deadline_at = (config.get("configurable") or {}).get("deadline_at")
+    if deadline_at is None:
+        return None
+    return deadline_at - time.time()
+
+
+def has_budget(config: Optional[dict], min_seconds: float) -> bool:
+    """남은 예산이 min_seconds 이상인지 확인합니다. (마감 시간이 없으면 항상 True)"""
+    remaining = remaining_seconds(config)
+    return remaining is None or remaining >= min_seconds
+
+
+def call_timeout(config: Optional[dict], cap: float = LLM_CALL_TIMEOUT_SECONDS) -> float:
+    """남은 예산과 호출당 상한(cap) 중 작은 값을 호출 타임아웃으로 반환합니다."""
+    remaining = remaining_seconds(config)
+    if remaining is None:
+        return cap
+    return max(0.0, min(cap, remaining))
+
+
+async def with_deadline(awaitable: Awaitable[T], config: Optional[dict], cap: float = LLM_CALL_TIMEOUT_SECONDS) -> T:
+    """
+    awaitable을 남은 예산 기반 타임아웃으로 실행합니다.
+
+    Raises:
+        asyncio.TimeoutError: 타임아웃 안에 완료되지 않은 경우
+    """
+    return await asyncio.wait_for(awaitable, timeout=call_timeout(config, cap))
+
+
+def merge_degraded(left: Optional[list], right: Any) -> list:
+    """
+    AgentState.degraded용 reducer.
+    None이 들어오면 (새 턴 시작) 목록을 비우고, 리스트가 들어오면 이어 붙입니다.
+    """
+    if right is None:
+        return []
+    return (left or []) + list(right)
@@ -0,0 +1,153 @@
+"""
+근거(evidence) 패킹
+검색 결과를 프롬프트에 넣기 전에 세 단계로 줄입니다.
+1. 중복 제거: 문자 shingle의 MinHash 서명으로 거의 같은 문단 제거
+2. 재정렬: 현재 증상(및 검색어)에 대한 BM25 점수로 정렬 (점수가 같으면 검색 순위 유지)
+3. 패킹: 노드별 토큰 예산 안에서 상위 문단부터 채움
+외부 의존성 없이 동작하며, 토큰 수는 문자 종류별 근사치로 추정합니다.
+"""
+from typing import Dict, List, Optional, Sequence
+import json
+import math
+import os
+import re
+import zlib
+
+from src.utils.metrics import evidence_tokens
+
+# 노드별 근거 토큰 예산 (EVIDENCE_TOKEN_BUDGET JSON으로 덮어쓰기)
+DEFAULT_TOKEN_BUDGET = {
+    "research_critic": 800,
+    "diagnosis_generator": 2000,
+    "fact_checker": 1500,
+}
+TOKEN_BUDGET = {**DEFAULT_TOKEN_BUDGET, **json.loads(os.getenv("EVIDENCE_TOKEN_BUDGET", "{}"))}
+# 이 값 이상의 추정 Jaccard 유사도를 가진 문단은 중복으로 간주
+DEDUPE_THRESHOLD = float(os.getenv("EVIDENCE_DEDUPE_THRESHOLD", "0.7"))
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 5
+_MERSENNE_PRIME = (1 << 61) - 1
+# 고정 시드 순열 계수 (프로세스마다 같은 서명이 나오도록 hash() 대신 사용)
+_PERMUTATIONS = [((i * 0x9E3779B1 + 1) % _MERSENNE_PRIME, (i * 0x85EBCA77 + 7) % _MERSENNE_PRIME) for i in range(1, NUM_PERMUTATIONS + 1)]
+
+_WORD = re.compile(r"[a-z0-9]+|[가-힣]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 근사치 (영문/숫자 약 4자당 1토큰, 한글 등 그 외 문자는 약 1.5자당 1토큰)"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+def tokenize(text: str) -> List[str]:
+    """소문자 단어 토큰. 한글 단어는 조사 변화에 덜 민감하도록 음절 bigram도 추가합니다."""
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and "가" <= word[0] <= "힣":
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def minhash(text: str) -> List[int]:
+    """공백을 정규화한 문자 shingle 집합의 MinHash 서명"""
+    normalized = " ".join(text.lower().split())
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def dedupe(passages: Sequence[str], threshold: float = DEDUPE_THRESHOLD) -> List[str]:
+    """앞선(검색 순위가 높은) 문단과 거의 같은 문단을 제거합니다."""
+    kept: List[str] = []
+    signatures: List[List[int]] = []
+    for passage in passages:
+        signature = minhash(passage)
+        duplicate = any(
+            sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERMUTATIONS >= threshold
+            for other in signatures
+        )
+        if not duplicate:
+            kept.append(passage)
+            signatures.append(signature)
+    return kept
+
+
+def bm25_rank(passages: Sequence[str], query: str, k1: float = 1.5, b: float = 0.75) -> List[str]:
+    """BM25 점수 내림차순 정렬 (동점이면 원래 순서 유지)"""
+    docs = [tokenize(passage) for passage in passages]
+    query_terms = set(tokenize(query))
+    if not docs or not query_terms:
+        return list(passages)
+    avg_len = sum(len(doc) for doc in docs) / len(docs) or 1
+    doc_freq = {term: sum(1 for doc in docs if term in doc) for term in query_terms}
+
+    scores = []
+    for index, doc in enumerate(docs):
+        counts: Dict[str, int] = {}
+        for token in doc:
+            if token in query_terms:
+                counts[token] = counts.get(token, 0) + 1
+        score = 0.0
+        for term, tf in counts.items():
+            idf = math.log(1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_len))
+        scores.append((-score, index))
+    return [passages[index] for _, index in sorted(scores)]
+
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + "…"
+
+
+def pack_evidence(evidence: Optional[Sequence[str]], symptoms: Optional[Sequence[str]], node: str,
+                  query: str = "", separator: str = "\n\n") -> str:
+    """
+    노드 프롬프트에 넣을 근거 문자열을 만듭니다.
+
+    Args:
+        evidence: medical_evidence 목록
+        symptoms: 현재 증상 목록 (재정렬 기준)
+        node: 토큰 예산을 결정하는 노드 이름
+        query: 재정렬에 함께 사용할 검색어 (선택)
+
+    Returns:
+        예산 안에 들어가는 상위 문단들을 separator로 이어 붙인 문자열 (근거가 없으면 빈 문자열)
+    """
+    passages = [passage for passage in (evidence or []) if passage and passage.strip()]
+    if not passages:
+        return ""
+    budget = TOKEN_BUDGET.get(node)
+    raw_tokens = sum(estimate_tokens(passage) for passage in passages)
+
+    ranked = bm25_rank(dedupe(passages), " ".join(symptoms or []) + " " + query)
+    packed: List[str] = []
+    used = 0
+    for passage in ranked:
+        cost = estimate_tokens(passage)
+        if budget is not None and used + cost > budget:
+            remaining = budget - used
+            # 첫 문단이 예산보다 크면 잘라서라도 넣고, 이후 문단은 남은 예산이 충분할 때만 잘라 넣음
+            if not packed or remaining >= 100:
+                packed.append(_truncate_to_tokens(passage, remaining))
+            break
+        packed.append(passage)
+        used += cost
+
+    result = separator.join(packed)
+    evidence_tokens.inc(node, "raw", amount=raw_tokens)
+    evidence_tokens.inc(node, "packed", amount=estimate_tokens(result))
+    return result
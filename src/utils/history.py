@@ -0,0 +1,88 @@
+"""
+대화 기록 관리
+AgentState.messages의 reducer로 사용되어 최근 메시지 창(window)만 원본으로 유지하고,
+창 밖으로 밀려난 환자 발화는 짧은 요약 메시지(SystemMessage)로 접어 둡니다.
+체크포인트와 프롬프트 크기가 대화 길이와 무관하게 일정하게 유지됩니다.
+"""
+from typing import Any, List, Optional
+import os
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+# 원본 그대로 유지할 최근 메시지 수 (요약 메시지 제외)
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "10"))
+# 요약 메시지의 최대 길이 (초과분은 오래된 내용부터 버림)
+HISTORY_SUMMARY_CHARS = int(os.getenv("HISTORY_SUMMARY_CHARS", "1500"))
+# 대화 내역(transcript)에서 메시지 하나가 차지할 수 있는 최대 길이
+HISTORY_LINE_CHARS = int(os.getenv("HISTORY_LINE_CHARS", "1000"))
+
+SUMMARY_MESSAGE_ID = "history-summary"
+SUMMARY_HEADER = "이전 대화 요약:"
+# 요약에 접어 넣을 때 환자 발화 하나당 최대 길이
+SUMMARY_LINE_CHARS = 200
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _is_summary(message: Any) -> bool:
+    return isinstance(message, SystemMessage) and getattr(message, "id", None) == SUMMARY_MESSAGE_ID
+
+
+def _fold(summary: Optional[BaseMessage], dropped: List[BaseMessage]) -> Optional[BaseMessage]:
+    """
+    창 밖으로 밀려난 메시지를 요약에 덧붙입니다.
+    환자 발화만 남기고(AI 응답은 질문/리포트라 다시 생성 가능), 길이 제한을 넘으면 앞부분을 버립니다.
+    """
+    lines = []
+    if summary is not None:
+        lines = summary.content[len(SUMMARY_HEADER):].strip().splitlines()
+    for message in dropped:
+        if getattr(message, "type", None) == "human" and message.content:
+            lines.append(f"- 환자: {_clip(str(message.content), SUMMARY_LINE_CHARS)}")
+    if not lines:
+        return summary
+
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > HISTORY_SUMMARY_CHARS:
+        lines.pop(0)
+    return SystemMessage(content=SUMMARY_HEADER + "\n" + "\n".join(lines), id=SUMMARY_MESSAGE_ID)
+
+
+def merge_messages(left: Optional[List[BaseMessage]], right: Any) -> List[BaseMessage]:
+    """
+    AgentState.messages용 reducer.
+    새 메시지를 이어 붙인 뒤 최근 HISTORY_WINDOW개만 남기고, 나머지는 요약 메시지로 접습니다.
+    요약 메시지는 항상 목록의 맨 앞에 위치합니다.
+    """
+    left = list(left or [])
+    if right is None:
+        right = []
+    elif not isinstance(right, list):
+        right = [right]
+
+    summary = left.pop(0) if left and _is_summary(left[0]) else None
+    merged = left + right
+    if HISTORY_WINDOW > 0 and len(merged) > HISTORY_WINDOW:
+        summary = _fold(summary, merged[:-HISTORY_WINDOW])
+        merged = merged[-HISTORY_WINDOW:]
+    return ([summary] if summary is not None else []) + merged
+
+
+def format_transcript(messages: Optional[List[BaseMessage]]) -> str:
+    """
+    "환자: ... / AI: ..." 형식의 대화 내역 문자열을 만듭니다.
+    요약 메시지가 있으면 맨 앞에 포함하고, 긴 메시지는 HISTORY_LINE_CHARS로 자릅니다.
+    """
+    lines = []
+    for message in messages or []:
+        if not message or not hasattr(message, "type"):
+            continue
+        content = getattr(message, "content", "") or ""
+        if _is_summary(message):
+            lines.append(content)
+        elif message.type == "human":
+            lines.append(f"환자: {_clip(str(content), HISTORY_LINE_CHARS)}")
+        elif message.type == "ai":
+            lines.append(f"AI: {_clip(str(content), HISTORY_LINE_CHARS)}")
+    return "\n".join(lines)
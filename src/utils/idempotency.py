@@ -0,0 +1,98 @@
+"""
+멱등 키(Idempotency Key) 기반 재시도 처리
+같은 키로 재시도된 요청은 저장된 응답을 돌려주거나, 아직 실행 중인 작업에 합류합니다.
+"""
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import hashlib
+import os
+
+from src.utils.cache import LRUCache
+
+
+class IdempotencyConflict(Exception):
+    """같은 멱등 키로 다른 내용의 요청이 들어왔을 때 발생합니다."""
+    pass
+
+
+class IdempotencyStore:
+    """
+    완료된 응답은 TTL이 있는 LRU 캐시에, 실행 중인 작업은 Task로 보관합니다.
+    실행 중인 작업은 shield로 보호되어 첫 요청의 연결이 끊겨도 계속 실행되므로,
+    재시도 요청이 같은 실행 결과를 받을 수 있습니다.
+    """
+    def __init__(self, max_size: int = 1000, ttl_seconds: int = 600):
+        """
+        Args:
+            max_size: 보관할 완료 응답 최대 개수
+            ttl_seconds: 완료 응답 보관 시간 (초)
+        """
+        self.completed = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.inflight: Dict[str, Tuple[str, asyncio.Task]] = {}
+        self.replayed = 0
+        self.joined = 0
+
+    @staticmethod
+    def fingerprint(payload: str) -> str:
+        """요청 내용 비교용 해시"""
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def run(self, key: str, payload: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        key로 식별되는 작업을 최대 한 번만 실행합니다.
+
+        Args:
+            key: 멱등 키 (thread_id와 클라이언트 요청 ID 조합)
+            payload: 요청 내용 (같은 키에 다른 내용이 오면 충돌로 처리)
+            factory: 실제 작업을 만드는 함수
+
+        Returns:
+            (결과, 재사용 여부) 튜플
+
+        Raises:
+            IdempotencyConflict: 같은 키에 다른 payload가 들어온 경우
+        """
+        fingerprint = self.fingerprint(payload)
+
+        cached = self.completed.get(key)
+        if cached is not None:
+            stored_fingerprint, result = cached
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyConflict(key)
+            self.replayed += 1
+            return result, True
+
+        entry = self.inflight.get(key)
+        if entry is not None:
+            stored_fingerprint, task = entry
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyConflict(key)
+            self.joined += 1
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(factory())
+        self.inflight[key] = (fingerprint, task)
+        task.add_done_callback(lambda t: self._on_done(key, fingerprint, t))
+        return await asyncio.shield(task), False
+
+    def _on_done(self, key: str, fingerprint: str, task: asyncio.Task) -> None:
+        """성공한 결과만 저장합니다. 실패한 요청은 재시도 시 다시 실행됩니다."""
+        self.inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.completed.set(key, (fingerprint, task.result()))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "completed": self.completed.size(),
+            "inflight": len(self.inflight),
+            "replayed": self.replayed,
+            "joined": self.joined,
+        }
+
+
+# 전역 멱등 저장소 인스턴스
+idempotency_store = IdempotencyStore(
+    max_size=int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000")),
+    ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600")),
+)
@@ -1,37 +1,176 @@
+"""
+LLM 클라이언트 레지스트리
+langchain_openai/httpx는 import 비용이 크므로 첫 클라이언트 생성 시에만 불러옵니다.
+"""
+import asyncio
+import functools
+import json
 import os
+from typing import Optional
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+from src.utils.metrics import llm_metrics_handler
 
 # .env 파일에서 환경 변수를 로드합니다.
 load_dotenv()
 
-def get_llm(model_name: str = "gpt-4o"):
+# 공유 HTTP 커넥션 풀 설정 (모든 LLM 클라이언트가 같은 keep-alive 풀을 사용)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+
+@functools.lru_cache(maxsize=1)
+def get_http_clients():
+    """
+    프로세스 전역에서 공유하는 (동기, 비동기) httpx 클라이언트를 반환합니다.
+    클라이언트마다 커넥션 풀을 새로 만들면 매 호출마다 TCP/TLS 연결을 다시 맺게 됩니다.
+    """
+    import httpx
+    from src.utils.rate_limit import RATE_LIMIT_ENABLED, rate_limited_transport
+    from src.utils.replay import recording_cassette, recording_transport
+    limits = httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    transport = httpx.AsyncHTTPTransport(limits=limits)
+    cassette = recording_cassette()
+    if cassette is not None:
+        # 녹화 모드: 비동기 클라이언트(그래프 실행 경로)의 교환을 카세트에 기록
+        transport = recording_transport(transport, cassette)
+    if RATE_LIMIT_ENABLED:
+        # 비동기 클라이언트(그래프 실행 경로)의 Chat Completions 호출을 모델별 송신 제한기에 통과시킴
+        transport = rate_limited_transport(transport)
+    return httpx.Client(limits=limits), httpx.AsyncClient(transport=transport)
+
+
+# 노드별 모델 정책
+# - model: 기본 모델, fallback: 기본 모델이 timeout(초)을 넘기거나 오류를 내면 사용할 모델
+# - 분류/판정/추출처럼 짧은 출력만 필요한 노드는 작은 모델로, 진단 리포트는 gpt-4o 고정(폴백 없음)
+DEFAULT_MODEL_POLICY = {
+    "default": {"model": "gpt-4o", "fallback": "gpt-4o-mini", "timeout": 20},
+    "specialist_router": {"model": "gpt-4o-mini", "fallback": "gpt-4o", "timeout": 8},
+    "research_critic": {"model": "gpt-4o-mini", "fallback": "gpt-4o", "timeout": 8},
+    "medication_search": {"model": "gpt-4o-mini", "fallback": "gpt-4o", "timeout": 8},
+    "diagnosis_generator": {"model": "gpt-4o", "fallback": None, "timeout": None},
+}
+
+
+def load_model_policy() -> dict:
+    """
+    기본 정책에 LLM_MODEL_POLICY_FILE(JSON 파일)과 LLM_MODEL_POLICY(JSON 문자열)를 순서대로 덮어씁니다.
+    노드 항목은 키 단위로 병합됩니다. (예: {"research_critic": {"model": "gpt-4o"}})
+    """
+    policy = {node: dict(entry) for node, entry in DEFAULT_MODEL_POLICY.items()}
+    overrides = []
+    path = os.getenv("LLM_MODEL_POLICY_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            overrides.append(json.load(f))
+    if os.getenv("LLM_MODEL_POLICY"):
+        overrides.append(json.loads(os.getenv("LLM_MODEL_POLICY")))
+    for override in overrides:
+        for node, entry in override.items():
+            base = policy.get(node, policy["default"])
+            policy[node] = {**base, **entry}
+    return policy
+
+
+@functools.lru_cache(maxsize=1)
+def get_model_policy() -> dict:
+    return load_model_policy()
+
+
+@functools.lru_cache(maxsize=None)
+def get_node_llm(node: str):
+    """
+    노드 정책에 따른 LLM을 반환합니다.
+    fallback이 있으면 기본 모델에 timeout을 걸고, 시간 초과/오류 시 fallback 모델로 다시 호출합니다.
+    """
+    policy = get_model_policy()
+    entry = policy.get(node, policy["default"])
+    fallback = entry.get("fallback")
+    # 재시도는 resilience.resilient_call이 예산 안에서 수행하므로 SDK 자체 재시도는 끕니다.
+    if not fallback or fallback == entry["model"]:
+        return get_llm(entry["model"], max_retries=0)
+    primary = get_llm(entry["model"], timeout=entry.get("timeout"), max_retries=0)
+    return primary.with_fallbacks([get_llm(fallback, max_retries=0)])
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm(model_name: str = "gpt-4o", temperature: float = 0, timeout: Optional[float] = None, max_retries: Optional[int] = None):
     """
     설정된 ChatOpenAI 인스턴스를 반환하는 유틸리티 함수입니다.
-    
+    (model_name, temperature, timeout, max_retries)별로 한 번만 생성되어 프로세스 전역에서 재사용되며,
+    모든 인스턴스가 공유 커넥션 풀(get_http_clients)을 사용합니다.
+
     Args:
         model_name (str): 사용할 모델 이름 (기본값: "gpt-4o").
                           의료적 추론 능력을 위해 gpt-4o 사용을 권장합니다.
-    
+        temperature (float): 샘플링 온도 (기본값: 0, 의료 분석의 일관성을 위해 Deterministic)
+        timeout (float): 요청 타임아웃 (초, 생략 시 클라이언트 기본값)
+        max_retries (int): 재시도 횟수 (생략 시 클라이언트 기본값)
+
     Returns:
         ChatOpenAI: 설정된 LangChain ChatModel 객체.
-        
+
     Raises:
         ValueError: OPENAI_API_KEY가 환경 변수에 설정되지 않은 경우 발생.
     """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError(".env 파일에서 OPENAI_API_KEY를 찾을 수 없습니다.")
-        
+
+    from langchain_openai import ChatOpenAI
+    from src.utils.llm_cache import llm_response_cache
+    http_client, http_async_client = get_http_clients()
+    options = {}
+    if timeout is not None:
+        options["timeout"] = timeout
+    if max_retries is not None:
+        options["max_retries"] = max_retries
     return ChatOpenAI(
         model=model_name,
-        temperature=0, # 의료 분석의 일관성을 위해 무작위성을 0으로 설정 (Deterministic)
-        api_key=api_key
+        temperature=temperature,
+        api_key=api_key,
+        **options,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=llm_response_cache if llm_response_cache is not None else False, # 노드별 정책에 따른 응답 캐시
+        callbacks=[llm_metrics_handler] # 노드별 LLM 호출 수/토큰 사용량 메트릭
     )
 
-# 기본 LLM 인스턴스 (싱글톤처럼 사용)
-try:
-    llm = get_llm()
-except Exception as e:
-    print(f"LLM 초기화 경고: {e}")
-    llm = None
+
+async def warm_up(nodes=None, timeout: float = 5.0) -> bool:
+    """
+    노드가 실제로 사용할 클라이언트(get_node_llm)를 미리 생성하고 공유 커넥션 풀에 연결을 하나 열어 둡니다 (서버 시작 시 호출).
+    첫 사용자 요청이 TCP/TLS 연결 수립 비용을 치르지 않도록 합니다.
+    정책에 없는 노드는 "default" 항목과 같은 인스턴스를 쓰므로 정책의 노드만 예열하면 충분합니다.
+
+    Returns:
+        연결 예열 성공 여부 (실패해도 서비스에는 영향 없음)
+    """
+    if nodes is None:
+        nodes = sorted(get_model_policy())
+    try:
+        clients = [get_node_llm(node) for node in nodes]
+        # fallback이 있는 노드는 RunnableWithFallbacks이므로 기본 모델 클라이언트를 꺼냅니다.
+        primary = getattr(clients[0], "runnable", clients[0])
+        root_client = getattr(primary, "root_async_client", None)
+        if root_client is not None:
+            await asyncio.wait_for(root_client.models.list(), timeout)
+        return True
+    except Exception as e:
+        print(f"LLM 예열 경고: {e}")
+        return False
+
+
+def __getattr__(name):
+    """기본 LLM 인스턴스(llm)는 처음 참조될 때 생성합니다."""
+    if name == "llm":
+        try:
+            return get_llm()
+        except Exception as e:
+            print(f"LLM 초기화 경고: {e}")
+            return None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
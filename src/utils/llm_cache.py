@@ -0,0 +1,218 @@
+"""
+LLM 응답 캐시
+모든 노드가 temperature=0으로 호출하므로, 같은 모델에 같은 프롬프트가 들어오면 같은 응답을 재사용할 수 있습니다.
+- 키: llm_string(모델명/온도 등 호출 파라미터) + 렌더링된 전체 프롬프트의 해시
+- 노드별 정책: current_node 기준으로 캐시 사용 여부와 TTL을 결정 (LLM_CACHE_POLICY)
+- 저장소: 프로세스 메모리(LRU) + 선택적 SQLite 디스크 계층 (LLM_CACHE_DB_PATH)
+"""
+from typing import Any, Dict, Optional, Sequence
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.utils.cache import LRUCache
+from src.utils.metrics import CACHED_GENERATION_KEY, current_node, llm_cache_lookups
+
+# 노드별 캐시 TTL (초). 목록에 없거나 0 이하인 노드는 캐시를 사용하지 않습니다.
+# 대화 내역이 프롬프트에 들어가는 노드(증상 분석/질문/진단)는 반복될 일이 거의 없어 기본값에서 제외합니다.
+DEFAULT_POLICY = {
+    "specialist_router": 3600,
+    "research_critic": 900,
+    "medication_search": 3600,
+}
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    node TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _for_cache(generation: Generation) -> Generation:
+    """
+    캐시에 저장할 사본을 만듭니다.
+    캐시 적중도 on_llm_end 콜백을 거치므로, 토큰 사용량(usage_metadata)을 제거하고
+    generation_info에 표시를 남겨 LLM 호출 수/토큰 메트릭에 다시 집계되지 않게 합니다.
+    """
+    info = {**(generation.generation_info or {}), CACHED_GENERATION_KEY: True}
+    if isinstance(generation, ChatGeneration):
+        message = generation.message
+        if getattr(message, "usage_metadata", None):
+            message = message.model_copy(update={"usage_metadata": None})
+        return ChatGeneration(message=message, generation_info=info)
+    return Generation(text=generation.text, generation_info=info)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain BaseCache 구현. get_llm()이 만드는 모든 클라이언트에 연결됩니다.
+    노드 정책에서 제외된 호출은 조회/저장 없이 그대로 통과합니다.
+    """
+    def __init__(self, policy: Optional[Dict[str, float]] = None, max_size: int = 1000, db_path: Optional[str] = None):
+        """
+        Args:
+            policy: 노드 이름 -> TTL(초)
+            max_size: 메모리 계층 최대 항목 수
+            db_path: 디스크 계층 SQLite 파일 경로 (None이면 메모리만 사용)
+        """
+        self.policy = dict(DEFAULT_POLICY if policy is None else policy)
+        # 항목별 만료 시각을 직접 확인하므로 LRU 자체의 TTL은 가장 긴 정책 값으로 둡니다.
+        self.memory = LRUCache(max_size=max_size, ttl_seconds=int(max(self.policy.values(), default=0)) + 1)
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_DISK_SCHEMA)
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode()).hexdigest()
+
+    def _ttl(self, node: str) -> float:
+        return float(self.policy.get(node, 0) or 0)
+
+    def _lookup_memory(self, key: str) -> Optional[Sequence[Generation]]:
+        entry = self.memory.get(key)
+        if entry is None:
+            return None
+        expires_at, generations = entry
+        if time.time() >= expires_at:
+            return None
+        return generations
+
+    def _lookup_disk(self, key: str) -> Optional[Sequence[Generation]]:
+        with self._db_lock:
+            row = self._db.execute("SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() >= row[0]:
+            return None
+        generations = [loads(item) for item in json.loads(row[1])]
+        # 디스크 적중 항목은 메모리 계층으로 올립니다.
+        self.memory.set(key, (row[0], generations))
+        return generations
+
+    def _update_disk(self, key: str, node: str, expires_at: float, generations: Sequence[Generation]) -> None:
+        value = json.dumps([dumps(generation) for generation in generations])
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, node, expires_at, value) VALUES (?, ?, ?, ?)",
+                (key, node, expires_at, value),
+            )
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        node = current_node.get()
+        if self._ttl(node) <= 0:
+            return None
+        key = self.make_key(prompt, llm_string)
+        generations = self._lookup_memory(key)
+        if generations is not None:
+            llm_cache_lookups.inc(node, "hit_memory")
+            return generations
+        if self._db is not None:
+            generations = self._lookup_disk(key)
+            if generations is not None:
+                llm_cache_lookups.inc(node, "hit_disk")
+                return generations
+        llm_cache_lookups.inc(node, "miss")
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        node = current_node.get()
+        ttl = self._ttl(node)
+        if ttl <= 0:
+            return
+        key = self.make_key(prompt, llm_string)
+        generations = [_for_cache(generation) for generation in return_val]
+        expires_at = time.time() + ttl
+        self.memory.set(key, (expires_at, generations))
+        if self._db is not None:
+            self._update_disk(key, node, expires_at, generations)
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        # 메모리 계층은 즉시 조회하고, 디스크 계층만 스레드에서 조회합니다.
+        # (같은 Task에서 실행되어야 current_node가 유지됩니다.)
+        node = current_node.get()
+        if self._ttl(node) <= 0:
+            return None
+        key = self.make_key(prompt, llm_string)
+        generations = self._lookup_memory(key)
+        if generations is not None:
+            llm_cache_lookups.inc(node, "hit_memory")
+            return generations
+        if self._db is not None:
+            generations = await asyncio.to_thread(self._lookup_disk, key)
+            if generations is not None:
+                llm_cache_lookups.inc(node, "hit_disk")
+                return generations
+        llm_cache_lookups.inc(node, "miss")
+        return None
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        node = current_node.get()
+        ttl = self._ttl(node)
+        if ttl <= 0:
+            return
+        key = self.make_key(prompt, llm_string)
+        generations = [_for_cache(generation) for generation in return_val]
+        expires_at = time.time() + ttl
+        self.memory.set(key, (expires_at, generations))
+        if self._db is not None:
+            await asyncio.to_thread(self._update_disk, key, node, expires_at, generations)
+
+    def clear(self, **kwargs: Any) -> None:
+        self.memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """노드별 적중/실패 횟수와 메모리 계층 상태"""
+        by_node: Dict[str, Dict[str, int]] = {}
+        for (node, result), count in list(llm_cache_lookups.values.items()):
+            by_node.setdefault(node, {})[result] = int(count)
+        return {
+            "policy": self.policy,
+            "disk": self.db_path,
+            "memory": self.memory.stats(),
+            "nodes": by_node,
+        }
+
+
+def create_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    환경 변수로 LLM 응답 캐시를 생성합니다.
+    - LLM_CACHE=0이면 캐시를 사용하지 않음
+    - LLM_CACHE_POLICY: 노드별 TTL JSON (예: {"specialist_router": 3600, "research_critic": 0})
+    - LLM_CACHE_MAX_ENTRIES: 메모리 계층 크기
+    - LLM_CACHE_DB_PATH: 지정하면 SQLite 디스크 계층 사용
+    """
+    if os.getenv("LLM_CACHE", "1") != "1":
+        return None
+    policy = dict(DEFAULT_POLICY)
+    override = os.getenv("LLM_CACHE_POLICY")
+    if override:
+        policy.update(json.loads(override))
+    return LLMResponseCache(
+        policy=policy,
+        max_size=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000")),
+        db_path=os.getenv("LLM_CACHE_DB_PATH") or None,
+    )
+
+
+# 전역 LLM 응답 캐시 인스턴스
+llm_response_cache = create_llm_cache()
@@ -0,0 +1,362 @@
+"""
+로컬 의학 근거 인덱스 (1차 검색)
+큐레이션한 가이드라인 문단(data/medical_corpus/*.jsonl)에 대한 디스크 BM25 인덱스입니다.
+흔한 증상은 이 인덱스에서 바로 근거를 찾고, 점수/증상 커버리지가 낮을 때만 Tavily로 넘어갑니다.
+- 토큰화는 evidence.tokenize와 같습니다. (한글 단어 + 음절 bigram)
+- 포스팅/문서 파일은 mmap으로 읽으므로 여러 uvicorn 워커가 같은 페이지 캐시를 공유합니다.
+- 빌드는 세대(generation) 디렉터리에 새로 쓰고 CURRENT 포인터를 원자적으로 교체합니다.
+  읽는 쪽은 CURRENT가 바뀌면 다음 조회 때 새 세대를 엽니다. (이전 세대의 mmap은 그대로 유효)
+- 증분 빌드: 말뭉치 파일별 해시와 문서별 단어 빈도를 manifest.json에 저장하여 바뀐 파일만 다시 토큰화합니다.
+
+빌드/갱신: python -m src.utils.local_index build
+조회 확인: python -m src.utils.local_index search "두통 어지럼증"
+"""
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+import threading
+
+from src.utils.evidence import tokenize, _WORD
+from src.utils.metrics import local_index_lookups
+
+LOCAL_CORPUS_DIR = os.getenv("LOCAL_CORPUS_DIR", "data/medical_corpus")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/medical_index")
+LOCAL_INDEX_TOP_K = int(os.getenv("LOCAL_INDEX_TOP_K", "3"))
+# 최상위 문단의 정규화 BM25 점수(0~1)가 이 값보다 낮으면 Tavily로 폴백
+LOCAL_INDEX_MIN_SCORE = float(os.getenv("LOCAL_INDEX_MIN_SCORE", "0.3"))
+# 상위 문단들이 다루는 증상 비율이 이 값보다 낮으면 Tavily로 폴백
+LOCAL_INDEX_MIN_COVERAGE = float(os.getenv("LOCAL_INDEX_MIN_COVERAGE", "1.0"))
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 보관할 이전 세대 수 (교체 직후에도 이전 세대를 열고 있는 워커가 있을 수 있음)
+KEEP_GENERATIONS = 2
+
+
+class LocalHit(NamedTuple):
+    score: float  # 정규화 BM25 점수 (0~1)
+    url: str
+    title: str
+    content: str
+
+
+def _corpus_documents(path: str) -> List[Dict[str, Any]]:
+    documents = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not record.get("content"):
+                raise ValueError(f"{path}:{line_number}: content가 비어 있습니다.")
+            terms = Counter(tokenize(f"{record.get('title', '')} {record['content']}"))
+            documents.append({
+                "url": record.get("url", ""),
+                "title": record.get("title", ""),
+                "content": record["content"],
+                "length": sum(terms.values()),
+                "terms": dict(terms),
+            })
+    return documents
+
+
+def _write_generation(directory: str, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    한 세대의 인덱스 파일을 씁니다.
+    - docs.bin: 문서 JSON을 이어 붙인 UTF-8 바이트
+    - docs.idx: 문서별 (시작, 끝, 토큰 길이) uint32
+    - postings.bin: 용어별로 연속된 (문서 번호, 빈도) uint32 쌍
+    - lexicon.json: 용어 -> [포스팅 시작 위치(쌍 단위), 문서 빈도]
+    """
+    os.makedirs(directory)
+    postings: Dict[str, List[int]] = {}
+    doc_index = array("I")
+    with open(os.path.join(directory, "docs.bin"), "wb") as f:
+        for doc_id, document in enumerate(documents):
+            payload = json.dumps({key: document[key] for key in ("url", "title", "content")}, ensure_ascii=False).encode()
+            start = f.tell()
+            f.write(payload)
+            doc_index.extend((start, start + len(payload), document["length"]))
+            for term, count in document["terms"].items():
+                postings.setdefault(term, []).extend((doc_id, count))
+    with open(os.path.join(directory, "docs.idx"), "wb") as f:
+        doc_index.tofile(f)
+
+    lexicon: Dict[str, List[int]] = {}
+    flat = array("I")
+    for term in sorted(postings):
+        lexicon[term] = [len(flat) // 2, len(postings[term]) // 2]
+        flat.extend(postings[term])
+    with open(os.path.join(directory, "postings.bin"), "wb") as f:
+        flat.tofile(f)
+    with open(os.path.join(directory, "lexicon.json"), "w", encoding="utf-8") as f:
+        json.dump(lexicon, f, ensure_ascii=False)
+
+    total_length = sum(document["length"] for document in documents)
+    meta = {
+        "version": INDEX_VERSION,
+        "byteorder": sys.byteorder,
+        "num_docs": len(documents),
+        "num_terms": len(lexicon),
+        "avg_length": total_length / len(documents) if documents else 0.0,
+    }
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _current_generation(index_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def build(corpus_dir: str = LOCAL_CORPUS_DIR, index_dir: str = LOCAL_INDEX_DIR, force: bool = False) -> Dict[str, Any]:
+    """
+    말뭉치를 인덱싱합니다. 바뀐 파일만 다시 토큰화하고, 바뀐 것이 없으면 새 세대를 만들지 않습니다.
+
+    Returns:
+        빌드 결과 요약 (세대, 문서/용어 수, 재사용/재처리/삭제된 파일)
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    manifest_path = os.path.join(index_dir, "manifest.json")
+    manifest: Dict[str, Any] = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    # force이거나 버전이 다르면 파일별 토큰만 재사용하지 않음 (세대 번호는 이어서 사용)
+    previous = manifest.get("files", {}) if not force and manifest.get("version") == INDEX_VERSION else {}
+
+    files: Dict[str, Any] = {}
+    reused, rebuilt = [], []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        path = os.path.join(corpus_dir, name)
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        if name in previous and previous[name]["sha1"] == digest:
+            files[name] = previous[name]
+            reused.append(name)
+        else:
+            files[name] = {"sha1": digest, "documents": _corpus_documents(path)}
+            rebuilt.append(name)
+    removed = sorted(set(previous) - set(files))
+
+    current = _current_generation(index_dir)
+    summary = {"generation": current, "reused": reused, "rebuilt": rebuilt, "removed": removed}
+    if not force and current and not rebuilt and not removed and os.path.isdir(os.path.join(index_dir, current)):
+        summary["changed"] = False
+        return summary
+
+    number = _next_generation(index_dir, manifest)
+    generation = f"gen-{number:06d}"
+    documents = [document for name in sorted(files) for document in files[name]["documents"]]
+    meta = _write_generation(os.path.join(index_dir, generation), documents)
+
+    # manifest를 먼저 쓰고 CURRENT를 교체 (중간에 실패해도 CURRENT는 온전한 세대를 가리킴)
+    _atomic_write(manifest_path, json.dumps({"version": INDEX_VERSION, "generation": number, "files": files}, ensure_ascii=False))
+    _atomic_write(os.path.join(index_dir, "CURRENT"), generation)
+
+    generations = sorted(name for name in os.listdir(index_dir) if name.startswith("gen-"))
+    for stale in generations[:-KEEP_GENERATIONS]:
+        shutil.rmtree(os.path.join(index_dir, stale), ignore_errors=True)
+
+    summary.update({"generation": generation, "changed": True, "num_docs": meta["num_docs"], "num_terms": meta["num_terms"]})
+    return summary
+
+
+def _next_generation(index_dir: str, manifest: Dict[str, Any]) -> int:
+    """manifest와 남아 있는 gen-* 디렉터리 중 가장 큰 번호의 다음 번호"""
+    numbers = [manifest.get("generation", 0)]
+    for name in os.listdir(index_dir):
+        if name.startswith("gen-") and name[4:].isdigit():
+            numbers.append(int(name[4:]))
+    return max(numbers) + 1
+
+
+def _atomic_write(path: str, content: str) -> None:
+    temporary = f"{path}.tmp-{os.getpid()}"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def _map(path: str) -> Optional[mmap.mmap]:
+    # 빈 파일은 mmap할 수 없음 (문서가 하나도 없는 세대)
+    if os.path.getsize(path) == 0:
+        return None
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class LocalIndex:
+    """한 세대의 인덱스를 mmap으로 열어 BM25로 조회합니다."""
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_VERSION or self.meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"{directory}: 호환되지 않는 인덱스입니다. 다시 빌드하세요.")
+        with open(os.path.join(directory, "lexicon.json"), encoding="utf-8") as f:
+            self.lexicon: Dict[str, List[int]] = json.load(f)
+        self.directory = directory
+        self.num_docs = self.meta["num_docs"]
+        self.avg_length = self.meta["avg_length"] or 1.0
+        self._docs = _map(os.path.join(directory, "docs.bin"))
+        self._doc_index_map = _map(os.path.join(directory, "docs.idx"))
+        self._postings_map = _map(os.path.join(directory, "postings.bin"))
+        self.doc_index = memoryview(self._doc_index_map).cast("I") if self._doc_index_map else memoryview(array("I"))
+        self.postings = memoryview(self._postings_map).cast("I") if self._postings_map else memoryview(array("I"))
+
+    def _idf(self, doc_freq: int) -> float:
+        return math.log(1 + (self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def document(self, doc_id: int) -> Dict[str, str]:
+        start, end = self.doc_index[doc_id * 3], self.doc_index[doc_id * 3 + 1]
+        return json.loads(self._docs[start:end].decode())
+
+    def search(self, query: str, top_k: int = LOCAL_INDEX_TOP_K) -> List[LocalHit]:
+        """
+        BM25 상위 문단. 점수는 질의 용어가 모두 높은 빈도로 나오는 경우의 상한으로 나눈 0~1 값이라
+        말뭉치에 없는 용어가 많을수록 낮아집니다.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.num_docs:
+            return []
+        scores: Dict[int, float] = {}
+        upper_bound = 0.0
+        for term in query_terms:
+            offset, doc_freq = self.lexicon.get(term, (0, 0))
+            idf = self._idf(doc_freq)
+            upper_bound += idf * (BM25_K1 + 1)
+            for position in range(offset, offset + doc_freq):
+                doc_id, count = self.postings[position * 2], self.postings[position * 2 + 1]
+                length = self.doc_index[doc_id * 3 + 2]
+                norm = count + BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * count * (BM25_K1 + 1) / norm
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+        hits = []
+        for doc_id, score in ranked:
+            document = self.document(doc_id)
+            hits.append(LocalHit(score / upper_bound, document["url"], document["title"], document["content"]))
+        return hits
+
+
+_lock = threading.Lock()
+_loaded: Dict[str, Any] = {"directory": None, "index": None}
+
+
+def get_local_index(index_dir: Optional[str] = None) -> Optional[LocalIndex]:
+    """현재 세대의 인덱스 (빌드되지 않았으면 None). CURRENT가 바뀌면 새 세대를 엽니다."""
+    index_dir = index_dir or LOCAL_INDEX_DIR
+    generation = _current_generation(index_dir)
+    if generation is None:
+        return None
+    directory = os.path.join(index_dir, generation)
+    if directory != _loaded["directory"]:
+        with _lock:
+            if directory != _loaded["directory"]:
+                _loaded["index"] = LocalIndex(directory)
+                _loaded["directory"] = directory
+    return _loaded["index"]
+
+
+def coverage(symptoms: Sequence[str], hits: Sequence[LocalHit]) -> float:
+    """
+    문단들이 다루는 증상의 비율. 증상의 모든 단어가 문단 토큰의 접두어로 나와야 다룬 것으로 봅니다.
+    (bigram만으로 세면 "손목 통증"이 "통증"만으로 일치하므로 단어 단위로 확인하고, 조사는 접두어 비교로 허용)
+    """
+    if not symptoms:
+        return 0.0
+    hit_terms = set()
+    for hit in hits:
+        hit_terms.update(tokenize(f"{hit.title} {hit.content}"))
+    covered = 0
+    for symptom in symptoms:
+        words = _WORD.findall(symptom.lower())
+        if words and all(any(term.startswith(word) for term in hit_terms) for word in words):
+            covered += 1
+    return covered / len(symptoms)
+
+
+def lookup(symptoms: Sequence[str]) -> Optional[List[Dict[str, Any]]]:
+    """
+    증상에 대한 로컬 근거. 점수나 증상 커버리지가 기준보다 낮으면 None (Tavily로 폴백)
+
+    Returns:
+        medical_rag 검색 결과와 같은 [{"url", "content"}] 목록 또는 None
+    """
+    try:
+        index = get_local_index()
+    except (OSError, ValueError) as e:
+        print(f"로컬 인덱스를 열 수 없습니다: {e}")
+        index = None
+    if index is None:
+        local_index_lookups.inc("unavailable")
+        return None
+
+    # 최상위 문단 점수의 절반 미만인 문단은 근거로 쓰지 않음
+    hits = [hit for hit in index.search(" ".join(symptoms)) if hit.score >= LOCAL_INDEX_MIN_SCORE / 2]
+    if not hits or hits[0].score < LOCAL_INDEX_MIN_SCORE or coverage(symptoms, hits) < LOCAL_INDEX_MIN_COVERAGE:
+        local_index_lookups.inc("miss")
+        return None
+    local_index_lookups.inc("hit")
+    return [{"url": hit.url, "content": f"{hit.title}: {hit.content}"} for hit in hits]
+
+
+def stats() -> Dict[str, Any]:
+    """현재 세대, 문서/용어 수, 조회 적중률"""
+    hit = local_index_lookups.values.get(("hit",), 0)
+    miss = local_index_lookups.values.get(("miss",), 0)
+    index = _loaded["index"]
+    return {
+        "generation": os.path.basename(index.directory) if index else None,
+        "num_docs": index.num_docs if index else 0,
+        "num_terms": len(index.lexicon) if index else 0,
+        "min_score": LOCAL_INDEX_MIN_SCORE,
+        "min_coverage": LOCAL_INDEX_MIN_COVERAGE,
+        "hits": int(hit),
+        "misses": int(miss),
+        "unavailable": int(local_index_lookups.values.get(("unavailable",), 0)),
+        "hit_rate": round(hit / (hit + miss), 3) if hit + miss else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MediGraph local medical evidence index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="말뭉치를 (증분) 인덱싱")
+    build_parser.add_argument("--corpus", default=LOCAL_CORPUS_DIR, help="JSONL 말뭉치 디렉터리")
+    build_parser.add_argument("--index", default=LOCAL_INDEX_DIR, help="인덱스 디렉터리")
+    build_parser.add_argument("--force", action="store_true", help="모든 파일을 다시 토큰화")
+    search_parser = commands.add_parser("search", help="인덱스 조회 결과 확인")
+    search_parser.add_argument("query", help="증상 (쉼표로 구분)")
+    search_parser.add_argument("--index", default=LOCAL_INDEX_DIR, help="인덱스 디렉터리")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(build(args.corpus, args.index, args.force), ensure_ascii=False, indent=2))
+        return
+    index = get_local_index(args.index)
+    if index is None:
+        sys.exit("인덱스가 없습니다. 먼저 build를 실행하세요.")
+    symptoms = [symptom.strip() for symptom in args.query.split(",") if symptom.strip()]
+    hits = index.search(" ".join(symptoms))
+    print(f"coverage={coverage(symptoms, hits):.2f}")
+    for hit in hits:
+        print(f"{hit.score:.3f}  {hit.title}  {hit.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Prometheus 텍스트 포맷 메트릭
+외부 의존성 없이 Counter/Histogram을 구현하고, /metrics 엔드포인트에서 렌더링합니다.
+노드 실행 시간은 create_graph()에서 노드를 감싸는 방식으로 측정하므로 노드 코드 수정이 필요 없습니다.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import functools
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# 현재 실행 중인 LangGraph 노드 이름 (노드 래퍼가 설정, LLM 콜백/캐시가 참조)
+current_node: ContextVar[str] = ContextVar("current_node", default="unknown")
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """단조 증가 카운터"""
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """누적 버킷 히스토그램"""
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (버킷별 카운트, 합계, 개수)
+        self.values: Dict[Tuple[str, ...], List[Any]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self.values[labels] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, (counts, total, count) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    le_label = 'le="' + le + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    메트릭 모음. 정적 메트릭 외에, 스크레이프 시점에 값을 읽는 collector 함수도 등록할 수 있습니다.
+    collector는 (이름, 타입, 도움말, [(라벨 dict, 값), ...]) 튜플 목록을 반환합니다.
+    """
+    def __init__(self):
+        self.metrics: List[Any] = []
+        self.collectors: List[Callable[[], List[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]] = []
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable) -> None:
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    label_str = _format_labels(tuple(labels.keys()), tuple(labels.values()))
+                    lines.append(f"{name}{label_str} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# 전역 레지스트리 및 기본 메트릭
+registry = MetricsRegistry()
+
+node_latency = registry.histogram("medigraph_node_latency_seconds", "LangGraph node execution time", ["node"])
+node_errors = registry.counter("medigraph_node_errors_total", "LangGraph node executions that raised", ["node"])
+route_total = registry.counter("medigraph_route_total", "Conditional edge decisions", ["edge", "route"])
+research_rounds = registry.histogram("medigraph_research_rounds", "Research critic loop iterations per diagnostic turn", [], buckets=(0, 1, 2, 3, 4, 5))
+llm_calls = registry.counter("medigraph_llm_calls_total", "LLM calls", ["node", "model"])
+llm_errors = registry.counter("medigraph_llm_errors_total", "LLM calls that raised", ["node"])
+llm_prompt_tokens = registry.counter("medigraph_llm_prompt_tokens_total", "LLM prompt tokens", ["node", "model"])
+llm_completion_tokens = registry.counter("medigraph_llm_completion_tokens_total", "LLM completion tokens", ["node", "model"])
+tavily_calls = registry.counter("medigraph_tavily_calls_total", "Tavily search calls", ["status"])
+evidence_tokens = registry.counter("medigraph_evidence_tokens_total", "Estimated evidence tokens before/after packing", ["node", "stage"])
+call_hedges = registry.counter("medigraph_call_hedges_total", "Hedged duplicate calls (launched/won)", ["node", "outcome"])
+call_retries = registry.counter("medigraph_call_retries_total", "Retried external calls", ["node", "reason"])
+retry_budget_exhausted = registry.counter("medigraph_retry_budget_exhausted_total", "Retries/hedges denied by the retry budget", ["node"])
+rate_limit_wait = registry.histogram("medigraph_rate_limit_wait_seconds", "Time spent queued in the outbound rate limiter", ["upstream"])
+rate_limit_events = registry.counter("medigraph_rate_limit_events_total", "Outbound limiter events (throttled/rejected/backoff_429/backoff_latency)", ["upstream", "event"])
+red_flag_matches = registry.counter("medigraph_red_flag_matches_total", "Turns routed to the emergency fast lane by red-flag category", ["category"])
+speculative_searches = registry.counter("medigraph_speculative_searches_total", "Searches started alongside specialist_router (used/discarded/expired)", ["outcome"])
+speculation_saved_seconds = registry.histogram("medigraph_speculation_saved_seconds", "Search time overlapped with specialist_router when the speculative result was used")
+rag_queries = registry.counter("medigraph_rag_queries_total", "medical_rag queries by result source (local/cache/speculation/search)", ["source"])
+local_index_lookups = registry.counter("medigraph_local_index_lookups_total", "Local evidence index lookups (hit/miss/unavailable)", ["result"])
+research_early_stops = registry.counter("medigraph_research_early_stops_total", "Research loops ended before the round limit (no_new_evidence/no_query/repeat_query)", ["reason"])
+llm_cache_lookups = registry.counter("medigraph_llm_cache_lookups_total", "LLM response cache lookups", ["node", "result"])
+
+
+def instrument_node(name: str, fn: Callable) -> Callable:
+    """노드 함수를 감싸 실행 시간/오류를 기록하고 current_node를 설정합니다."""
+    @functools.wraps(fn)
+    async def wrapper(state, config):
+        token = current_node.set(name)
+        start = time.perf_counter()
+        try:
+            return await fn(state, config)
+        except Exception:
+            node_errors.inc(name)
+            raise
+        finally:
+            node_latency.observe(time.perf_counter() - start, name)
+            current_node.reset(token)
+    return wrapper
+
+
+def instrument_route(edge: str, fn: Callable, on_route: Optional[Callable[[Any, str], None]] = None) -> Callable:
+    """조건부 엣지 함수를 감싸 선택된 경로 빈도를 기록합니다."""
+    @functools.wraps(fn)
+    def wrapper(state):
+        route = fn(state)
+        route_total.inc(edge, str(route))
+        if on_route is not None:
+            on_route(state, route)
+        return route
+    return wrapper
+
+
+# 응답 캐시(llm_cache)가 저장하는 generation_info 표시
+CACHED_GENERATION_KEY = "llm_cache_hit"
+
+
+def _from_cache(response) -> bool:
+    generations = [generation for batch in response.generations for generation in batch]
+    return bool(generations) and all((generation.generation_info or {}).get(CACHED_GENERATION_KEY) for generation in generations)
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """LLM 호출 수와 토큰 사용량을 노드별로 집계하는 콜백"""
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        if _from_cache(response):
+            # 응답 캐시 적중은 업스트림 호출이 아님 (적중 수는 llm_cache_lookups에서 집계)
+            return
+        node = current_node.get()
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name") or "unknown"
+        prompt_tokens = completion_tokens = 0
+
+        usage = llm_output.get("token_usage") or {}
+        if usage:
+            prompt_tokens = usage.get("prompt_tokens", 0) or 0
+            completion_tokens = usage.get("completion_tokens", 0) or 0
+        else:
+            # 스트리밍 호출은 메시지의 usage_metadata에 사용량이 담깁니다.
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage_metadata = getattr(message, "usage_metadata", None) or {}
+                    prompt_tokens += usage_metadata.get("input_tokens", 0) or 0
+                    completion_tokens += usage_metadata.get("output_tokens", 0) or 0
+                    if model == "unknown":
+                        model = (getattr(message, "response_metadata", None) or {}).get("model_name", model)
+
+        llm_calls.inc(node, model)
+        if prompt_tokens:
+            llm_prompt_tokens.inc(node, model, amount=prompt_tokens)
+        if completion_tokens:
+            llm_completion_tokens.inc(node, model, amount=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        llm_errors.inc(current_node.get())
+
+
+# 전역 LLM 메트릭 콜백 (get_llm에서 생성하는 모든 클라이언트에 연결)
+llm_metrics_handler = LLMMetricsCallbackHandler()
@@ -0,0 +1,377 @@
+"""
+외부 API(OpenAI/Tavily) 공용 송신 제한기
+- 토큰 버킷: 분당 요청 수(RPM)와 분당 토큰 수(TPM, 프롬프트 토큰 추정치)를 미리 예약하여 한도 안으로 속도를 맞춤
+- 적응형 동시성(AIMD): 정상 응답마다 한도를 조금씩 늘리고, 429 또는 지연 급증 시 절반으로 줄임
+한도를 넘는 호출은 바로 실패하지 않고 최대 RATE_LIMIT_MAX_WAIT_SECONDS 동안 대기열에서 기다립니다.
+OpenAI 호출은 공유 httpx 클라이언트의 transport에서(모델별), Tavily 호출은 검색 도구 래퍼에서 제한합니다.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+
+from src.utils.metrics import registry, rate_limit_wait, rate_limit_events
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "10"))
+
+# 업스트림별 한도 ("openai:<model>" 항목이 없으면 "openai" 항목 사용)
+# rpm/tpm이 0이면 해당 버킷 비활성. 계정 등급에 맞게 RATE_LIMITS(JSON)로 덮어씁니다.
+DEFAULT_RATE_LIMITS = {
+    "openai": {"rpm": 500, "tpm": 300000, "initial_concurrency": 8, "min_concurrency": 1, "max_concurrency": 64},
+    "openai:gpt-4o-mini": {"tpm": 2000000},
+    "tavily": {"rpm": 100, "tpm": 0, "initial_concurrency": 4, "min_concurrency": 1, "max_concurrency": 16},
+}
+# 최근 지연 평균의 이 배수를 넘는 응답은 과부하 신호로 간주
+LATENCY_TOLERANCE = float(os.getenv("RATE_LIMIT_LATENCY_TOLERANCE", "2.5"))
+
+
+class RateLimitQueueTimeout(asyncio.TimeoutError):
+    """대기열에서 최대 대기 시간 안에 순서가 오지 않은 경우 (노드의 기존 타임아웃 처리로 이어짐)"""
+
+
+class TokenBucket:
+    """
+    분당 한도 토큰 버킷 (예약 방식)
+    잔량이 부족해도 먼저 차감(음수 허용)하고 대기할 시간을 돌려주므로, 요청 순서대로 속도가 맞춰집니다.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """amount만큼 예약하고 대기해야 할 초를 반환합니다."""
+        if self.capacity <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def refund(self, amount: float) -> None:
+        if self.capacity <= 0:
+            return
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def pause(self, seconds: float) -> None:
+        """Retry-After 동안 새 요청을 보내지 않습니다."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD 동시성 한도 (성공 시 +1/limit, 429·지연 급증 시 x backoff, cooldown 동안 한 번만 감소)"""
+    def __init__(self, initial: int = 8, min_limit: int = 1, max_limit: int = 64,
+                 latency_tolerance: float = LATENCY_TOLERANCE, backoff: float = 0.5, cooldown_seconds: float = 1.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.last_decrease = 0.0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self.waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 슬롯을 넘겨받은 직후 취소된 경우 다음 대기자에게 돌려줌
+                self.in_flight -= 1
+                self._wake()
+            else:
+                with contextlib.suppress(ValueError):
+                    self.waiters.remove(waiter)
+            raise
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < int(self.limit):
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> Optional[str]:
+        """슬롯을 반납하고 한도를 조정합니다. 한도를 줄였다면 그 이유("429"/"latency")를 반환합니다."""
+        self.in_flight -= 1
+        reason = None
+        if overloaded:
+            reason = "429"
+        elif latency is not None:
+            if self.baseline is not None and latency > self.baseline * self.latency_tolerance:
+                reason = "latency"
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            # 기준 지연은 천천히 따라가므로 업스트림이 지속적으로 느려지면 결국 새 기준이 됩니다.
+            self.baseline = latency if self.baseline is None else self.baseline + 0.05 * (latency - self.baseline)
+
+        decreased = None
+        now = time.monotonic()
+        if reason and now - self.last_decrease >= self.cooldown_seconds:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            self.last_decrease = now
+            decreased = reason
+        self._wake()
+        return decreased
+
+
+class Ticket:
+    """획득한 슬롯 (release에 전달)"""
+    __slots__ = ("tokens", "acquired_at")
+
+    def __init__(self, tokens: float, acquired_at: float):
+        self.tokens = tokens
+        self.acquired_at = acquired_at
+
+
+class OutboundLimiter:
+    """업스트림 하나(예: openai:gpt-4o)에 대한 RPM/TPM 버킷 + 적응형 동시성"""
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0, initial_concurrency: int = 8,
+                 min_concurrency: int = 1, max_concurrency: int = 64, max_wait_seconds: float = RATE_LIMIT_MAX_WAIT_SECONDS):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, min_concurrency, max_concurrency)
+        self.max_wait_seconds = max_wait_seconds
+        self.queued = 0
+
+    async def acquire(self, tokens: float = 0) -> Ticket:
+        """
+        버킷 예약과 동시성 슬롯을 기다립니다.
+
+        Raises:
+            RateLimitQueueTimeout: max_wait_seconds 안에 보낼 수 없는 경우 (예약은 환불)
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > self.max_wait_seconds:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            rate_limit_events.inc(self.name, "rejected")
+            raise RateLimitQueueTimeout(f"{self.name}: rate limit wait {wait:.1f}s exceeds {self.max_wait_seconds:.1f}s")
+
+        self.queued += 1
+        try:
+            if wait > 0:
+                rate_limit_events.inc(self.name, "throttled")
+                await asyncio.sleep(wait)
+            remaining = self.max_wait_seconds - (loop.time() - started)
+            try:
+                await asyncio.wait_for(self.concurrency.acquire(), timeout=max(0.0, remaining))
+            except asyncio.TimeoutError:
+                rate_limit_events.inc(self.name, "rejected")
+                raise RateLimitQueueTimeout(f"{self.name}: no concurrency slot within {self.max_wait_seconds:.1f}s") from None
+        except BaseException:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            raise
+        finally:
+            self.queued -= 1
+
+        now = loop.time()
+        rate_limit_wait.observe(now - started, self.name)
+        return Ticket(tokens, now)
+
+    def release(self, ticket: Ticket, overloaded: bool = False, retry_after: Optional[float] = None,
+                failed: bool = False, latency: Optional[float] = None) -> None:
+        """
+        Args:
+            overloaded: 429 응답을 받은 경우
+            retry_after: Retry-After 헤더 값(초) (있으면 버킷을 그 시간 동안 멈춤)
+            failed: 지연 신호로 쓰지 않을 오류(연결 실패/취소 등)
+            latency: 측정한 지연 (생략 시 슬롯 획득부터 지금까지)
+        """
+        if overloaded or failed:
+            latency = None
+        elif latency is None:
+            latency = asyncio.get_running_loop().time() - ticket.acquired_at
+        if retry_after:
+            self.requests.pause(retry_after)
+        reason = self.concurrency.release(latency, overloaded)
+        if reason:
+            rate_limit_events.inc(self.name, f"backoff_{reason}")
+
+    @contextlib.asynccontextmanager
+    async def slot(self, tokens: float = 0):
+        """async with limiter.slot(): ... 형태로 호출 하나를 감쌉니다. (429 예외는 과부하로 처리)"""
+        ticket = await self.acquire(tokens)
+        try:
+            yield ticket
+        except BaseException as e:
+            self.release(ticket, overloaded=_status_of(e) == 429, failed=True)
+            raise
+        self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.concurrency.limit, 2),
+            "in_flight": self.concurrency.in_flight,
+            "queued": self.queued,
+            "baseline_latency_seconds": None if self.concurrency.baseline is None else round(self.concurrency.baseline, 3),
+            "rpm_available": None if self.requests.capacity <= 0 else round(self.requests.tokens, 1),
+            "tpm_available": None if self.tokens.capacity <= 0 else round(self.tokens.tokens, 1),
+        }
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def load_rate_limits() -> Dict[str, Dict[str, Any]]:
+    """기본 한도에 RATE_LIMITS(JSON)를 키 단위로 병합합니다. (예: {"openai:gpt-4o": {"tpm": 30000}})"""
+    limits = {name: dict(entry) for name, entry in DEFAULT_RATE_LIMITS.items()}
+    for name, entry in json.loads(os.getenv("RATE_LIMITS", "{}")).items():
+        limits[name] = {**limits.get(name, {}), **entry}
+    return limits
+
+
+_limiters: Dict[str, OutboundLimiter] = {}
+
+
+def get_limiter(name: str) -> OutboundLimiter:
+    """업스트림 이름(openai:<model> / tavily)별 제한기 (프로세스 전역에서 공유)"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limits = load_rate_limits()
+        base = limits.get(name.split(":", 1)[0], {})
+        limiter = _limiters.setdefault(name, OutboundLimiter(name, **{**base, **limits.get(name, {})}))
+    return limiter
+
+
+def stats() -> Dict[str, Any]:
+    return {"enabled": RATE_LIMIT_ENABLED, "limiters": {name: limiter.stats() for name, limiter in list(_limiters.items())}}
+
+
+def _collect_limiter_metrics():
+    limiters = list(_limiters.items())
+    return [
+        ("medigraph_rate_limit_concurrency", "gauge", "Adaptive concurrency limit per upstream", [({"upstream": n}, l.concurrency.limit) for n, l in limiters]),
+        ("medigraph_rate_limit_in_flight", "gauge", "Outbound calls in flight per upstream", [({"upstream": n}, l.concurrency.in_flight) for n, l in limiters]),
+        ("medigraph_rate_limit_queued", "gauge", "Outbound calls waiting in the limiter", [({"upstream": n}, l.queued) for n, l in limiters]),
+    ]
+
+
+registry.register_collector(_collect_limiter_metrics)
+
+
+def estimate_prompt_tokens(body: Dict[str, Any]) -> int:
+    """Chat Completions 요청 본문의 프롬프트 토큰 추정치 (이미지 파트는 고정 비용으로 계산)"""
+    from src.utils.evidence import estimate_tokens
+    total = 0
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    total += estimate_tokens(part.get("text", ""))
+                else:
+                    total += 85
+        total += 4  # 메시지별 role/구분자 오버헤드
+    return total
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("retry-after-ms")
+    if value:
+        with contextlib.suppress(ValueError):
+            return float(value) / 1000
+    value = headers.get("retry-after")
+    if value:
+        with contextlib.suppress(ValueError):
+            return float(value)
+    return None
+
+
+def rate_limited_transport(inner):
+    """
+    httpx 비동기 transport를 감싸 /chat/completions 요청을 모델별 제한기에 통과시킵니다.
+    스트리밍 응답은 본문을 끝까지 읽을(닫을) 때 슬롯을 반납하며, 지연은 응답 헤더 도착까지의 시간으로 측정합니다.
+    """
+    import httpx
+
+    class ReleasingStream(httpx.AsyncByteStream):
+        def __init__(self, stream, release):
+            self.stream = stream
+            self.release = release
+
+        async def __aiter__(self):
+            async for chunk in self.stream:
+                yield chunk
+
+        async def aclose(self) -> None:
+            try:
+                await self.stream.aclose()
+            finally:
+                self.release()
+
+    class RateLimitedTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            if not request.url.path.endswith("/chat/completions"):
+                return await inner.handle_async_request(request)
+            body = json.loads(request.content)
+            limiter = get_limiter(f"openai:{body.get('model')}")
+            ticket = await limiter.acquire(estimate_prompt_tokens(body))
+            try:
+                response = await inner.handle_async_request(request)
+            except BaseException:
+                limiter.release(ticket, failed=True)
+                raise
+            if response.status_code == 429:
+                limiter.release(ticket, overloaded=True, retry_after=_retry_after(response.headers))
+                return response
+            # 헤더 도착 시점의 지연으로 한도를 조정하고, 동시성 슬롯은 본문을 다 읽을 때까지 유지
+            latency = asyncio.get_running_loop().time() - ticket.acquired_at
+            released = False
+
+            def release() -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    limiter.release(ticket, failed=response.status_code >= 500, latency=latency)
+
+            return httpx.Response(response.status_code, headers=response.headers,
+                                  stream=ReleasingStream(response.stream, release),
+                                  extensions=response.extensions, request=request)
+
+        async def aclose(self) -> None:
+            await inner.aclose()
+
+    return RateLimitedTransport()
+
+
+class RateLimitedSearch:
+    """검색 도구를 감싸 tavily 제한기를 통과시킵니다."""
+    def __init__(self, tool: Any):
+        self.tool = tool
+        self.max_results = getattr(tool, "max_results", 5)
+
+    async def ainvoke(self, query: str, config: Any = None) -> Any:
+        async with get_limiter("tavily").slot():
+            return await self.tool.ainvoke(query, config=config)
@@ -0,0 +1,241 @@
+"""
+규칙 기반 응급 징후(red flag) 탐지
+LLM을 거치지 않고 한국어/영어 응급 어휘를 Aho–Corasick 오토마톤으로 한 번에 찾아 응급 경로로 바로 보냅니다.
+- 한국어는 띄어쓰기가 제각각이므로 공백을 제거한 문자열에서 매칭합니다. ("숨이 안" == "숨이안")
+- 일상 표현과 겹치는 어간("경기를", "발작", "숨이막")은 쓰지 않고 응급 상황을 나타내는 구절 단위로 등록합니다.
+  ("축구 경기를 보고", "발작적으로 기침", "숨이 막힐 듯이 덥네요"는 응급이 아님)
+- 영어 어휘는 단어 경계에서만 매칭합니다. ("heatstroke"는 "stroke"가 아님)
+- 부정 표현: 한국어는 뒤("흉통은 없어요"), 영어는 앞("no chest pain")을 같은 절 안에서 확인합니다.
+- 애매하면 응급 쪽으로 판단합니다. (부정 확인 범위는 좁게, 절 경계는 보수적으로)
+"""
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import re
+
+# 범주별 응급 어휘 (공백은 매칭 시 무시됨)
+RED_FLAG_LEXICON: Dict[str, List[str]] = {
+    "cardiac": [
+        "심장마비", "흉통", "가슴통증", "가슴이아", "가슴이쥐어", "가슴이조이", "가슴이터질", "가슴을쥐어", "가슴이답답하고식은땀",
+        "heart attack", "chest pain", "crushing chest", "chest tightness", "chest pressure",
+    ],
+    "respiratory": [
+        "호흡곤란", "숨이안", "숨을못", "숨을쉴수없", "숨쉬기가힘들", "숨이막혀", "숨이막힙", "숨이막힌다", "숨이차서말",
+        "can't breathe", "cannot breathe", "unable to breathe", "shortness of breath", "choking",
+    ],
+    "stroke": [
+        "뇌졸중", "중풍", "한쪽마비", "반신마비", "얼굴이한쪽", "입이돌아", "말이어눌", "발음이어눌", "갑자기말이안나",
+        "having a stroke", "had a stroke", "signs of a stroke", "stroke symptoms", "face drooping", "slurred speech", "one side numb", "sudden weakness",
+    ],
+    "bleeding": [
+        "피를토", "토혈", "각혈", "객혈", "피가멈추지", "출혈이멈추지", "대량출혈", "검은변", "혈변이많",
+        "vomiting blood", "coughing up blood", "bleeding won't stop", "heavy bleeding", "black stool",
+    ],
+    "consciousness": [
+        "의식을잃", "의식이없", "의식이흐려", "정신을잃", "기절", "실신", "깨어나지않", "반응이없",
+        "unconscious", "passed out", "fainted", "unresponsive",
+    ],
+    "seizure": [
+        "경기를일으", "전신경련", "경련을일으", "경련을하", "경련을해", "경련이멈추지",
+        "발작을일으", "발작이일어", "발작을하", "발작을해", "간질발작", "뇌전증발작",
+        "seizure", "convulsion",
+    ],
+    "anaphylaxis": [
+        "목이붓", "혀가붓", "입술이붓고숨", "아나필락시스", "두드러기와호흡",
+        "throat swelling", "tongue swelling", "anaphylaxis",
+    ],
+    "self_harm": [
+        "자살", "죽고싶", "자해",
+        "suicide", "kill myself", "want to die", "self harm",
+    ],
+    "severe_pain": [
+        "극심한두통", "머리가깨질", "벼락두통", "인생최악의두통",
+        "worst headache", "thunderclap headache",
+    ],
+}
+
+# 범주별 정적 응급 안내 (LLM 없이 emergency_response가 사용)
+RED_FLAG_GUIDANCE: Dict[str, Tuple[str, List[str]]] = {
+    "cardiac": ("급성 관상동맥 증후군(심근경색), 대동맥 박리", [
+        "즉시 119에 신고하고 움직임을 멈추고 앉거나 편한 자세로 안정하세요.",
+        "아스피린 알레르기가 없다면 119 상담원의 안내에 따라 아스피린을 씹어 드세요.",
+        "의식을 잃고 호흡이 없으면 즉시 가슴 압박(심폐소생술)을 시작하세요.",
+    ]),
+    "respiratory": ("급성 호흡부전, 기도 폐쇄, 폐색전증", [
+        "즉시 119에 신고하세요.",
+        "상체를 세워 앉은 자세를 유지하고 조이는 옷을 풀어주세요.",
+        "이물질로 인한 질식이면 하임리히법을 시행하세요.",
+    ]),
+    "stroke": ("뇌졸중 (뇌경색/뇌출혈)", [
+        "즉시 119에 신고하고 증상이 시작된 시각을 기록하세요.",
+        "음식, 물, 약을 먹이지 마세요.",
+        "토할 경우 질식하지 않도록 고개를 옆으로 돌려 눕히세요.",
+    ]),
+    "bleeding": ("위장관 출혈, 대량 출혈", [
+        "즉시 119에 신고하세요.",
+        "외부 출혈은 깨끗한 천으로 상처를 강하게 눌러 지혈하세요.",
+        "음식이나 물을 먹지 말고 누운 자세로 안정하세요.",
+    ]),
+    "consciousness": ("의식 저하 (실신, 저혈당, 뇌손상 등)", [
+        "즉시 119에 신고하세요.",
+        "호흡이 있으면 옆으로 눕혀 기도를 확보하고, 호흡이 없으면 심폐소생술을 시작하세요.",
+        "의식이 돌아오기 전에는 아무것도 먹이지 마세요.",
+    ]),
+    "seizure": ("경련 발작, 뇌전증 지속 상태", [
+        "즉시 119에 신고하고 발작 시간을 확인하세요.",
+        "주변의 위험한 물건을 치우고 억지로 붙잡거나 입에 물건을 넣지 마세요.",
+        "발작이 멈추면 옆으로 눕혀 기도를 확보하세요.",
+    ]),
+    "anaphylaxis": ("아나필락시스 (중증 알레르기 반응)", [
+        "즉시 119에 신고하세요.",
+        "처방받은 에피네프린 자가주사기가 있으면 허벅지 바깥쪽에 바로 주사하세요.",
+        "숨쉬기 편한 자세로 앉히고, 어지러우면 다리를 올려 눕히세요.",
+    ]),
+    "self_harm": ("자해/자살 위험", [
+        "지금 바로 자살예방상담전화 109 또는 119에 연락하세요.",
+        "혼자 있지 말고 가까운 사람에게 곁에 있어 달라고 요청하세요.",
+        "위험한 물건이나 약을 손이 닿지 않는 곳으로 치우세요.",
+    ]),
+    "severe_pain": ("지주막하 출혈 등 급성 뇌혈관 질환", [
+        "즉시 119에 신고하거나 가장 가까운 응급실로 가세요.",
+        "진통제를 먹고 기다리지 마세요.",
+        "구토나 의식 변화가 있으면 옆으로 눕혀 기도를 확보하세요.",
+    ]),
+}
+
+# 한국어 부정 표현 (매칭 뒤에 나오는 경우)
+_KO_NEGATION_CUES = ("없", "않", "아니", "니라", "괜찮", "안했", "안해", "안났")
+# 부정 확인을 멈추는 절 경계 (이후 내용은 다른 증상에 대한 서술로 간주)
+_KO_CLAUSE_STOPS = ("있", "고", "는데", "지만", "서")
+_KO_NEGATION_WINDOW = 6
+# 영어 부정 표현 (매칭 앞 세 단어 안에 나오는 경우)
+_EN_NEGATION_CUES = {"no", "not", "never", "without", "denies", "deny", "denied", "don't", "dont", "didn't", "haven't", "hasn't", "isn't"}
+_CLAUSE_BOUNDARY = re.compile(r"[.,;!?\n]|\bbut\b")
+
+
+class RedFlagMatch(NamedTuple):
+    category: str
+    term: str
+    text: str  # 원문에서 매칭된 부분
+
+
+class AhoCorasick:
+    """다중 패턴 문자열 매칭 오토마톤 (입력 길이에 선형, 패턴 수와 무관)"""
+    def __init__(self, patterns: Dict[str, str]):
+        """
+        Args:
+            patterns: 패턴 -> 값(범주) 매핑
+        """
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[str, str]]] = [[]]
+        for pattern, value in patterns.items():
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.output[state].append((pattern, value))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                candidate = self.goto[fallback].get(ch, 0)
+                # 루트의 자식은 자기 자신이 아니라 루트로 실패 전이
+                self.fail[child] = candidate if candidate != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str, str]]:
+        """(시작, 끝, 패턴, 값)을 끝 위치 순서로 반환합니다."""
+        state = 0
+        for index, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for pattern, value in self.output[state]:
+                yield index + 1 - len(pattern), index + 1, pattern, value
+
+
+def _compact(text: str) -> str:
+    return "".join(text.lower().split())
+
+
+_MATCHER = AhoCorasick({_compact(term): category for category, terms in RED_FLAG_LEXICON.items() for term in terms})
+
+
+def _negated_after(compact: str, end: int) -> bool:
+    window = compact[end:end + _KO_NEGATION_WINDOW]
+    cut = len(window)
+    for stop in _KO_CLAUSE_STOPS:
+        position = window.find(stop)
+        if position != -1:
+            cut = min(cut, position)
+    for boundary in ".,;!?":
+        position = window.find(boundary)
+        if position != -1:
+            cut = min(cut, position)
+    clause = window[:cut]
+    return any(cue in clause for cue in _KO_NEGATION_CUES)
+
+
+def _at_word_boundary(term: str, text: str, start: int, end: int) -> bool:
+    """영어 어휘는 앞뒤가 다른 영문자와 붙어 있지 않아야 합니다. (복수형 -s는 허용)"""
+    if not term.isascii():
+        return True
+    if start > 0 and text[start - 1].isascii() and text[start - 1].isalpha():
+        return False
+    after = text[end:end + 2]
+    if after[:1] == "s":
+        after = after[1:]
+    return not (after[:1].isascii() and after[:1].isalpha())
+
+
+def _negated_before(text: str, start: int) -> bool:
+    clause = _CLAUSE_BOUNDARY.split(text[:start].lower())[-1]
+    return any(word in _EN_NEGATION_CUES for word in clause.split()[-3:])
+
+
+def scan(text: Optional[str]) -> List[RedFlagMatch]:
+    """부정되지 않은 응급 어휘 매칭 목록 (같은 범주는 처음 것만)"""
+    if not text:
+        return []
+    lowered = text.lower()
+    # lower()가 길이를 바꾸는 드문 문자가 있으면 소문자 원문에서 잘라냄
+    source = text if len(text) == len(lowered) else lowered
+    # 공백을 제거한 문자열의 각 위치 -> 원문 위치
+    positions = [index for index, ch in enumerate(lowered) if not ch.isspace()]
+    compact = "".join(lowered[index] for index in positions)
+
+    matches: List[RedFlagMatch] = []
+    seen = set()
+    for start, end, term, category in _MATCHER.finditer(compact):
+        if category in seen:
+            continue
+        original_start, original_end = positions[start], positions[end - 1] + 1
+        if not _at_word_boundary(term, lowered, original_start, original_end):
+            continue
+        if _negated_after(compact, end) or _negated_before(lowered, original_start):
+            continue
+        seen.add(category)
+        matches.append(RedFlagMatch(category, term, source[original_start:original_end]))
+    return matches
+
+
+def guidance(categories: List[str]) -> str:
+    """탐지된 범주의 정적 응급 안내 (마크다운)"""
+    conditions = []
+    steps: List[str] = []
+    for category in categories:
+        condition, actions = RED_FLAG_GUIDANCE.get(category, RED_FLAG_GUIDANCE["consciousness"])
+        conditions.append(condition)
+        steps.extend(action for action in actions if action not in steps)
+    lines = [f"**의심 질환**: {', '.join(conditions)}", "", "**판단 근거**: 응급 징후 표현이 감지되었습니다.", "", "**응급 조치 요령**:"]
+    lines.extend(f"- {step}" for step in steps)
+    return "\n".join(lines)
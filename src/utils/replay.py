@@ -0,0 +1,161 @@
+"""
+LLM/검색 호출 녹화(record) 및 재생(replay) 지원
+- 녹화: REPLAY_RECORD=<cassette.jsonl>이면 OpenAI HTTP 교환과 Tavily 검색 결과를 카세트 파일에 기록합니다.
+- 재생: python -m src.replay_server로 카세트를 서빙하고, OPENAI_BASE_URL / TAVILY_BASE_URL을 그 서버로 지정합니다.
+카세트는 요청 키 -> 응답을 담은 JSONL 파일이며, 같은 프롬프트는 항상 같은 응답으로 재생됩니다.
+"""
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def _digest(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def chat_key(body: Dict[str, Any]) -> str:
+    """Chat Completions 요청 키 (stream 여부와 무관하게 같은 프롬프트는 같은 키)"""
+    relevant = {name: body.get(name) for name in ("model", "messages", "temperature", "response_format", "tools", "n")}
+    return "openai:" + _digest(relevant)
+
+
+def search_key(query: str, max_results: int) -> str:
+    return "tavily:" + _digest({"query": query, "max_results": max_results})
+
+
+def assemble_stream(text: str) -> Dict[str, Any]:
+    """스트리밍(SSE) 응답 청크를 일반 chat.completion 응답 하나로 합칩니다."""
+    content, completion_id, model, usage, finish_reason = [], None, None, None, None
+    for line in text.splitlines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        chunk = json.loads(data)
+        completion_id = completion_id or chunk.get("id")
+        model = model or chunk.get("model")
+        if chunk.get("usage"):
+            usage = chunk["usage"]
+        for choice in chunk.get("choices") or []:
+            delta = choice.get("delta") or {}
+            if delta.get("content"):
+                content.append(delta["content"])
+            if choice.get("finish_reason"):
+                finish_reason = choice["finish_reason"]
+    return {
+        "id": completion_id or "chatcmpl-replay",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(content)}, "finish_reason": finish_reason or "stop"}],
+        "usage": usage or {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+class Cassette:
+    """녹화된 교환을 담는 JSONL 파일 (녹화 시 append, 재생 시 키 -> 항목 딕셔너리로 로드)"""
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, kind: str, key: str, request: Dict[str, Any], response: Dict[str, Any], duration_ms: float) -> None:
+        entry = {"kind": kind, "key": key, "request": request, "response": response, "duration_ms": round(duration_ms, 1)}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        entries = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entries[entry["key"]] = entry
+        return entries
+
+
+def recording_cassette() -> Optional[Cassette]:
+    """REPLAY_RECORD가 설정된 경우 녹화용 카세트"""
+    path = os.getenv("REPLAY_RECORD")
+    return Cassette(path) if path else None
+
+
+def recording_transport(inner, cassette: Cassette):
+    """
+    httpx 비동기 transport를 감싸 /chat/completions 교환을 카세트에 기록합니다.
+    스트리밍 응답도 본문을 모두 읽은 뒤 돌려주므로, 녹화 중에는 토큰 스트리밍이 한 번에 전달됩니다.
+    """
+    import httpx
+
+    class RecordingTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            if not request.url.path.endswith("/chat/completions"):
+                return await inner.handle_async_request(request)
+            started = time.perf_counter()
+            response = await inner.handle_async_request(request)
+            body = await response.aread()
+            duration_ms = (time.perf_counter() - started) * 1000
+            if response.status_code == 200:
+                payload = json.loads(request.content)
+                text = body.decode("utf-8")
+                completion = assemble_stream(text) if payload.get("stream") else json.loads(text)
+                cassette.append("openai", chat_key(payload), payload, completion, duration_ms)
+            # 본문을 이미 읽었으므로 디코딩된 내용으로 응답을 다시 만듭니다.
+            headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+            return httpx.Response(response.status_code, headers=headers, content=body, request=request)
+
+        async def aclose(self) -> None:
+            await inner.aclose()
+
+    return RecordingTransport()
+
+
+class TavilyHTTPSearch:
+    """
+    Tavily /search API를 직접 호출하는 검색 도구 (TavilySearchResults와 같은 결과 형식)
+    TAVILY_BASE_URL로 엔드포인트를 바꿀 수 있어 재생 서버를 가리킬 때 사용합니다.
+    """
+    def __init__(self, base_url: str, api_key: str, max_results: int = 5, exclude_domains: Optional[List[str]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_results = max_results
+        self.exclude_domains = exclude_domains or []
+
+    async def ainvoke(self, query: str, config: Any = None) -> List[Dict[str, Any]]:
+        from src.utils.llm import get_http_clients
+        _, client = get_http_clients()
+        response = await client.post(f"{self.base_url}/search", json={
+            "api_key": self.api_key,
+            "query": query,
+            "max_results": self.max_results,
+            "exclude_domains": self.exclude_domains,
+        })
+        response.raise_for_status()
+        return [{"url": item.get("url"), "content": item.get("content")} for item in response.json().get("results", [])]
+
+
+class RecordingSearch:
+    """검색 도구를 감싸 쿼리와 결과를 카세트에 기록합니다."""
+    def __init__(self, tool: Any, cassette: Cassette):
+        self.tool = tool
+        self.cassette = cassette
+
+    async def ainvoke(self, query: str, config: Any = None) -> Any:
+        started = time.perf_counter()
+        results = await self.tool.ainvoke(query, config=config)
+        max_results = getattr(self.tool, "max_results", 5)
+        self.cassette.append(
+            "tavily", search_key(query, max_results),
+            {"query": query, "max_results": max_results},
+            {"results": results if isinstance(results, list) else []},
+            (time.perf_counter() - started) * 1000,
+        )
+        return results
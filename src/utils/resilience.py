@@ -0,0 +1,241 @@
+"""
+외부 호출(LLM/검색) 꼬리 지연 대응
+- 시도별 타임아웃: 요청 마감 시간(deadline) 안에서 한 번의 시도가 가질 수 있는 최대 시간
+  (노드 모델 정책에 timeout 뒤 폴백이 있으면 폴백까지 한 시도 안에서 끝날 수 있도록 늘림)
+- 헤징(hedging): 노드별 지연 분포의 백분위수(기본 p95)를 넘기면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+- 재시도: 재시도 가능한 오류(429/5xx/연결/시도 타임아웃)에 지터가 있는 지수 백오프
+헤징과 재시도는 모두 재시도 예산(RetryBudget)에서 차감되어, 과부하 시 부하를 증폭시키지 않습니다.
+토큰 스트리밍 노드는 중복 응답이 클라이언트로 나가지 않도록 헤징하지 않습니다.
+"""
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import asyncio
+import os
+import random
+import threading
+import time
+
+from src.utils.deadline import call_timeout, LLM_CALL_TIMEOUT_SECONDS
+from src.utils.llm import get_model_policy
+from src.utils.metrics import current_node, call_hedges, call_retries, retry_budget_exhausted
+from src.utils.rate_limit import RateLimitQueueTimeout
+
+T = TypeVar("T")
+
+ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "20"))
+# 기본 모델이 정책 timeout을 넘긴 뒤 폴백 모델 호출에 남겨 둘 시간
+FALLBACK_ATTEMPT_SECONDS = float(os.getenv("LLM_FALLBACK_ATTEMPT_SECONDS", "15"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_MAX_BACKOFF_SECONDS", "8"))
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "1.0"))
+# 토큰 스트리밍 노드 (api.STREAM_TOKEN_NODES와 동일)
+HEDGE_DISABLED_NODES = set(filter(None, os.getenv("LLM_HEDGE_DISABLED_NODES", "diagnosis_generator,emergency_response").split(",")))
+
+_RETRYABLE_ERRORS = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError",  # openai
+    "ConnectError", "ConnectTimeout", "ReadTimeout", "RemoteProtocolError",  # httpx (Tavily)
+}
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryBudget:
+    """
+    재시도 예산 (토큰 버킷)
+    요청마다 ratio만큼 적립되고 재시도/헤징마다 1씩 차감됩니다. 적립과 별개로 초당 min_per_second씩 채워져
+    트래픽이 적을 때도 최소한의 재시도는 허용합니다.
+    """
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 0.5, max_tokens: float = 20):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated) * self.min_per_second)
+        self.updated = now
+
+    def record_request(self) -> None:
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class LatencyTracker:
+    """노드별 최근 성공 호출 지연 (헤징 기준 백분위수 계산용)"""
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, key: str, seconds: float) -> None:
+        with self.lock:
+            self.samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, p: float, min_samples: int = 1) -> Optional[float]:
+        with self.lock:
+            values = sorted(self.samples.get(key, ()))
+        if len(values) < min_samples:
+            return None
+        index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        return values[index]
+
+
+retry_budget = RetryBudget(
+    ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.1")),
+    min_per_second=float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "0.5")),
+)
+latency_tracker = LatencyTracker()
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, RateLimitQueueTimeout):
+        # 송신 제한기 대기열에서 이미 기다린 호출은 다시 줄 세우지 않음
+        return False
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if type(error).__name__ in _RETRYABLE_ERRORS:
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status in _RETRYABLE_STATUS
+
+
+def attempt_timeout_for(node: Optional[str]) -> float:
+    """
+    노드의 시도별 타임아웃 상한
+    정책에 폴백이 있는 노드는 기본 모델 timeout + FALLBACK_ATTEMPT_SECONDS 이상을 줍니다.
+    (시도 타임아웃이 기본 모델 timeout보다 짧거나 같으면 폴백으로 넘어가기 전에 시도가 취소됨)
+    """
+    policy = get_model_policy()
+    entry = policy.get(node, policy["default"])
+    fallback, timeout = entry.get("fallback"), entry.get("timeout")
+    if not fallback or fallback == entry["model"] or timeout is None:
+        return ATTEMPT_TIMEOUT_SECONDS
+    return max(ATTEMPT_TIMEOUT_SECONDS, timeout + FALLBACK_ATTEMPT_SECONDS)
+
+
+def hedge_delay(node: str) -> Optional[float]:
+    """헤징을 시작할 지연 (표본이 부족하거나 헤징 비활성 노드면 None)"""
+    if node in HEDGE_DISABLED_NODES:
+        return None
+    threshold = latency_tracker.percentile(node, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES)
+    if threshold is None:
+        return None
+    return max(HEDGE_MIN_DELAY_SECONDS, threshold)
+
+
+async def _attempt(factory: Callable[[], Awaitable[T]], node: str, timeout: float) -> T:
+    """한 번의 시도. 헤징 지연이 지나도 응답이 없으면 중복 요청을 보내고 먼저 성공한 결과를 사용합니다."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    primary = asyncio.ensure_future(factory())
+    created = [primary]
+    pending = {primary}
+    try:
+        delay = hedge_delay(node)
+        if delay is not None and delay < timeout:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and retry_budget.try_spend():
+                call_hedges.inc(node, "launched")
+                hedge = asyncio.ensure_future(factory())
+                created.append(hedge)
+                pending.add(hedge)
+
+        error: Optional[BaseException] = None
+        while pending:
+            remaining = timeout - (loop.time() - started)
+            done, pending = await asyncio.wait(pending, timeout=max(0.0, remaining), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError()
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        call_hedges.inc(node, "won")
+                    latency_tracker.observe(node, loop.time() - started)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in created:
+            if not task.done():
+                task.cancel()
+
+
+async def resilient_call(factory: Callable[[], Awaitable[T]], config: Optional[dict],
+                         cap: float = LLM_CALL_TIMEOUT_SECONDS, attempt_timeout: Optional[float] = None,
+                         node: Optional[str] = None) -> T:
+    """
+    factory()가 만드는 호출을 마감 시간, 시도별 타임아웃, 헤징, 예산 내 재시도와 함께 실행합니다.
+    (with_deadline과 달리 재시도/헤징을 위해 awaitable이 아닌 factory를 받습니다.)
+
+    Args:
+        factory: 호출할 때마다 새 awaitable을 반환하는 함수 (예: lambda: chain.ainvoke(inputs, config=config))
+        config: RunnableConfig (deadline_at 참조)
+        cap: 전체 호출 시간 상한 (남은 예산이 더 짧으면 그 값)
+        attempt_timeout: 시도 1회당 타임아웃 상한 (생략 시 노드 모델 정책 기준, attempt_timeout_for)
+        node: 통계 키 (생략 시 현재 실행 중인 노드)
+
+    Raises:
+        asyncio.TimeoutError: 마감 시간 안에 성공하지 못한 경우
+        그 외 예외: 재시도할 수 없거나 재시도 횟수/예산을 모두 쓴 경우 마지막 오류
+    """
+    node = node or current_node.get()
+    if attempt_timeout is None:
+        attempt_timeout = attempt_timeout_for(node)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + call_timeout(config, cap)
+    retry_budget.record_request()
+    retries = 0
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        try:
+            return await _attempt(factory, node, min(remaining, attempt_timeout))
+        except Exception as e:
+            if not is_retryable(e) or retries >= MAX_RETRIES:
+                raise
+            backoff = random.uniform(0, min(RETRY_MAX_BACKOFF_SECONDS, RETRY_BASE_SECONDS * (2 ** retries)))
+            if backoff >= deadline - loop.time():
+                raise
+            if not retry_budget.try_spend():
+                retry_budget_exhausted.inc(node)
+                raise
+            call_retries.inc(node, "timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__)
+            retries += 1
+            await asyncio.sleep(backoff)
+
+
+def stats() -> Dict[str, Any]:
+    """노드별 지연 백분위수/헤징 기준, 재시도 예산 잔량, 헤징/재시도 횟수"""
+    nodes = {}
+    for node in list(latency_tracker.samples):
+        nodes[node] = {
+            "samples": len(latency_tracker.samples[node]),
+            "p50_seconds": latency_tracker.percentile(node, 50),
+            "p95_seconds": latency_tracker.percentile(node, 95),
+            "hedge_after_seconds": hedge_delay(node),
+        }
+    with retry_budget.lock:
+        retry_budget._refill()
+        tokens = retry_budget.tokens
+    return {
+        "nodes": nodes,
+        "retry_budget_tokens": round(tokens, 2),
+        "hedges": {f"{node}:{outcome}": int(count) for (node, outcome), count in list(call_hedges.values.items())},
+        "retries": {f"{node}:{reason}": int(count) for (node, reason), count in list(call_retries.values.items())},
+        "retry_budget_exhausted": {node: int(count) for (node,), count in list(retry_budget_exhausted.values.items())},
+    }
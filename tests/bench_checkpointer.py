@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+import uuid
+
+from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+from src.utils.checkpointer import BoundedMemorySaver, RetentionPolicy, SQLiteCheckpointer
+
+# 한 턴 동안 LangGraph가 수행하는 super-step 수 (analyzer -> router -> rag -> critic -> ... -> fact_checker)
+STEPS_PER_TURN = 8
+
+def build_values(turn: int):
+    """대화가 길어질수록 커지는 현실적인 채널 값"""
+    messages = []
+    for i in range(turn + 1):
+        messages.append(HumanMessage(content=f"{i}번째 증상 설명: 머리가 지끈거리고 속이 메스꺼워요"))
+        messages.append(AIMessage(content="통증이 시작된 시점과 지속 시간은 어떻게 되나요?"))
+    evidence = [f"Tension-type headache guideline passage {i}. " * 20 for i in range(5)]
+    return {
+        "messages": messages,
+        "symptoms": ["두통", "메스꺼움"],
+        "medical_evidence": evidence,
+        "diagnosis_hypothesis": "## 📋 AI 증상 분석 결과\n" + "긴장성 두통 설명 " * 50,
+        "search_count": 1,
+    }
+
+async def run_turn(saver, thread_id: str, turn: int):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    latest = await saver.aget_tuple(config)
+    if latest is not None:
+        config = latest.config
+    values = build_values(turn)
+    for step in range(STEPS_PER_TURN):
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = values
+        versions = {key: turn * STEPS_PER_TURN + step + 1 for key in values}
+        checkpoint["channel_versions"] = versions
+        await saver.aput_writes(config, [("next_step", "medical_rag"), ("search_count", 1)], task_id=str(uuid.uuid4()))
+        config = await saver.aput(config, checkpoint, {"source": "loop", "step": step}, versions)
+
+async def bench(name: str, saver, threads: int, turns: int):
+    start = time.perf_counter()
+    thread_ids = [str(uuid.uuid4()) for _ in range(threads)]
+    for turn in range(turns):
+        await asyncio.gather(*(run_turn(saver, thread_id, turn) for thread_id in thread_ids))
+    elapsed = time.perf_counter() - start
+    per_turn_ms = elapsed / (threads * turns) * 1000
+    print(f"{name:>8}: {threads} threads x {turns} turns -> {elapsed:.2f}s total, {per_turn_ms:.2f} ms/turn")
+    if hasattr(saver, "memory_report"):
+        report = saver.memory_report()
+        print(f"{'':>8}  stored: {report['total_bytes'] / 1024:.1f} KiB ({report['avg_bytes_per_thread'] / 1024:.1f} KiB/thread)")
+    return per_turn_ms
+
+async def main():
+    parser = argparse.ArgumentParser(description="MemorySaver vs SQLiteCheckpointer per-turn overhead")
+    parser.add_argument("--threads", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--keep-last", type=int, default=1, help="보관 정책: 스레드별 유지할 체크포인트 수")
+    args = parser.parse_args()
+
+    memory_ms = await bench("memory", MemorySaver(), args.threads, args.turns)
+    # 보관 정책 유무에 따른 스레드별 메모리 사용량 비교
+    await bench("unbound", BoundedMemorySaver(RetentionPolicy(keep_last=0, ttl_seconds=0)), args.threads, args.turns)
+    await bench("bounded", BoundedMemorySaver(RetentionPolicy(keep_last=args.keep_last)), args.threads, args.turns)
+    with tempfile.TemporaryDirectory() as tmp:
+        retention = RetentionPolicy(keep_last=args.keep_last)
+        sqlite_ms = await bench("sqlite", SQLiteCheckpointer(os.path.join(tmp, "checkpoints.sqlite"), retention=retention), args.threads, args.turns)
+    print(f"SQLite overhead vs MemorySaver: +{sqlite_ms - memory_ms:.2f} ms/turn ({STEPS_PER_TURN} checkpoints per turn)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
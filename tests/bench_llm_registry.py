@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+# 네트워크 호출 없이 클라이언트/체인 구성 비용만 측정합니다.
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_openai import ChatOpenAI
+from src.utils.llm import get_llm
+from src.nodes import symptom_analyzer, specialist_router, research_critic, diagnosis_generator, fact_checker, question_generator
+
+# 한 턴 동안 LLM을 호출하는 노드들 (진단 경로 기준)
+TURN_NODES = [symptom_analyzer, specialist_router, research_critic, diagnosis_generator, fact_checker]
+
+def per_call_setup():
+    """이전 방식: 노드 호출마다 ChatOpenAI(새 커넥션 풀)와 프롬프트/체인을 새로 구성"""
+    for module in TURN_NODES:
+        llm = ChatOpenAI(model="gpt-4o", temperature=0, api_key=os.environ["OPENAI_API_KEY"])
+        prompt = module._PROMPT.model_copy(deep=True)  # 매 호출 프롬프트 재구성에 해당
+        chain = prompt | llm | StrOutputParser()
+
+def registry_setup():
+    """현재 방식: 레지스트리의 공유 클라이언트와 미리 만든 체인을 조회"""
+    for module in TURN_NODES:
+        chain = module._chain()
+
+def bench(name: str, fn, turns: int) -> float:
+    fn()  # 워밍업 (레지스트리는 첫 호출 시 구성)
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    per_turn_ms = (time.perf_counter() - start) / turns * 1000
+    print(f"{name:>10}: {per_turn_ms:.3f} ms/turn")
+    return per_turn_ms
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn LLM client/chain setup overhead")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    before = bench("per-call", per_call_setup, args.turns)
+    after = bench("registry", registry_setup, args.turns)
+    print(f"Saved {before - after:.3f} ms/turn in setup alone "
+          f"(plus one TCP/TLS handshake per LLM call, since per-call clients never reuse connections)")
+    assert get_llm() is get_llm("gpt-4o", 0)
+    assert question_generator._chain() is question_generator._chain()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import time
+import urllib.request
+import uuid
+
+# 시나리오 (user_scenario_test.py와 같은 순차 대화)
+SCENARIO = ["속이 쓰려요", "명치", "소화제 먹었어요"]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_replay_server(cassette: str, args) -> subprocess.Popen:
+    port = free_port()
+    command = [sys.executable, "-m", "src.replay_server", "--cassette", cassette, "--port", str(port),
+               "--latency-scale", str(args.latency_scale), "--jitter-ms", str(args.jitter_ms)]
+    if args.latency_ms is not None:
+        command += ["--latency-ms", str(args.latency_ms)]
+    server = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1).read()
+            break
+        except OSError:
+            time.sleep(0.05)
+    os.environ.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{port}/v1",
+        "TAVILY_BASE_URL": f"http://127.0.0.1:{port}",
+        "OPENAI_API_KEY": "replay",
+        "TAVILY_API_KEY": "replay",
+    })
+    return server
+
+async def run_scenario(graph) -> list:
+    from langchain_core.messages import HumanMessage
+    from src.utils.deadline import deadline_after
+    thread_id = str(uuid.uuid4())
+    durations = []
+    for text in SCENARIO:
+        config = {"configurable": {"thread_id": thread_id, "deadline_at": deadline_after()}}
+        started = time.perf_counter()
+        async for _ in graph.astream({"messages": [HumanMessage(content=text)], "degraded": None}, config=config):
+            pass
+        durations.append(time.perf_counter() - started)
+    return durations
+
+async def main():
+    parser = argparse.ArgumentParser(description="Full create_graph() pipeline benchmark (record live once, replay offline)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", metavar="CASSETTE", help="실제 OpenAI/Tavily로 시나리오를 실행하며 카세트 녹화")
+    mode.add_argument("--replay", metavar="CASSETTE", help="재생 서버로 시나리오를 반복 실행")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=None)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="녹화 당시 지연에 곱할 배율 (0이면 지연 없음)")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    # 응답 캐시가 켜져 있으면 녹화/재생 시 HTTP 호출 자체가 생략되므로 끕니다.
+    os.environ["LLM_CACHE"] = "0"
+    server = None
+    if args.record:
+        if os.path.exists(args.record):
+            os.remove(args.record)
+        os.environ["REPLAY_RECORD"] = args.record
+        args.iterations = 1
+    else:
+        server = start_replay_server(args.replay, args)
+
+    try:
+        from src.graph import create_graph
+        from src.utils.cache import medical_search_cache
+        graph = create_graph()
+        turns = []
+        for _ in range(args.iterations):
+            medical_search_cache.clear()
+            turns.extend(await run_scenario(graph))
+        turns_ms = sorted(t * 1000 for t in turns)
+        p95 = turns_ms[min(len(turns_ms) - 1, int(len(turns_ms) * 0.95))]
+        print(f"{len(turns_ms)} turns: p50 {statistics.median(turns_ms):.0f} ms, p95 {p95:.0f} ms, mean {statistics.mean(turns_ms):.0f} ms")
+        if server is not None:
+            print(urllib.request.urlopen(os.environ["TAVILY_BASE_URL"] + "/stats").read().decode())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    asyncio.run(main())
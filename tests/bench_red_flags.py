@@ -0,0 +1,63 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from src.utils.red_flags import scan
+
+EMERGENCY_MESSAGES = [
+    "가슴이 쥐어짜듯 아프고 숨이 안 쉬어져",
+    "갑자기 한쪽 팔다리에 힘이 빠지고 말이 어눌해졌어요",
+    "아이가 경련을 하다가 의식을 잃었어요",
+    "crushing chest pain and I can't breathe",
+]
+ROUTINE_MESSAGES = [
+    "속이 쓰려요",
+    "머리가 지끈거리고 속이 메스꺼워요. 흉통은 없어요.",
+    "목구멍이 따끔거리고 기침이 나요",
+    "I have a mild headache, no chest pain",
+]
+
+def bench_scan(iterations: int):
+    """탐지기 단독 지연 (메시지당 마이크로초)"""
+    for name, messages in (("emergency", EMERGENCY_MESSAGES), ("routine", ROUTINE_MESSAGES)):
+        samples = []
+        for _ in range(iterations):
+            for message in messages:
+                start = time.perf_counter()
+                scan(message)
+                samples.append((time.perf_counter() - start) * 1e6)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"scan[{name:>9}]: p50 {statistics.median(samples):.1f} us, p99 {p99:.1f} us")
+
+async def bench_emergency_turn(iterations: int):
+    """create_graph()로 응급 메시지 한 턴 전체 (red_flag_screen -> emergency_response, LLM 호출 없음)"""
+    from langchain_core.messages import HumanMessage
+    from src.graph import create_graph
+    from src.utils.checkpointer import BoundedMemorySaver
+    graph = create_graph(BoundedMemorySaver())
+    samples = []
+    for i in range(iterations):
+        message = EMERGENCY_MESSAGES[i % len(EMERGENCY_MESSAGES)]
+        config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+        start = time.perf_counter()
+        result = await graph.ainvoke({"messages": [HumanMessage(content=message)], "degraded": None}, config=config)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert result["next_step"] == "emergency"
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"emergency turn: p50 {statistics.median(samples):.2f} ms, p95 {p95:.2f} ms ({iterations} turns)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Red-flag fast lane latency benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--graph-iterations", type=int, default=200)
+    args = parser.parse_args()
+    bench_scan(args.iterations)
+    asyncio.run(bench_emergency_turn(args.graph_iterations))
@@ -0,0 +1,71 @@
+import sys
+import os
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+import argparse
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+
+def measure_import(runs: int) -> float:
+    """새 인터프리터에서 `import src.api`에 걸리는 시간 (초, 최솟값)"""
+    code = "import time; t = time.perf_counter(); import src.api; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(samples)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def wait_for(url: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return False
+
+def measure_first_request(timeout: float):
+    """uvicorn 프로세스 시작부터 /ready 200, 첫 요청 응답까지 걸리는 시간"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        if not wait_for(f"{base}/ready", started + timeout):
+            raise RuntimeError("서버가 준비 상태가 되지 않았습니다.")
+        ready = time.perf_counter() - started
+        with urllib.request.urlopen(f"{base}/", timeout=5) as response:
+            response.read()
+        first = time.perf_counter() - started
+        return ready, first
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start: import time and time-to-first-request")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    print(f"import src.api       : {measure_import(args.runs) * 1000:.0f} ms")
+    ready, first = measure_first_request(args.timeout)
+    print(f"process -> /ready    : {ready * 1000:.0f} ms")
+    print(f"process -> 1st reply : {first * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
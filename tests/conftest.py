@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+class FakeSearch:
+    """
+    Tavily 대신 쓰는 가짜 검색 도구입니다. 받은 쿼리와 최대 동시 실행 수를 기록합니다.
+
+    Args:
+        results: 돌려줄 결과 목록, 또는 (호출 순번, 쿼리)를 받아 결과 목록을 만드는 함수
+        delay (float): 검색 한 번에 걸리는 시간 (초)
+        fail_on (str): 이 문자열이 들어간 쿼리는 실패시킴
+    """
+    def __init__(self, results=None, delay=0.0, fail_on=None):
+        self.results = results if results is not None else []
+        self.delay = delay
+        self.fail_on = fail_on
+        self.queries = []
+        self.active = 0
+        self.max_active = 0
+
+    @property
+    def calls(self):
+        return len(self.queries)
+
+    async def ainvoke(self, query, config=None):
+        index = len(self.queries)
+        self.queries.append(query)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_on and self.fail_on in query:
+                raise ValueError("search failed")
+            return self.results(index, query) if callable(self.results) else self.results
+        finally:
+            self.active -= 1
+
+@pytest.fixture
+def use_search(monkeypatch):
+    """
+    medical_rag가 주어진 가짜 검색 도구를 쓰게 합니다.
+    로컬 근거 인덱스가 빌드된 환경에서도 Tavily 경로를 타도록 LOCAL_INDEX를 끄고,
+    검색 캐시와 추측 검색 기록은 테스트 앞뒤로 비워 다른 테스트에 새지 않게 합니다.
+    """
+    from src.nodes import medical_rag
+    from src.utils.cache import medical_search_cache
+
+    def use(search):
+        monkeypatch.setattr(medical_rag, "get_search_tool", lambda: search)
+        return search
+
+    monkeypatch.setattr(medical_rag, "LOCAL_INDEX", False)
+    monkeypatch.setattr(medical_rag, "_speculations", {})
+    medical_search_cache.clear()
+    yield use
+    medical_search_cache.clear()
@@ -0,0 +1,25 @@
+import requests
+import time
+
+def test_live_batch():
+    url = "http://localhost:8000/chat/batch"
+    items = [
+        {"message": "머리가 너무 아파요"},
+        {"message": "속이 쓰려요"},
+        {"message": "기침이 나고 목이 아파요"},
+        {"message": "허리가 아파요"},
+    ]
+    
+    print(f"\n>>> Batch: {len(items)} items")
+    start = time.perf_counter()
+    resp = requests.post(url, json={"items": items, "concurrency": 4})
+    print(f"Status: {resp.status_code} ({time.perf_counter() - start:.2f}s)")
+    
+    for idx, result in enumerate(resp.json().get("results", [])):
+        if result.get("error"):
+            print(f"[{idx}] thread={result['thread_id']} ERROR: {result['error']}")
+        else:
+            print(f"[{idx}] thread={result['thread_id']} -> {result['response']['response']}")
+
+if __name__ == "__main__":
+    test_live_batch()
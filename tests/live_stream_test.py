@@ -0,0 +1,37 @@
+import requests
+import json
+import time
+import uuid
+
+def test_live_stream():
+    url = "http://localhost:8000/chat/stream"
+    thread_id = str(uuid.uuid4())
+    
+    print("\n>>> Stream: 가슴이 쥐어짜듯 아프고 숨이 차요")
+    start = time.perf_counter()
+    first_byte = None
+    
+    with requests.post(url, json={"message": "가슴이 쥐어짜듯 아프고 숨이 차요", "thread_id": thread_id}, stream=True) as resp:
+        print(f"Status: {resp.status_code}")
+        event = None
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line:
+                continue
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+                print(f"TTFB: {first_byte:.2f}s")
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "token":
+                    print(data["content"], end="", flush=True)
+                elif event == "node":
+                    print(f"\n[node] {data['node']} (next_step={data.get('next_step')})")
+                else:
+                    print(f"\n[{event}] {data}")
+    
+    print(f"\nTotal: {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    test_live_stream()
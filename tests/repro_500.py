@@ -4,9 +4,10 @@ sys.path.append(os.getcwd())
 
 from src.graph import create_graph
 from langchain_core.messages import HumanMessage
+import asyncio
 import uuid
 
-def test_graph():
+async def test_graph():
     graph = create_graph()
     thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
@@ -25,7 +26,7 @@ def test_graph():
         try:
             initial_state = {"messages": [HumanMessage(content=text)]}
             # stream 테스트 (api.py와 유사한 방식)
-            for event in graph.stream(initial_state, config=config):
+            async for event in graph.astream(initial_state, config=config):
                 for key, value in event.items():
                     print(f"Node: {key}")
                     # 여기서 NoneType 반복 오류가 나는지 확인
@@ -44,4 +45,4 @@ def test_graph():
             traceback.print_exc()
 
 if __name__ == "__main__":
-    test_graph()
+    asyncio.run(test_graph())
@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from src.utils.admission import AdmissionController, AdmissionRejected, is_urgent
+
+def test_priority_lane_and_rejection():
+    async def scenario():
+        controller = AdmissionController(max_inflight=1, max_queue=2, max_priority_queue=1)
+        order = []
+
+        async def job(name, priority):
+            try:
+                async with controller.admit(priority):
+                    order.append(name)
+                    await asyncio.sleep(0.01)
+            except AdmissionRejected as e:
+                assert e.retry_after >= 1
+                order.append(f"rejected:{name}")
+
+        tasks = []
+        for name, priority in [("a", "normal"), ("b", "normal"), ("c", "normal"), ("d", "normal"), ("h", "high"), ("h2", "high")]:
+            tasks.append(asyncio.create_task(job(name, priority)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return controller, order
+
+    controller, order = asyncio.run(scenario())
+    print(f"Admission order: {order}")
+
+    # 우선 대기열 요청은 먼저 대기 중이던 일반 요청보다 먼저 실행됨
+    assert order.index("h") < order.index("b")
+    assert "rejected:d" in order and "rejected:h2" in order
+    stats = controller.stats()
+    assert stats["inflight"] == 0
+    assert stats["lanes"]["normal"]["rejected"] == 1
+
+def test_is_urgent():
+    assert is_urgent("가슴이 쥐어짜듯 아프고 숨이 안 쉬어져")
+    assert is_urgent("I have crushing chest pain")
+    assert not is_urgent("감기 기운이 있어요")
+
+if __name__ == "__main__":
+    test_priority_lane_and_rejection()
+    test_is_urgent()
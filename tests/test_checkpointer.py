@@ -0,0 +1,129 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import operator
+import tempfile
+import time
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import StateGraph, START, END
+from src.utils.checkpointer import BoundedMemorySaver, RetentionPolicy, SQLiteCheckpointer
+
+class State(TypedDict):
+    turns: Annotated[List[str], operator.add]
+    note: str
+
+def build(saver):
+    async def step(state):
+        return {"turns": ["turn"], "note": f"note-{len(state.get('turns') or [])}"}
+
+    builder = StateGraph(State)
+    builder.add_node("step", step)
+    builder.add_edge(START, "step")
+    builder.add_edge("step", END)
+    return builder.compile(checkpointer=saver)
+
+class CountingSerde:
+    """역직렬화 횟수를 세는 serde 래퍼"""
+    def __init__(self, inner):
+        self.inner = inner
+        self.loads = 0
+
+    def dumps_typed(self, obj):
+        return self.inner.dumps_typed(obj)
+
+    def loads_typed(self, data):
+        self.loads += 1
+        return self.inner.loads_typed(data)
+
+def run_turns(saver, thread_ids, turns):
+    graph = build(saver)
+
+    async def scenario():
+        for _ in range(turns):
+            for thread_id in thread_ids:
+                await graph.ainvoke({"turns": []}, config={"configurable": {"thread_id": thread_id}})
+
+    asyncio.run(scenario())
+    return graph
+
+def test_pruning_drops_unreferenced_blobs():
+    saver = BoundedMemorySaver(RetentionPolicy(keep_last=1, ttl_seconds=0))
+    graph = run_turns(saver, ["a"], 5)
+    checkpoints = saver.storage["a"][""]
+    assert len(checkpoints) == 1
+    (checkpoint_id,) = checkpoints
+    referenced = {("a", "", channel, version) for channel, version in saver.channel_versions["a"][("", checkpoint_id)].items()}
+    assert set(saver.blobs) == referenced
+    # 정리 후에도 최신 상태는 그대로 복원됨
+    state = graph.get_state({"configurable": {"thread_id": "a"}})
+    assert len(state.values["turns"]) == 5
+
+def test_sweep_expires_idle_threads_without_deserializing():
+    saver = BoundedMemorySaver(RetentionPolicy(keep_last=1, ttl_seconds=3600, sweep_interval_seconds=3600))
+    run_turns(saver, ["idle", "active"], 2)
+    saver.last_seen["idle"] -= 7200
+    saver.serde = CountingSerde(saver.serde)
+    assert saver.sweep() == 1
+    assert saver.serde.loads == 0
+    assert "idle" not in saver.storage and "idle" not in saver.channel_versions
+    assert all(key[0] == "active" for key in saver.blobs)
+
+def test_async_put_runs_due_sweep():
+    saver = BoundedMemorySaver(RetentionPolicy(keep_last=1, ttl_seconds=3600, sweep_interval_seconds=0))
+    run_turns(saver, ["idle"], 1)
+    saver.last_seen["idle"] -= 7200
+    run_turns(saver, ["active"], 1)
+    assert list(saver.storage) == ["active"]
+
+def test_async_sweep_keeps_thread_that_became_active():
+    saver = BoundedMemorySaver(RetentionPolicy(keep_last=1, ttl_seconds=3600, sweep_interval_seconds=0))
+    graph = build(saver)
+    select = saver._expired_threads
+    calls = []
+
+    def slow_select(last_seen, thread_ids):
+        expired = select(last_seen, thread_ids)
+        calls.append(expired)
+        if len(calls) == 1:
+            time.sleep(0.2)  # 선별 중에 "idle" 스레드에 새 턴이 들어옴
+        return expired
+
+    saver._expired_threads = slow_select
+
+    async def scenario():
+        await graph.ainvoke({"turns": []}, config={"configurable": {"thread_id": "idle"}})
+        saver.last_seen["idle"] -= 7200
+        calls.clear()
+
+        async def resume_idle():
+            await asyncio.sleep(0.05)
+            await graph.ainvoke({"turns": []}, config={"configurable": {"thread_id": "idle"}})
+
+        await asyncio.gather(graph.ainvoke({"turns": []}, config={"configurable": {"thread_id": "active"}}), resume_idle())
+
+    asyncio.run(scenario())
+    assert "idle" in calls[0]
+    state = graph.get_state({"configurable": {"thread_id": "idle"}})
+    assert len(state.values["turns"]) == 2
+
+def test_async_memory_report_matches_sync():
+    memory = BoundedMemorySaver(RetentionPolicy(keep_last=1, ttl_seconds=0))
+    run_turns(memory, ["a", "b"], 2)
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = SQLiteCheckpointer(os.path.join(directory, "checkpoints.db"), retention=RetentionPolicy(keep_last=1, ttl_seconds=0))
+        run_turns(sqlite, ["a"], 2)
+        for saver, threads in ((memory, 2), (sqlite, 1)):
+            report = asyncio.run(saver.amemory_report())
+            assert report == saver.memory_report()
+            assert report["threads"] == threads and report["total_bytes"] > 0
+
+if __name__ == "__main__":
+    test_pruning_drops_unreferenced_blobs()
+    test_sweep_expires_idle_threads_without_deserializing()
+    test_async_put_runs_due_sweep()
+    test_async_sweep_keeps_thread_that_became_active()
+    test_async_memory_report_matches_sync()
+    print("checkpointer tests passed")
@@ -1,5 +1,6 @@
 from src.nodes.diagnosis_generator import diagnosis_generator_node
 from langchain_core.messages import HumanMessage
+import asyncio
 
 def test_diagnosis_formatting():
     print("Testing Diagnosis Generator Formatting...")
@@ -14,7 +15,7 @@ def test_diagnosis_formatting():
     }
     
     try:
-        result = diagnosis_generator_node(state)
+        result = asyncio.run(diagnosis_generator_node(state, {}))
         diagnosis = result.get("diagnosis_hypothesis", "")
         
         print("\n--- Generated Diagnosis ---")
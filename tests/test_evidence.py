@@ -0,0 +1,31 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.evidence import dedupe, bm25_rank, pack_evidence, estimate_tokens, TOKEN_BUDGET
+
+GERD = "Gastroesophageal reflux disease (GERD) causes heartburn and epigastric pain after meals. Antacids relieve symptoms."
+GERD_COPY = "Gastroesophageal reflux disease (GERD) causes heartburn and epigastric pain after meals.  Antacids relieve symptoms!"
+MIGRAINE = "Migraine is a primary headache disorder with throbbing pain, nausea and sensitivity to light."
+ULCER = "Peptic ulcer disease presents with epigastric pain; heartburn and bloating are common. Endoscopy confirms the diagnosis."
+
+def test_near_duplicates_are_removed_keeping_first():
+    assert dedupe([GERD, MIGRAINE, GERD_COPY]) == [GERD, MIGRAINE]
+
+def test_bm25_puts_symptom_matches_first_and_keeps_order_on_ties():
+    ranked = bm25_rank([MIGRAINE, ULCER, GERD], "epigastric pain heartburn")
+    assert ranked[-1] == MIGRAINE
+    assert bm25_rank([MIGRAINE, GERD], "") == [MIGRAINE, GERD]
+
+def test_packing_respects_node_budget():
+    long_passages = [f"Passage {i} about epigastric pain and heartburn management. " * 30 for i in range(10)]
+    packed = pack_evidence(long_passages, ["epigastric pain"], "research_critic")
+    assert estimate_tokens(packed) <= TOKEN_BUDGET["research_critic"] + 1
+    assert packed.startswith("Passage")
+    assert pack_evidence([], ["두통"], "diagnosis_generator") == ""
+
+if __name__ == "__main__":
+    test_near_duplicates_are_removed_keeping_first()
+    test_bm25_puts_symptom_matches_first_and_keeps_order_on_ties()
+    test_packing_respects_node_budget()
+    print("evidence tests passed")
@@ -7,8 +7,12 @@ from langchain_core.messages import HumanMessage
 from src.graph import create_graph
 from langchain_core.messages import HumanMessage
 from langgraph.checkpoint.memory import MemorySaver
+import asyncio
 
 def test_graph_multiturn():
+    asyncio.run(_graph_multiturn())
+
+async def _graph_multiturn():
     print("Initializing Graph with Memory Checkpointer...")
     memory = MemorySaver()
     # create_graph() needs to be modified to accept checkpointer if it doesn't already?
@@ -35,8 +39,8 @@ def test_graph_multiturn():
     
     symptoms_v1 = []
     
-    events = graph.stream(state_v1)
-    for event in events:
+    events = graph.astream(state_v1)
+    async for event in events:
         for key, value in event.items():
             if "symptoms" in value:
                 symptoms_v1 = value["symptoms"]
@@ -51,8 +55,8 @@ def test_graph_multiturn():
         "symptoms": symptoms_v1 # This is crucial. The API does this via checkpointing.
     }
     
-    events = graph.stream(state_v2)
-    for event in events:
+    events = graph.astream(state_v2)
+    async for event in events:
          for key, value in event.items():
             if "symptoms" in value:
                 print(f"Turn 2 Symptoms: {value['symptoms']}")
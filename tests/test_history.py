@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from src.utils import history
+from src.utils.history import merge_messages, format_transcript
+
+def run_session(turns: int):
+    messages = []
+    for i in range(turns):
+        messages = merge_messages(messages, [HumanMessage(content=f"{i}번째 증상: 머리가 아파요")])
+        messages = merge_messages(messages, [AIMessage(content="언제부터 아프셨나요? " * 20)])
+    return messages
+
+def test_window_is_bounded_and_old_turns_are_summarized():
+    messages = run_session(50)
+    summary, window = messages[0], messages[1:]
+
+    assert isinstance(summary, SystemMessage)
+    assert len(window) == history.HISTORY_WINDOW
+    assert window[-1].type == "ai"
+    # 창 밖으로 밀려난 환자 발화만 요약에 남고, 길이는 제한됨
+    assert "환자: 39번째 증상" in summary.content
+    assert "AI:" not in summary.content
+    assert len(summary.content) <= history.HISTORY_SUMMARY_CHARS + len(history.SUMMARY_HEADER) + 1
+
+def test_state_and_transcript_size_stay_constant():
+    short = format_transcript(run_session(100))
+    long = format_transcript(run_session(300))
+    assert abs(len(long) - len(short)) < 50
+    assert short.startswith(history.SUMMARY_HEADER)
+    assert len(run_session(300)) == history.HISTORY_WINDOW + 1
+
+def test_short_conversation_is_unchanged():
+    messages = merge_messages([HumanMessage(content="배가 아파요")], [AIMessage(content="어느 부위인가요?")])
+    assert len(messages) == 2
+    assert format_transcript(messages) == "환자: 배가 아파요\nAI: 어느 부위인가요?"
+
+if __name__ == "__main__":
+    test_window_is_bounded_and_old_turns_are_summarized()
+    test_state_and_transcript_size_stay_constant()
+    test_short_conversation_is_unchanged()
+    print("history tests passed")
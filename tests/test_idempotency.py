@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from src.utils.idempotency import IdempotencyStore, IdempotencyConflict
+
+def test_retry_joins_running_execution_and_replays_result():
+    async def scenario():
+        store = IdempotencyStore(max_size=10, ttl_seconds=60)
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "응답"
+
+        # 첫 요청과 재시도가 동시에 도착 -> 한 번만 실행
+        first, retry = await asyncio.gather(
+            store.run("thread-1:req-1", "머리가 아파요", work),
+            store.run("thread-1:req-1", "머리가 아파요", work),
+        )
+        # 완료 후 재시도 -> 저장된 응답 반환
+        replay = await store.run("thread-1:req-1", "머리가 아파요", work)
+        return store, calls, first, retry, replay
+
+    store, calls, first, retry, replay = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first == ("응답", False)
+    assert retry == ("응답", True)
+    assert replay == ("응답", True)
+    assert store.stats()["joined"] == 1 and store.stats()["replayed"] == 1
+
+def test_conflicting_payload_and_failed_run_are_not_stored():
+    async def scenario():
+        store = IdempotencyStore(max_size=10, ttl_seconds=60)
+
+        async def fail():
+            raise RuntimeError("upstream error")
+
+        async def ok():
+            return "ok"
+
+        try:
+            await store.run("t:r", "a", fail)
+        except RuntimeError:
+            pass
+        # 실패한 실행은 저장되지 않으므로 재시도 시 다시 실행됨
+        result = await store.run("t:r", "a", ok)
+
+        conflict = False
+        try:
+            await store.run("t:r", "b", ok)
+        except IdempotencyConflict:
+            conflict = True
+        return result, conflict
+
+    result, conflict = asyncio.run(scenario())
+    assert result == ("ok", False)
+    assert conflict
+
+def test_idempotency_key_requires_thread_id():
+    from fastapi import HTTPException, Response
+    from src import api
+
+    async def scenario():
+        try:
+            await api.chat_endpoint(api.ChatRequest(message="머리가 아파요", request_id="req-1"), Response(), None)
+        except HTTPException as e:
+            return e.status_code
+
+    assert asyncio.run(scenario()) == 400
+
+if __name__ == "__main__":
+    test_retry_joins_running_execution_and_replays_result()
+    test_conflicting_payload_and_failed_run_are_not_stored()
+    test_idempotency_key_requires_thread_id()
@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import tempfile
+import time
+from langchain_core.outputs import Generation
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.metrics import current_node, llm_calls, llm_metrics_handler
+
+LLM_STRING = "model=gpt-4o,temperature=0"
+
+def in_node(node, fn, *args):
+    token = current_node.set(node)
+    try:
+        return fn(*args)
+    finally:
+        current_node.reset(token)
+
+def test_repeat_prompt_hits_only_for_enabled_nodes():
+    cache = LLMResponseCache(policy={"specialist_router": 60})
+    answer = [Generation(text="general_advice")]
+
+    in_node("specialist_router", cache.update, "증상: 두통", LLM_STRING, answer)
+    assert in_node("specialist_router", cache.lookup, "증상: 두통", LLM_STRING)[0].text == "general_advice"
+    # 모델/파라미터가 다르거나 프롬프트가 다르면 적중하지 않음
+    assert in_node("specialist_router", cache.lookup, "증상: 두통", "model=gpt-4o-mini,temperature=0") is None
+    assert in_node("specialist_router", cache.lookup, "증상: 복통", LLM_STRING) is None
+    # 정책에 없는 노드는 조회/저장 모두 통과
+    in_node("diagnosis_generator", cache.update, "진단", LLM_STRING, answer)
+    assert in_node("diagnosis_generator", cache.lookup, "진단", LLM_STRING) is None
+
+    nodes = cache.stats()["nodes"]["specialist_router"]
+    assert nodes["hit_memory"] >= 1 and nodes["miss"] >= 2
+
+def test_per_node_ttl_expires_entries():
+    cache = LLMResponseCache(policy={"research_critic": 0.05})
+    in_node("research_critic", cache.update, "근거 평가", LLM_STRING, [Generation(text="SUFFICIENT")])
+    time.sleep(0.1)
+    assert in_node("research_critic", cache.lookup, "근거 평가", LLM_STRING) is None
+
+def test_disk_tier_survives_new_process_instance():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+        first = LLMResponseCache(policy={"medication_search": 60}, db_path=path)
+        in_node("medication_search", first.update, "약물: 타이레놀", LLM_STRING, [Generation(text="타이레놀")])
+
+        second = LLMResponseCache(policy={"medication_search": 60}, db_path=path)
+
+        async def lookup():
+            token = current_node.set("medication_search")
+            try:
+                return await second.alookup("약물: 타이레놀", LLM_STRING)
+            finally:
+                current_node.reset(token)
+
+        assert asyncio.run(lookup())[0].text == "타이레놀"
+
+def test_cache_hits_are_not_counted_as_llm_calls():
+    from langchain_core.language_models import FakeListChatModel
+    model = FakeListChatModel(responses=["general_advice", "emergency"], cache=LLMResponseCache(policy={"cache_metrics_test": 60}),
+                              callbacks=[llm_metrics_handler])
+
+    async def ask_twice():
+        token = current_node.set("cache_metrics_test")
+        try:
+            return [(await model.ainvoke("증상: 두통")).content for _ in range(2)]
+        finally:
+            current_node.reset(token)
+
+    assert asyncio.run(ask_twice()) == ["general_advice", "general_advice"]
+    calls = sum(count for (node, _), count in llm_calls.values.items() if node == "cache_metrics_test")
+    assert calls == 1
+
+if __name__ == "__main__":
+    test_repeat_prompt_hits_only_for_enabled_nodes()
+    test_per_node_ttl_expires_entries()
+    test_disk_tier_survives_new_process_instance()
+    test_cache_hits_are_not_counted_as_llm_calls()
+    print("llm cache tests passed")
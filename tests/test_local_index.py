@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import shutil
+import tempfile
+
+from src.nodes import medical_rag
+from src.utils import local_index
+
+CORPUS = {
+    "neuro.jsonl": [
+        {"title": "긴장성 두통", "url": "https://example.org/tension", "content": "긴장성 두통은 머리 양쪽이 조이는 듯한 두통으로 스트레스와 수면 부족이 흔한 원인입니다."},
+        {"title": "이석증", "url": "https://example.org/bppv", "content": "이석증은 고개를 돌릴 때 빙빙 도는 어지럼증이 짧게 반복되는 질환입니다."},
+    ],
+    "gi.jsonl": [
+        {"title": "위염", "url": "https://example.org/gastritis", "content": "위염은 명치 통증과 속쓰림, 더부룩함이 나타나며 과음과 소염진통제가 원인이 될 수 있습니다."},
+    ],
+}
+
+class FailingSearch:
+    async def ainvoke(self, query, config=None):
+        raise AssertionError("local hit should not call Tavily")
+
+def write_corpus(directory, corpus):
+    for name, records in corpus.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write("\n".join(json.dumps(record, ensure_ascii=False) for record in records))
+
+def with_index(test):
+    def run():
+        workdir = tempfile.mkdtemp()
+        corpus_dir, index_dir = os.path.join(workdir, "corpus"), os.path.join(workdir, "index")
+        os.makedirs(corpus_dir)
+        write_corpus(corpus_dir, CORPUS)
+        previous = local_index.LOCAL_INDEX_DIR
+        local_index.LOCAL_INDEX_DIR = index_dir
+        try:
+            test(corpus_dir, index_dir)
+        finally:
+            local_index.LOCAL_INDEX_DIR = previous
+            shutil.rmtree(workdir)
+    run.__name__ = test.__name__
+    return run
+
+@with_index
+def test_search_ranks_matching_passage_first(corpus_dir, index_dir):
+    local_index.build(corpus_dir, index_dir)
+    hits = local_index.get_local_index(index_dir).search("속쓰림 명치 통증")
+    assert hits[0].title == "위염" and 0 < hits[0].score <= 1
+
+@with_index
+def test_incremental_build_reuses_unchanged_files(corpus_dir, index_dir):
+    first = local_index.build(corpus_dir, index_dir)
+    assert sorted(first["rebuilt"]) == ["gi.jsonl", "neuro.jsonl"]
+    assert local_index.build(corpus_dir, index_dir)["changed"] is False
+
+    write_corpus(corpus_dir, {"gi.jsonl": CORPUS["gi.jsonl"] + [{"title": "변비", "url": "https://example.org/constipation", "content": "변비는 배변 횟수가 줄고 변이 딱딱해지는 상태입니다."}]})
+    second = local_index.build(corpus_dir, index_dir)
+    assert second["rebuilt"] == ["gi.jsonl"] and second["reused"] == ["neuro.jsonl"]
+    assert second["num_docs"] == 4
+    # CURRENT가 바뀌면 다음 조회부터 새 세대를 사용
+    assert local_index.get_local_index(index_dir).search("변비")[0].title == "변비"
+
+@with_index
+def test_forced_rebuild_starts_a_new_generation(corpus_dir, index_dir):
+    first = local_index.build(corpus_dir, index_dir, force=True)
+    second = local_index.build(corpus_dir, index_dir, force=True)
+    assert second["changed"] is True and second["generation"] > first["generation"]
+    assert sorted(second["rebuilt"]) == ["gi.jsonl", "neuro.jsonl"] and second["reused"] == []
+    assert local_index.get_local_index(index_dir).search("두통")[0].title == "긴장성 두통"
+
+@with_index
+def test_lookup_falls_back_when_symptom_is_not_covered(corpus_dir, index_dir):
+    local_index.build(corpus_dir, index_dir)
+    assert local_index.lookup(["두통"]) is not None
+    assert local_index.lookup(["두통", "손목 통증"]) is None
+
+@with_index
+def test_medical_rag_uses_local_index_without_network(corpus_dir, index_dir):
+    local_index.build(corpus_dir, index_dir)
+    medical_rag.get_search_tool = lambda: FailingSearch()
+    previous, medical_rag.LOCAL_INDEX = medical_rag.LOCAL_INDEX, True
+    try:
+        result = asyncio.run(medical_rag.medical_rag_node({"symptoms": ["명치 통증", "속쓰림"]}, {}))
+    finally:
+        medical_rag.LOCAL_INDEX = previous
+    assert result["medical_evidence"][0].startswith("위염:")
+    assert result["evidence_added"] == len(result["medical_evidence"])
+
+if __name__ == "__main__":
+    test_search_ranks_matching_passage_first()
+    test_incremental_build_reuses_unchanged_files()
+    test_forced_rebuild_starts_a_new_generation()
+    test_lookup_falls_back_when_symptom_is_not_covered()
+    test_medical_rag_uses_local_index_without_network()
+    print("local index tests passed")
@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+from src.utils.llm import load_model_policy
+
+def test_lightweight_nodes_use_small_model_and_diagnosis_stays_on_gpt4o():
+    os.environ.pop("LLM_MODEL_POLICY", None)
+    os.environ.pop("LLM_MODEL_POLICY_FILE", None)
+    policy = load_model_policy()
+    for node in ("specialist_router", "research_critic", "medication_search"):
+        assert policy[node]["model"] == "gpt-4o-mini"
+        assert policy[node]["fallback"] == "gpt-4o"
+    assert policy["diagnosis_generator"] == {"model": "gpt-4o", "fallback": None, "timeout": None}
+
+def test_file_and_env_overrides_merge_per_key():
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"research_critic": {"model": "gpt-4o"}, "fact_checker": {"timeout": 5}}, f)
+    try:
+        os.environ["LLM_MODEL_POLICY_FILE"] = f.name
+        os.environ["LLM_MODEL_POLICY"] = json.dumps({"research_critic": {"timeout": 3}})
+        policy = load_model_policy()
+    finally:
+        os.environ.pop("LLM_MODEL_POLICY_FILE", None)
+        os.environ.pop("LLM_MODEL_POLICY", None)
+        os.unlink(f.name)
+
+    assert policy["research_critic"] == {"model": "gpt-4o", "fallback": "gpt-4o", "timeout": 3}
+    # 기본 정책에 없는 노드는 default 항목을 바탕으로 병합
+    assert policy["fact_checker"] == {"model": "gpt-4o", "fallback": "gpt-4o-mini", "timeout": 5}
+
+def test_warm_up_builds_only_the_clients_nodes_use():
+    import asyncio
+    from src.utils import llm
+    os.environ.pop("LLM_MODEL_POLICY", None)
+    os.environ.pop("LLM_MODEL_POLICY_FILE", None)
+    previous_key = os.environ.get("OPENAI_API_KEY")
+    os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+    for cached in (llm.get_model_policy, llm.get_node_llm, llm.get_llm):
+        cached.cache_clear()
+    try:
+        # 연결 예열 자체는 실패해도 되므로 타임아웃을 짧게 둡니다.
+        asyncio.run(llm.warm_up(timeout=0.001))
+        warmed = llm.get_llm.cache_info()
+
+        # 노드가 다시 클라이언트를 요청해도 새 인스턴스가 생기지 않아야 합니다.
+        llm.get_node_llm.cache_clear()
+        for node in list(llm.get_model_policy()) + ["unlisted_node"]:
+            llm.get_node_llm(node)
+        assert llm.get_llm.cache_info().misses == warmed.misses
+
+        policy = llm.get_model_policy()
+        expected = set()
+        for entry in policy.values():
+            fallback = entry.get("fallback")
+            if not fallback or fallback == entry["model"]:
+                expected.add((entry["model"], None))
+            else:
+                expected.add((entry["model"], entry.get("timeout")))
+                expected.add((fallback, None))
+        assert warmed.currsize == len(expected)
+    finally:
+        if previous_key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+        for cached in (llm.get_model_policy, llm.get_node_llm, llm.get_llm):
+            cached.cache_clear()
+
+if __name__ == "__main__":
+    test_lightweight_nodes_use_small_model_and_diagnosis_stays_on_gpt4o()
+    test_file_and_env_overrides_merge_per_key()
+    test_warm_up_builds_only_the_clients_nodes_use()
+    print("model policy tests passed")
@@ -0,0 +1,62 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+from conftest import FakeSearch
+from src.nodes import medical_rag
+
+PASSAGES = [
+    "Tension-type headache presents as bilateral pressing pain relieved by rest and analgesics.",
+    "Dyspepsia causes epigastric burning after meals; proton pump inhibitors are first-line therapy.",
+    "Acute cough is usually viral and self-limiting within three weeks in otherwise healthy adults.",
+    "Combined presentations require history taking to separate unrelated complaints from one syndrome.",
+]
+
+def guideline_results(index, query):
+    return [
+        {"url": "https://guidelines.example/shared", "content": "Shared guideline passage about common symptoms."},
+        {"url": f"https://guidelines.example/{index}", "content": PASSAGES[index % len(PASSAGES)]},
+    ]
+
+@pytest.fixture
+def run_node(use_search, monkeypatch):
+    monkeypatch.setattr(medical_rag, "RAG_FANOUT", True)
+
+    def run(search, symptoms):
+        use_search(search)
+        return asyncio.run(medical_rag.medical_rag_node({"symptoms": symptoms}, {}))
+    return run
+
+def test_clusters_group_symptoms_by_body_system():
+    clusters = medical_rag.symptom_clusters(["두통", "명치 통증", "어지럼증", "설사"], 3)
+    assert clusters == [["두통", "어지럼증"], ["명치 통증", "설사"]]
+    # 묶음 수 제한을 넘으면 뒤쪽 묶음을 합침
+    assert len(medical_rag.symptom_clusters(["두통", "기침", "발진", "허리 통증"], 2)) == 2
+
+def test_fanout_searches_clusters_in_parallel_and_merges_by_url(run_node):
+    search = FakeSearch(guideline_results, delay=0.02)
+    result = run_node(search, ["두통", "명치 통증", "기침"])
+    # 전체 쿼리 + 묶음 3개
+    assert len(search.queries) == 4
+    assert search.max_active == medical_rag.RAG_CONCURRENCY
+    evidence = result["medical_evidence"]
+    assert sum(1 for passage in evidence if passage.startswith("Shared guideline")) == 1
+    assert len(evidence) == 5
+
+def test_partial_failure_keeps_other_results(run_node):
+    search = FakeSearch(guideline_results, delay=0.02, fail_on="기침")
+    result = run_node(search, ["두통", "기침"])
+    assert result["degraded"] == ["medical_rag:partial"]
+    assert result["medical_evidence"]
+
+def test_single_cluster_sends_one_query(run_node):
+    search = FakeSearch(guideline_results, delay=0.02)
+    run_node(search, ["두통", "어지럼증"])
+    assert len(search.queries) == 1
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
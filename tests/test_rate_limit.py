@@ -0,0 +1,92 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from src.utils.rate_limit import AdaptiveConcurrency, OutboundLimiter, RateLimitQueueTimeout, estimate_prompt_tokens
+
+class RateLimitError(Exception):
+    status_code = 429
+
+def test_aimd_grows_on_success_and_halves_on_429():
+    concurrency = AdaptiveConcurrency(initial=4, min_limit=1, max_limit=8, cooldown_seconds=0)
+
+    async def run():
+        await concurrency.acquire()
+        concurrency.release(latency=0.1)
+        grown = concurrency.limit
+        await concurrency.acquire()
+        reason = concurrency.release(overloaded=True)
+        return grown, reason
+
+    grown, reason = asyncio.run(run())
+    assert grown > 4
+    assert reason == "429" and concurrency.limit == grown / 2
+
+def test_latency_spike_backs_off():
+    concurrency = AdaptiveConcurrency(initial=4, latency_tolerance=2.0, cooldown_seconds=0)
+
+    async def run():
+        for latency in (0.1, 0.1, 1.0):
+            await concurrency.acquire()
+            reason = concurrency.release(latency=latency)
+        return reason
+
+    assert asyncio.run(run()) == "latency"
+
+def test_calls_queue_for_a_slot_instead_of_failing():
+    limiter = OutboundLimiter("test", initial_concurrency=1, max_concurrency=1, max_wait_seconds=2)
+    order = []
+
+    async def call(name):
+        async with limiter.slot():
+            order.append(f"{name}:start")
+            await asyncio.sleep(0.05)
+            order.append(f"{name}:end")
+
+    async def run():
+        await asyncio.gather(call("a"), call("b"))
+
+    asyncio.run(run())
+    assert order == ["a:start", "a:end", "b:start", "b:end"]
+
+def test_rpm_bucket_rejects_beyond_max_wait():
+    limiter = OutboundLimiter("test", rpm=1, max_wait_seconds=1)
+
+    async def run():
+        async with limiter.slot():
+            pass
+        try:
+            async with limiter.slot():
+                pass
+        except RateLimitQueueTimeout:
+            return "rejected"
+
+    assert asyncio.run(run()) == "rejected"
+
+def test_429_inside_slot_reduces_concurrency():
+    limiter = OutboundLimiter("test", initial_concurrency=4)
+
+    async def run():
+        try:
+            async with limiter.slot():
+                raise RateLimitError()
+        except RateLimitError:
+            pass
+
+    asyncio.run(run())
+    assert limiter.concurrency.limit == 2 and limiter.concurrency.in_flight == 0
+
+def test_prompt_token_estimate_counts_all_messages():
+    body = {"messages": [{"role": "system", "content": "a" * 400}, {"role": "user", "content": [{"type": "text", "text": "b" * 40}, {"type": "image_url"}]}]}
+    assert estimate_prompt_tokens(body) == 100 + 10 + 85 + 8
+
+if __name__ == "__main__":
+    test_aimd_grows_on_success_and_halves_on_429()
+    test_latency_spike_backs_off()
+    test_calls_queue_for_a_slot_instead_of_failing()
+    test_rpm_bucket_rejects_beyond_max_wait()
+    test_429_inside_slot_reduces_concurrency()
+    test_prompt_token_estimate_counts_all_messages()
+    print("rate limit tests passed")
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.red_flags import AhoCorasick, scan, guidance
+
+def categories(text):
+    return [match.category for match in scan(text)]
+
+def test_korean_red_flags_ignore_spacing():
+    assert categories("가슴이 쥐어짜듯 아프고 숨이 안 쉬어져") == ["cardiac", "respiratory"]
+    assert categories("숨이안쉬어져요") == ["respiratory"]
+    assert categories("아버지가 갑자기 의식을 잃으셨어요") == ["consciousness"]
+
+def test_negated_mentions_are_not_flagged():
+    assert categories("흉통은 없어요") == []
+    assert categories("기절은 안 했어요") == []
+    assert categories("I have no chest pain") == []
+    # 다른 절의 부정은 영향을 주지 않음
+    assert categories("흉통이 있고 열은 없어요") == ["cardiac"]
+    assert categories("no fever but crushing chest pain") == ["cardiac"]
+
+def test_routine_complaints_pass_through():
+    for text in ["속이 쓰려요", "머리가 지끈거려요", "목구멍이 따끔거리고 기침이 나요", "mild headache since yesterday",
+                 # 응급 어휘와 글자가 겹치는 일상 표현
+                 "어제 축구 경기를 보고 나서 머리가 아파요", "눈밑 경련이 계속 있어요", "발작적으로 기침이 나요",
+                 "숨이 막힐 듯이 덥네요", "heatstroke", "a stroke of luck"]:
+        assert categories(text) == [], text
+
+def test_emergency_phrases_still_flagged():
+    assert categories("아이가 경기를 일으켰어요") == ["seizure"]
+    assert categories("전신 경련이 5분째예요") == ["seizure"]
+    assert categories("아이가 경련을 하다가 의식을 잃었어요") == ["seizure", "consciousness"]
+    assert categories("숨이 막혀요") == ["respiratory"]
+    assert categories("I think my dad is having a stroke") == ["stroke"]
+    assert categories("she had seizures this morning") == ["seizure"]
+
+def test_aho_corasick_reports_overlapping_patterns():
+    matcher = AhoCorasick({"he": "a", "she": "b", "hers": "c"})
+    found = sorted((start, pattern) for start, _, pattern, _ in matcher.finditer("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+def test_guidance_combines_categories():
+    text = guidance(["cardiac", "respiratory"])
+    assert "심근경색" in text and "호흡부전" in text
+    assert text.count("즉시 119에 신고하세요.") == 1
+
+if __name__ == "__main__":
+    test_korean_red_flags_ignore_spacing()
+    test_negated_mentions_are_not_flagged()
+    test_routine_complaints_pass_through()
+    test_emergency_phrases_still_flagged()
+    test_aho_corasick_reports_overlapping_patterns()
+    test_guidance_combines_categories()
+    print("red flag tests passed")
@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from src import graph as graph_module
+from src.nodes import diagnosis_generator
+
+def build_graph(events):
+    """LLM/검색 노드를 실행 순서를 기록하는 가짜 노드로 바꿔 그래프 구조만 검증합니다."""
+    async def symptom_analyzer(state, config):
+        return {"symptoms": ["두통"], "next_step": "specialist_router"}
+
+    async def specialist_router(state, config):
+        return {"next_step": "general_advice"}
+
+    async def medical_rag(state, config):
+        events.append("rag:start")
+        await asyncio.sleep(0.02)
+        events.append("rag:end")
+        return {"medical_evidence": ["evidence"]}
+
+    async def research_critic(state, config):
+        count = (state.get("search_count") or 0) + 1
+        events.append(f"critic:{count}")
+        return {"search_count": count, "next_step": "medical_rag" if count < 2 else "diagnosis_generator"}
+
+    async def medication_search(state, config):
+        events.append("medication:start")
+        await asyncio.sleep(0.01)
+        events.append("medication:end")
+        return {"medications": ["타이레놀"], "medication_info": "복용 약물: 타이레놀"}
+
+    async def diagnosis_generator(state, config):
+        events.append(f"diagnosis:{state.get('medication_info')}")
+        return {"diagnosis_hypothesis": "report", "messages": [AIMessage(content="report")]}
+
+    async def fact_checker(state, config):
+        events.append("fact_checker")
+        return {"critique": "valid"}
+
+    replacements = {
+        "symptom_analyzer_node": symptom_analyzer,
+        "specialist_router_node": specialist_router,
+        "medical_rag_node": medical_rag,
+        "research_critic_node": research_critic,
+        "medication_search_node": medication_search,
+        "diagnosis_generator_node": diagnosis_generator,
+        "fact_checker_node": fact_checker,
+    }
+    originals = {name: getattr(graph_module, name) for name in replacements}
+    try:
+        for name, fake in replacements.items():
+            setattr(graph_module, name, fake)
+        return graph_module.create_graph(MemorySaver())
+    finally:
+        for name, original in originals.items():
+            setattr(graph_module, name, original)
+
+def run_turn(text):
+    events = []
+    graph = build_graph(events)
+    config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    asyncio.run(graph.ainvoke({"messages": [HumanMessage(content=text)], "degraded": None}, config=config))
+    return events
+
+def test_medication_runs_alongside_research_and_reaches_diagnosis():
+    events = run_turn("머리가 아파서 타이레놀 먹었어요")
+    # 약물 추출이 검색과 같은 super-step에서 시작
+    assert events.index("medication:start") < events.index("rag:end")
+    # 크리틱 재검색 루프가 끝난 뒤 한 번만 진단 생성
+    assert events.count("critic:2") == 1
+    assert [e for e in events if e.startswith("diagnosis")] == ["diagnosis:복용 약물: 타이레놀"]
+    assert events.index("critic:2") < events.index("diagnosis:복용 약물: 타이레놀") < events.index("fact_checker")
+
+def test_diagnosis_prompt_receives_medication_info():
+    captured = {}
+
+    class FakeChain:
+        async def ainvoke(self, inputs, config=None):
+            captured.update(inputs)
+            return {"diagnosis": "긴장성 두통", "confidence": "80%", "explanation": "", "doctor_pass": "- 타이레놀 복용"}
+
+    original = diagnosis_generator._chain
+    diagnosis_generator._chain = lambda: FakeChain()
+    try:
+        state = {"symptoms": ["두통"], "medical_evidence": ["evidence"], "messages": [], "medication_info": "복용 약물: 타이레놀"}
+        result = asyncio.run(diagnosis_generator.diagnosis_generator_node(state, {}))
+    finally:
+        diagnosis_generator._chain = original
+    assert captured["medication_info"] == "복용 약물: 타이레놀"
+    assert "타이레놀" in diagnosis_generator._PROMPT.format(**captured)
+    assert result["doctor_pass"] == "- 타이레놀 복용"
+
+def test_without_medication_keywords_research_only():
+    events = run_turn("머리가 지끈거려요")
+    assert "medication:start" not in events
+    assert events[-2:] == ["diagnosis:None", "fact_checker"]
+
+if __name__ == "__main__":
+    test_medication_runs_alongside_research_and_reaches_diagnosis()
+    test_diagnosis_prompt_receives_medication_info()
+    test_without_medication_keywords_research_only()
+    print("research fan-out tests passed")
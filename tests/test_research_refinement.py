@@ -0,0 +1,74 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import FakeSearch
+from src.nodes import medical_rag, research_critic
+
+class FakeChain:
+    def __init__(self, content):
+        self.content = content
+
+    async def ainvoke(self, inputs, config=None):
+        return SimpleNamespace(content=self.content)
+
+EXISTING = ["Tension-type headache presents as bilateral pressing pain relieved by rest and analgesics."]
+
+@pytest.fixture
+def run_rag(use_search):
+    def run(search, state):
+        use_search(search)
+        return asyncio.run(medical_rag.medical_rag_node(state, {}))
+    return run
+
+@pytest.fixture
+def run_critic(monkeypatch):
+    # 단일 쿼리 검색 기준 (라운드 제한은 RAG_FANOUT을 호출 시점에 읽음)
+    monkeypatch.setattr(medical_rag, "RAG_FANOUT", False)
+
+    def run(content, state):
+        monkeypatch.setattr(research_critic, "_chain", lambda: FakeChain(content))
+        return asyncio.run(research_critic.research_critic_node(state, {}))
+    return run
+
+def test_refined_round_uses_suggested_query_and_accumulates(run_rag):
+    search = FakeSearch([
+        {"url": "https://guidelines.example/migraine", "content": "Migraine is unilateral, pulsating and worsened by routine physical activity."},
+    ])
+    result = run_rag(search, {"symptoms": ["두통"], "refined_query": "migraine diagnostic criteria", "medical_evidence": EXISTING})
+    assert search.queries[0].startswith("migraine diagnostic criteria")
+    assert result["medical_evidence"][0] == EXISTING[0] and len(result["medical_evidence"]) == 2
+    assert result["evidence_added"] == 1
+
+def test_refined_round_with_only_known_evidence_adds_nothing(run_rag):
+    search = FakeSearch([{"url": "https://guidelines.example/tth", "content": EXISTING[0]}])
+    result = run_rag(search, {"symptoms": ["두통"], "refined_query": "tension headache", "medical_evidence": EXISTING})
+    assert result["medical_evidence"] == EXISTING and result["evidence_added"] == 0
+
+def test_critic_passes_parsed_query_to_next_round(run_critic):
+    result = run_critic("INSUFFICIENT: [migraine red flags in adults]\n추가 설명", {"symptoms": ["두통"], "medical_evidence": EXISTING, "search_count": 0})
+    assert result == {"search_count": 1, "next_step": "medical_rag", "refined_query": "migraine red flags in adults"}
+
+def test_critic_stops_when_round_added_nothing(run_critic):
+    result = run_critic("INSUFFICIENT: [other query]", {"symptoms": ["두통"], "medical_evidence": EXISTING, "search_count": 1, "evidence_added": 0})
+    assert result == {"next_step": "diagnosis_generator"}
+
+def test_critic_stops_on_repeated_or_missing_query(run_critic):
+    state = {"symptoms": ["두통"], "medical_evidence": EXISTING, "search_count": 1, "evidence_added": 2, "refined_query": "migraine"}
+    assert run_critic("INSUFFICIENT: [migraine]", state) == {"next_step": "diagnosis_generator"}
+    assert run_critic("INSUFFICIENT", state) == {"next_step": "diagnosis_generator"}
+
+def test_round_limit_follows_fanout_flag_at_call_time(run_critic, monkeypatch):
+    state = {"symptoms": ["두통"], "medical_evidence": EXISTING, "search_count": 1, "evidence_added": 2, "refined_query": "migraine"}
+    assert run_critic("INSUFFICIENT: [tension headache triggers]", state)["next_step"] == "medical_rag"
+    monkeypatch.setattr(medical_rag, "RAG_FANOUT", True)
+    assert research_critic.max_search_rounds() == research_critic.FANOUT_MAX_SEARCH_ROUNDS == 1
+    assert run_critic("INSUFFICIENT: [tension headache triggers]", state) == {"next_step": "diagnosis_generator"}
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
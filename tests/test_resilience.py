@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+
+from langchain_core.runnables import RunnableLambda
+
+from src.utils import llm, resilience
+from src.utils.resilience import resilient_call, RetryBudget
+
+class RateLimitError(Exception):
+    pass
+
+def test_hedge_wins_when_primary_is_slow():
+    resilience.latency_tracker.samples.clear()
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        resilience.latency_tracker.observe("hedge_test", 0.01)
+    resilience.HEDGE_MIN_DELAY_SECONDS = 0.05
+    calls = []
+
+    async def call():
+        calls.append(len(calls))
+        await asyncio.sleep(5 if len(calls) == 1 else 0.01)
+        return f"attempt-{len(calls)}"
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        result = await resilient_call(call, None, cap=10, node="hedge_test")
+        return result, asyncio.get_running_loop().time() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == "attempt-2" and len(calls) == 2
+    assert elapsed < 1
+
+def test_retries_stop_when_budget_is_empty():
+    resilience.retry_budget = RetryBudget(ratio=0, min_per_second=0, max_tokens=1)
+    resilience.RETRY_BASE_SECONDS = 0.001
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise RateLimitError("429")
+
+    try:
+        asyncio.run(resilient_call(call, None, cap=5, node="budget_test"))
+        assert False, "should raise"
+    except RateLimitError:
+        pass
+    # 예산 1개 → 최초 시도 + 재시도 1회
+    assert len(calls) == 2
+
+def test_non_retryable_error_is_raised_immediately():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    try:
+        asyncio.run(resilient_call(call, None, cap=5, node="plain_test"))
+        assert False, "should raise"
+    except ValueError:
+        pass
+    assert len(calls) == 1
+
+def test_policy_fallback_runs_inside_one_attempt():
+    os.environ["LLM_MODEL_POLICY"] = json.dumps({"slow_node": {"model": "gpt-4o", "fallback": "gpt-4o-mini", "timeout": 0.2}})
+    llm.get_model_policy.cache_clear()
+    originals = resilience.ATTEMPT_TIMEOUT_SECONDS, resilience.FALLBACK_ATTEMPT_SECONDS
+    resilience.ATTEMPT_TIMEOUT_SECONDS, resilience.FALLBACK_ATTEMPT_SECONDS = 0.2, 0.3
+    calls = []
+
+    async def slow_primary(inputs):
+        calls.append("primary")
+        # 기본 모델 클라이언트가 정책 timeout에서 타임아웃 오류를 내는 상황
+        await asyncio.sleep(0.25)
+        raise TimeoutError("primary timed out")
+
+    async def fast_fallback(inputs):
+        calls.append("fallback")
+        return "fallback answer"
+
+    chain = RunnableLambda(slow_primary).with_fallbacks([RunnableLambda(fast_fallback)])
+    try:
+        assert resilience.attempt_timeout_for("slow_node") == 0.5
+        result = asyncio.run(resilient_call(lambda: chain.ainvoke({}), None, cap=5, node="slow_node"))
+    finally:
+        os.environ.pop("LLM_MODEL_POLICY", None)
+        llm.get_model_policy.cache_clear()
+        resilience.ATTEMPT_TIMEOUT_SECONDS, resilience.FALLBACK_ATTEMPT_SECONDS = originals
+    assert result == "fallback answer"
+    assert calls == ["primary", "fallback"]
+
+if __name__ == "__main__":
+    test_hedge_wins_when_primary_is_slow()
+    test_retries_stop_when_budget_is_empty()
+    test_non_retryable_error_is_raised_immediately()
+    test_policy_fallback_runs_inside_one_attempt()
+    print("resilience tests passed")
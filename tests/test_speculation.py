@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+
+from conftest import FakeSearch
+from src.nodes import medical_rag, specialist_router
+from src.utils.cache import medical_search_cache
+
+def slow_search():
+    return FakeSearch(lambda index, query: [{"url": "https://example.org", "content": f"evidence for {query[:20]}"}], delay=0.05)
+
+@pytest.fixture(autouse=True)
+def speculative(monkeypatch):
+    monkeypatch.setattr(medical_rag, "SPECULATIVE_SEARCH", True)
+
+def test_router_started_search_is_reused_by_medical_rag(use_search):
+    search = use_search(slow_search())
+    state = {"symptoms": ["명치 통증", "속쓰림"]}
+
+    async def turn():
+        key = medical_rag.start_speculative_search(state["symptoms"], {})
+        assert key is not None
+        # 같은 검색은 중복으로 시작하지 않음
+        assert medical_rag.start_speculative_search(state["symptoms"], {}) is None
+        await asyncio.sleep(0.01)  # 라우터 LLM 호출 시간
+        return await medical_rag.medical_rag_node(state, {})
+
+    result = asyncio.run(turn())
+    assert search.calls == 1
+    assert result["medical_evidence"][0].startswith("evidence for")
+    stats = medical_rag.speculation_stats()
+    assert stats["used"] >= 1 and stats["saved_seconds_total"] > 0
+
+def test_discarded_speculation_still_fills_cache(use_search):
+    use_search(slow_search())
+    symptoms = ["가슴 두근거림"]
+
+    async def emergency_turn():
+        key = medical_rag.start_speculative_search(symptoms, {})
+        medical_rag.discard_speculative_search(key)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(emergency_turn())
+    assert medical_search_cache.contains(medical_rag._cache_key(medical_rag.build_query(symptoms)))
+    assert medical_rag.speculation_stats()["discarded"] >= 1
+
+def test_finished_speculation_is_counted_as_used(use_search):
+    search = use_search(slow_search())
+    state = {"symptoms": ["옆구리 통증"]}
+    before = medical_rag.speculation_stats()["used"]
+
+    async def turn():
+        medical_rag.start_speculative_search(state["symptoms"], {})
+        await asyncio.sleep(0.1)  # 라우터보다 검색이 먼저 끝난 경우
+        return await medical_rag.medical_rag_node(state, {})
+
+    asyncio.run(turn())
+    assert search.calls == 1
+    stats = medical_rag.speculation_stats()
+    assert stats["used"] == before + 1 and stats["pending"] == 0
+
+def test_router_error_discards_speculation(use_search, monkeypatch):
+    use_search(slow_search())
+    before = medical_rag.speculation_stats()["discarded"]
+
+    class FailingChain:
+        async def ainvoke(self, inputs, config=None):
+            raise ValueError("bad request")
+
+    monkeypatch.setattr(specialist_router, "_chain", lambda: FailingChain())
+    with pytest.raises(ValueError):
+        asyncio.run(specialist_router.specialist_router_node({"symptoms": ["발목 부종"]}, {}))
+    stats = medical_rag.speculation_stats()
+    assert stats["discarded"] == before + 1 and stats["pending"] == 0
+
+if __name__ == "__main__":
+    sys.exit(pytest.main(["-q", __file__]))
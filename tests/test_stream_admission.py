@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from starlette.requests import ClientDisconnect
+
+from src import api
+from src.utils.admission import AdmissionController
+
+SCOPE = {"type": "http", "asgi": {"spec_version": "2.4"}}
+
+class EmptyGraph:
+    def astream(self, *args, **kwargs):
+        async def events():
+            return
+            yield
+        return events()
+
+async def no_message():
+    await asyncio.Event().wait()
+
+async def gone(message):
+    # 클라이언트가 이미 연결을 끊은 경우 ASGI 서버의 send는 OSError를 냅니다.
+    raise OSError("client disconnected")
+
+async def serve_disconnected(response):
+    try:
+        await response(SCOPE, no_message, gone)
+    except ClientDisconnect:
+        pass
+
+def with_controller(controller, graph=None):
+    """api 모듈의 승인 제어기(와 그래프)를 테스트 동안만 바꿉니다."""
+    def decorator(test):
+        def wrapper():
+            originals = api.admission_controller, api._graph
+            api.admission_controller = controller
+            if graph is not None:
+                api._graph = graph
+            try:
+                test()
+            finally:
+                api.admission_controller, api._graph = originals
+        wrapper.__name__ = test.__name__
+        return wrapper
+    return decorator
+
+@with_controller(AdmissionController(max_inflight=1))
+def test_slot_released_when_body_is_never_consumed():
+    async def scenario():
+        response = await api.chat_stream_endpoint(api.ChatRequest(message="머리가 아파요"))
+        assert api.admission_controller.inflight == 1
+        # 클라이언트가 본문 시작 전에 끊은 경우: 생성기는 실행되지 않고 응답 종료 훅만 실행됨
+        await serve_disconnected(response)
+        return api.admission_controller.inflight
+
+    assert asyncio.run(scenario()) == 0
+
+@with_controller(AdmissionController(max_inflight=2), EmptyGraph())
+def test_slot_released_once_when_body_completes():
+    async def scenario():
+        first = await api.chat_stream_endpoint(api.ChatRequest(message="머리가 아파요"))
+        second = await api.chat_stream_endpoint(api.ChatRequest(message="기침이 나요"))
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await first(SCOPE, no_message, send)
+        # 생성기와 응답 종료 훅이 모두 실행되어도 다른 요청의 슬롯까지 반환하지 않음
+        inflight = api.admission_controller.inflight
+        await serve_disconnected(second)
+        return sent, inflight
+
+    sent, inflight = asyncio.run(scenario())
+    bodies = [m.get("body", b"") for m in sent if m["type"] == "http.response.body"]
+    assert b"".join(bodies).decode().split("\n\n")[-2].startswith("event: done")
+    assert inflight == 1 and api.admission_controller.inflight == 0
+
+@with_controller(AdmissionController(max_inflight=1))
+def test_queued_request_admitted_after_stream_client_disconnects():
+    async def scenario():
+        first = await api.chat_stream_endpoint(api.ChatRequest(message="머리가 아파요"))
+        second = asyncio.create_task(api.chat_stream_endpoint(api.ChatRequest(message="기침이 나요")))
+        await asyncio.sleep(0.01)
+        assert not second.done()  # 첫 스트림 뒤에서 대기 중
+
+        await serve_disconnected(first)
+        response = await asyncio.wait_for(second, 1)
+        assert api.admission_controller.inflight == 1
+        await serve_disconnected(response)
+        return api.admission_controller.inflight
+
+    assert asyncio.run(scenario()) == 0
+
+if __name__ == "__main__":
+    test_slot_released_when_body_is_never_consumed()
+    test_slot_released_once_when_body_completes()
+    test_queued_request_admitted_after_stream_client_disconnects()
+    print("stream admission tests passed")
@@ -4,9 +4,10 @@ sys.path.append(os.getcwd())
 
 from src.graph import create_graph
 from langchain_core.messages import HumanMessage, AIMessage
+import asyncio
 import uuid
 
-def test_user_scenario():
+async def test_user_scenario():
     graph = create_graph()
     thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
@@ -29,8 +30,8 @@ def test_user_scenario():
             inputs_state = {"messages": messages}
             
             # 스트리밍 실행 (api.py 방식)
-            events = graph.stream(inputs_state, config=config)
-            for event in events:
+            events = graph.astream(inputs_state, config=config)
+            async for event in events:
                 for key, value in event.items():
                     print(f"Node: [{key}]")
                     # 여기서 value가 None인지, 또는 value 안에 None이 있는지 체크
@@ -65,4 +66,4 @@ def test_user_scenario():
     print("\n✅ User scenario completed without crash.")
 
 if __name__ == "__main__":
-    test_user_scenario()
+    asyncio.run(test_user_scenario())
@@ -1,5 +1,6 @@
 from src.graph import create_graph
 from langchain_core.messages import HumanMessage
+import asyncio
 
 def run_test(scenario_name, user_input):
     print(f"\n--- 테스트 시나리오 실행: {scenario_name} ---")
@@ -10,7 +11,7 @@ def run_test(scenario_name, user_input):
     initial_state = {"messages": [HumanMessage(content=user_input)]}
     
     try:
-        final_state = graph.invoke(initial_state)
+        final_state = asyncio.run(graph.ainvoke(initial_state))
         
         print(f"최종 노드 도달. 최종 상태 키(Keys): {final_state.keys()}")
         print(f"추출된 증상: {final_state.get('symptoms')}")